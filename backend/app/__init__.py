@@ -5,28 +5,41 @@ Multimo Flask 应用入口
 提供 API 认证、限流、输入验证和 CORS 安全配置
 """
 
-from flask import Flask, jsonify, request
-from flask_cors import CORS
+from flask import Flask, request, g
+from typing import Optional
+import gzip
+import logging
 import os
-import uuid
+import random
+import threading
 
 from app.config_new import get_config
-from app.api import init_api, register_routes
 from app.utils import get_logger
-from app.models.task import TaskManager
+from app.utils.json_provider import init_json_provider
 
 logger = get_logger(__name__)
 
 
-def create_app(config_override: dict = None) -> Flask:
+def create_app(
+    config_override: dict = None,
+    skip_recovery: bool = False,
+    skip_reports: bool = False
+) -> Flask:
     """创建 Flask 应用实例
     
+    路由模块、任务管理器和报告工作器均在函数内按需导入，
+    只需要 WSGI 对象的 CLI / 测试 / worker 进程不必承担全部导入开销。
+    
     Args:
         config_override: 配置覆盖字典
+        skip_recovery: 跳过任务和自动模式的中断恢复（测试夹具使用）
+        skip_reports: 跳过报告任务恢复，不导入 report_task_worker
         
     Returns:
         Flask 应用实例
     """
+    from app.api import init_api, register_routes
+    
     config = get_config()
     
     if config_override:
@@ -41,14 +54,15 @@ def create_app(config_override: dict = None) -> Flask:
     
     app = Flask(__name__)
     
-    flask_config = config.get_flask_config()
-    for key, value in flask_config.items():
-        app.config[key] = value
+    app.config.update(config.get_flask_config())
+    init_json_provider(app)
     
     logger.info(f"Flask 应用初始化: DEBUG={config.DEBUG}")
     
     apply_security_headers(app, config)
     
+    init_response_compression(app, config)
+    
     init_rate_limiting(app, config)
     
     init_auth(app)
@@ -57,34 +71,88 @@ def create_app(config_override: dict = None) -> Flask:
     
     init_api(app)
     
-    register_error_handlers(app)
+    register_error_handlers(app, config)
     
-    task_manager = TaskManager()
-    task_manager.recover_tasks()
-    logger.info("任务恢复检查完成")
+    start_task_recovery(skip_recovery=skip_recovery, skip_reports=skip_reports)
     
-    # 恢复中断的报告生成任务
-    try:
-        from app.services.report_task_worker import get_report_task_worker
-        report_worker = get_report_task_worker()
-        recovered_report_tasks = report_worker.recover_interrupted_tasks()
-        if recovered_report_tasks:
-            logger.info(f"已恢复 {len(recovered_report_tasks)} 个中断的报告任务")
-    except Exception as e:
-        logger.warning(f"报告任务恢复检查失败: {e}")
+    logger.info("Flask 应用初始化完成")
+    
+    return app
+
+
+def start_task_recovery(
+    skip_recovery: bool = False,
+    skip_reports: bool = False
+) -> Optional[threading.Thread]:
+    """在后台线程中恢复中断的任务
+    
+    恢复涉及数据库扫描和报告任务重启，放到守护线程中执行，
+    避免阻塞应用构建和每个 worker 的就绪时间。
+    中断任务的 ID 在此同步快照（一次索引查询），后台线程只处理快照中的任务，
+    应用开始处理请求后新建或启动的任务不会被误判为中断。
+    
+    Args:
+        skip_recovery: 跳过任务和自动模式的中断恢复
+        skip_reports: 跳过报告任务恢复
+        
+    Returns:
+        恢复线程；无需恢复时返回 None
+    """
+    if skip_recovery and skip_reports:
+        return None
     
-    # 恢复中断的自动模式任务
     try:
-        from app.services.auto_pilot_manager import AutoPilotManager
-        auto_pilot_manager = AutoPilotManager()
-        recovered_auto_pilot_tasks = auto_pilot_manager.recover_interrupted_tasks()
-        # recover_interrupted_tasks() 内部已经记录了日志，这里不需要重复记录
+        from app.models.task import snapshot_active_task_ids
+        interrupted_task_ids = snapshot_active_task_ids()
     except Exception as e:
-        logger.warning(f"自动模式任务恢复检查失败: {e}")
-    
-    logger.info("Flask 应用初始化完成")
+        logger.warning(f"读取中断任务失败，跳过任务恢复: {e}")
+        interrupted_task_ids = frozenset()
+    
+    thread = threading.Thread(
+        target=_recover_interrupted_tasks,
+        args=(interrupted_task_ids, skip_recovery, skip_reports),
+        name="task-recovery",
+        daemon=True
+    )
+    thread.start()
+    return thread
+
+
+def _recover_interrupted_tasks(
+    interrupted_task_ids: frozenset,
+    skip_recovery: bool,
+    skip_reports: bool
+) -> None:
+    """依次恢复启动时快照的普通任务、报告生成任务，以及自动模式任务"""
+    if not skip_recovery:
+        try:
+            from app.models.task import TaskManager
+            task_manager = TaskManager()
+            task_manager.recover_tasks(interrupted_task_ids)
+            logger.info("任务恢复检查完成")
+        except Exception as e:
+            logger.warning(f"任务恢复检查失败: {e}")
     
-    return app
+    # 恢复中断的报告生成任务
+    if not skip_reports:
+        try:
+            from app.services.report_task_worker import get_report_task_worker
+            report_worker = get_report_task_worker()
+            recovered_report_tasks = report_worker.recover_interrupted_tasks(interrupted_task_ids)
+            if recovered_report_tasks:
+                logger.info(f"已恢复 {len(recovered_report_tasks)} 个中断的报告任务")
+        except Exception as e:
+            logger.warning(f"报告任务恢复检查失败: {e}")
+    
+    # 恢复中断的自动模式任务（共享的管理器会跳过启动后由请求开启、线程仍在运行的任务）
+    if not skip_recovery:
+        try:
+            from app.services.auto_pilot_manager import get_auto_pilot_manager
+            auto_pilot_manager = get_auto_pilot_manager()
+            auto_pilot_manager.recover_interrupted_tasks()
+            # recover_interrupted_tasks() 内部已经记录了日志，这里不需要重复记录
+        except Exception as e:
+            logger.warning(f"自动模式任务恢复检查失败: {e}")
 
 
 def apply_security_headers(app: Flask, config) -> None:
@@ -100,22 +168,84 @@ def apply_security_headers(app: Flask, config) -> None:
         logger.info("安全响应头已禁用")
         return
     
+    from app.api import HEALTH_CHECK_PATH
+    
+    # 安全头在注册时计算一次，请求期间只做赋值
+    security_headers = tuple(
+        (header_name, header_value)
+        for header_name, header_value in config.get_security_headers().items()
+        if header_value
+    )
+    
+    @app.before_request
+    def assign_request_id():
+        """沿用上游代理注入的 X-Request-ID，否则生成 8 位十六进制 ID，存入 g 供日志使用"""
+        g.request_id = request.headers.get("X-Request-ID") or os.urandom(4).hex()
+    
     @app.after_request
     def add_security_headers(response):
-        """在每个响应中添加安全头"""
-        security_headers = config.get_security_headers()
+        """在每个响应中添加安全头（健康检查探针除外）"""
+        if request.path == HEALTH_CHECK_PATH:
+            return response
         
-        for header_name, header_value in security_headers.items():
-            if header_value:
-                response.headers[header_name] = header_value
+        for header_name, header_value in security_headers:
+            response.headers[header_name] = header_value
         
-        response.headers["X-Request-ID"] = str(uuid.uuid4())[:8]
+        response.headers["X-Request-ID"] = g.get("request_id") or os.urandom(4).hex()
         
         return response
     
     logger.info("安全响应头中间件已注册")
 
 
+def init_response_compression(app: Flask, config) -> None:
+    """初始化响应压缩
+    
+    对客户端接受 gzip 的较大 JSON 响应进行压缩（分页列表、状态轮询等）。
+    流式响应（SSE、文件下载）和已带 Content-Encoding 的响应保持原样。
+    
+    Args:
+        app: Flask 应用实例
+        config: 配置实例
+    """
+    if not config.RESPONSE_COMPRESSION_ENABLED:
+        logger.info("响应压缩已禁用")
+        return
+    
+    min_size = config.COMPRESS_MIN_SIZE
+    level = config.COMPRESS_LEVEL
+    
+    @app.after_request
+    def compress_response(response):
+        """gzip 压缩符合条件的 JSON 响应"""
+        if (
+            response.direct_passthrough
+            or response.is_streamed
+            or response.mimetype != "application/json"
+            or not 200 <= response.status_code < 300
+            or "Content-Encoding" in response.headers
+            or "gzip" not in request.accept_encodings
+        ):
+            return response
+        
+        data = response.get_data()
+        if len(data) < min_size:
+            return response
+        
+        response.set_data(gzip.compress(data, compresslevel=level))
+        response.headers["Content-Encoding"] = "gzip"
+        response.vary.add("Accept-Encoding")
+        
+        # 编码后的表示与原文不再逐字节相同，强 ETag 降为弱 ETag
+        etag, weak = response.get_etag()
+        if etag and not weak:
+            response.set_etag(etag, weak=True)
+        
+        return response
+    
+    logger.info("响应压缩中间件已注册")
+
+
 def init_rate_limiting(app: Flask, config) -> None:
     """初始化请求限流
     
@@ -137,7 +267,7 @@ def init_rate_limiting(app: Flask, config) -> None:
     
     kwargs = {
         "key_func": get_remote_address,
-        "strategy": limiter_config.get("strategy", "moving-window"),
+        "strategy": limiter_config.get("strategy", "fixed-window"),
         "default_limits": [limiter_config.get("default", "200/hour")],
         "headers_enabled": True,
         "retry_after": "delta"
@@ -145,6 +275,13 @@ def init_rate_limiting(app: Flask, config) -> None:
     
     if limiter_config["storage"] == "redis" and limiter_config.get("redis_url"):
         kwargs["storage_uri"] = limiter_config["redis_url"]
+        # 复用长连接池，避免每次限流检查重新建立 TCP 连接
+        kwargs["storage_options"] = {
+            "max_connections": limiter_config.get("redis_max_connections", 50),
+            "socket_keepalive": True
+        }
+        # Redis 不可用时退回内存限流，而不是让请求失败
+        kwargs["in_memory_fallback_enabled"] = True
         logger.info(f"使用 Redis 存储限流配置: {limiter_config['redis_url']}")
     
     limiter = Limiter(**kwargs)
@@ -171,84 +308,135 @@ def init_auth(app: Flask) -> None:
     auth_init(app)
 
 
-def register_error_handlers(app: Flask):
+# HTTP 错误处理器配置：状态码 -> (日志级别, 日志标签)
+HTTP_ERROR_LOG = {
+    400: ("warning", "400 错误请求"),
+    401: ("warning", "401 未授权访问"),
+    403: ("warning", "403 禁止访问"),
+    404: ("warning", "404 资源不存在"),
+    405: ("warning", "405 不支持的方法"),
+    409: ("warning", "409 资源冲突"),
+    422: ("warning", "422 数据验证失败"),
+    429: ("warning", "429 请求频率限制"),
+    500: ("error", "500 服务器内部错误"),
+    502: ("error", "502 网关错误"),
+    503: ("error", "503 服务暂时不可用"),
+}
+
+
+# 未捕获异常分类（isinstance 同时覆盖子类）
+VALIDATION_ERRORS = (ValueError, TypeError, KeyError)
+CONNECTION_ERRORS = (ConnectionError, TimeoutError)
+
+
+def _sample_exc_info(sample_rate: float) -> bool:
+    """按采样比例决定本次错误日志是否附带堆栈
+    
+    格式化完整堆栈在请求线程上同步进行，错误激增时只对部分请求记录。
+    """
+    return sample_rate >= 1.0 or random.random() < sample_rate
+
+
+# 调试日志中附带请求体的大小上限（字节）
+ERROR_CONTEXT_MAX_BODY = 16384
+
+
+def _build_error_context(error: Exception, error_type: str, include_request_data: bool) -> dict:
+    """构建未捕获异常的日志上下文
+    
+    请求体只在调试模式、JSON 请求且体积不超过上限时附带；
+    get_json 会复用视图中已解析的结果，不会重复解析。
+    """
+    error_context = {
+        "error_type": error_type,
+        "error_message": str(error),
+        "request_path": request.path,
+        "request_method": request.method,
+        "request_endpoint": request.endpoint,
+    }
+    
+    if include_request_data:
+        if not request.is_json:
+            error_context["request_data"] = "<非JSON请求>"
+        elif (request.content_length or 0) > ERROR_CONTEXT_MAX_BODY:
+            error_context["request_data"] = f"<请求体过大: {request.content_length} 字节>"
+        else:
+            error_context["request_data"] = request.get_json(silent=True)
+    
+    return error_context
+
+
+def _make_http_error_handler(
+    status_code: int,
+    level: str,
+    label: str,
+    exc_sample_rate: float
+):
+    """为单个 HTTP 状态码构建错误处理器
+    
+    响应体在注册时序列化一次；error 级别按采样比例附带堆栈信息。
+    """
+    from app.api import get_http_error_response
+    from app.api.response import prebuilt_json
+    
+    log = getattr(logger, level)
+    is_error = level == "error"
+    response_body, _ = get_http_error_response(status_code)
+    make_response = prebuilt_json(response_body, status_code)
+    
+    def handle_http_error(error):
+        detail = error if is_error else getattr(error, "description", error)
+        log("%s: %s", label, detail, exc_info=is_error and _sample_exc_info(exc_sample_rate))
+        return make_response()
+    
+    return handle_http_error
+
+
+def register_error_handlers(app: Flask, config):
     """注册错误处理器
     
     提供统一的错误处理，包括详细的日志记录和用户友好的错误响应
     
     Args:
         app: Flask 应用实例
+        config: 配置实例
     """
-    from app.api import get_http_error_response, get_error_response, ErrorCode
-    
-    @app.errorhandler(400)
-    def bad_request(error):
-        """处理 400 错误请求"""
-        logger.warning(f"400 错误 - 请求路径: {error.description}")
-        return jsonify(get_http_error_response(400)), 400
-    
-    @app.errorhandler(401)
-    def unauthorized(error):
-        """处理 401 未授权错误"""
-        logger.warning(f"401 未授权访问 - 路径: {error.description}")
-        return jsonify(get_http_error_response(401)), 401
-    
-    @app.errorhandler(403)
-    def forbidden(error):
-        """处理 403 禁止访问错误"""
-        logger.warning(f"403 禁止访问 - 路径: {error.description}")
-        return jsonify(get_http_error_response(403)), 403
-    
-    @app.errorhandler(404)
-    def not_found(error):
-        """处理 404 资源不存在错误"""
-        logger.warning(f"404 资源不存在 - 路径: {error.description}")
-        return jsonify(get_http_error_response(404)), 404
-    
-    @app.errorhandler(405)
-    def method_not_allowed(error):
-        """处理 405 不允许的方法错误"""
-        logger.warning(f"405 不支持的方法: {error.description}")
-        return jsonify(get_http_error_response(405)), 405
-    
-    @app.errorhandler(409)
-    def conflict(error):
-        """处理 409 资源冲突错误"""
-        logger.warning(f"409 资源冲突: {error.description}")
-        return jsonify(get_http_error_response(409)), 409
-    
-    @app.errorhandler(422)
-    def unprocessable_entity(error):
-        """处理 422 无法处理的实体错误"""
-        logger.warning(f"422 数据验证失败: {error.description}")
-        return jsonify(get_http_error_response(422)), 422
-    
-    @app.errorhandler(429)
-    def rate_limit_exceeded(error):
-        """处理 429 请求过于频繁错误"""
-        logger.warning(f"429 请求频率限制: {error.description}")
-        return jsonify(get_http_error_response(429)), 429
-    
-    @app.errorhandler(500)
-    def internal_error(error):
-        """处理 500 服务器内部错误"""
-        logger.error(f"500 服务器内部错误: {error}", exc_info=True)
-        response, status = get_http_error_response(500)
-        return jsonify(response), status
-    
-    @app.errorhandler(502)
-    def bad_gateway(error):
-        """处理 502 网关错误"""
-        logger.error(f"502 网关错误: {error}", exc_info=True)
-        response, status = get_http_error_response(502)
-        return jsonify(response), status
-    
-    @app.errorhandler(503)
-    def service_unavailable(error):
-        """处理 503 服务不可用错误"""
-        logger.error(f"503 服务暂时不可用: {error}", exc_info=True)
-        response, status = get_http_error_response(503)
-        return jsonify(response), status
+    from app.api import get_error_response, ErrorCode
+    from app.api.response import prebuilt_json
+    
+    # 调试模式始终记录堆栈
+    exc_sample_rate = 1.0 if app.debug else config.EXC_INFO_SAMPLE_RATE
+    
+    for status_code, (level, label) in HTTP_ERROR_LOG.items():
+        app.register_error_handler(
+            status_code,
+            _make_http_error_handler(status_code, level, label, exc_sample_rate)
+        )
+    
+    # 未捕获异常的几类响应内容固定，同样预先序列化
+    validation_error_response = prebuilt_json(get_error_response(
+        error="请求数据处理失败，请检查输入格式",
+        status_code=400,
+        error_code=ErrorCode.VALIDATION_ERROR
+    ), 400)
+    connection_error_response = prebuilt_json(get_error_response(
+        error="无法连接到外部服务，请稍后重试",
+        status_code=503,
+        error_code=ErrorCode.EXTERNAL_SERVICE_ERROR
+    ), 503)
+    timeout_error_response = prebuilt_json(get_error_response(
+        error="请求超时，请稍后重试",
+        status_code=408,
+        error_code=ErrorCode.TIMEOUT_ERROR
+    ), 408)
+    internal_error_response = prebuilt_json(get_error_response(
+        error="系统发生未知错误，请稍后重试",
+        status_code=500,
+        error_code=ErrorCode.INTERNAL_ERROR
+    ), 500)
+    
+    # 调试模式下才在日志中附带请求体，生产环境不重复解析
+    include_request_data = app.debug
     
     @app.errorhandler(Exception)
     def handle_exception(error):
@@ -256,57 +444,29 @@ def register_error_handlers(app: Flask):
         
         记录完整的异常信息，包括堆栈跟踪，但确保不暴露敏感信息
         """
-        from flask import request
-        
         error_type = type(error).__name__
         
-        error_context = {
-            "error_type": error_type,
-            "error_message": str(error),
-            "request_path": request.path,
-            "request_method": request.method,
-            "request_endpoint": request.endpoint,
-        }
-        
-        if request.is_json:
-            try:
-                error_context["request_data"] = request.get_json(silent=True)
-            except Exception:
-                error_context["request_data"] = "<解析失败>"
+        if isinstance(error, VALIDATION_ERRORS):
+            level, label, make_response = logging.WARNING, "业务逻辑错误", validation_error_response
+        elif isinstance(error, CONNECTION_ERRORS):
+            level, label, make_response = logging.ERROR, "外部服务连接错误", connection_error_response
+        # 第三方库的超时异常（如 APITimeoutError、ReadTimeout）不继承 TimeoutError，按类名识别
+        elif "timeout" in error_type.lower():
+            level, label, make_response = logging.ERROR, "请求超时", timeout_error_response
         else:
-            error_context["request_data"] = "<非JSON请求>"
-        
-        if error_type in ["ValueError", "TypeError", "KeyError"]:
-            logger.warning(f"业务逻辑错误: {error_context}", exc_info=True)
-            return jsonify(get_error_response(
-                error="请求数据处理失败，请检查输入格式",
-                status_code=400,
-                error_code=ErrorCode.VALIDATION_ERROR
-            )), 400
-        
-        if error_type in ["ConnectionError", "TimeoutError"]:
-            logger.error(f"外部服务连接错误: {error_context}", exc_info=True)
-            return jsonify(get_error_response(
-                error="无法连接到外部服务，请稍后重试",
-                status_code=503,
-                error_code=ErrorCode.EXTERNAL_SERVICE_ERROR
-            )), 503
-        
-        if "timeout" in str(error).lower():
-            logger.error(f"请求超时: {error_context}", exc_info=True)
-            return jsonify(get_error_response(
-                error="请求超时，请稍后重试",
-                status_code=408,
-                error_code=ErrorCode.TIMEOUT_ERROR
-            )), 408
+            level, label, make_response = logging.ERROR, "未处理的异常", internal_error_response
         
-        logger.error(f"未处理的异常: {error_context}", exc_info=True)
+        # 上下文仅在日志级别启用时构建
+        if logger.isEnabledFor(level):
+            logger.log(
+                level,
+                "%s: %s",
+                label,
+                _build_error_context(error, error_type, include_request_data),
+                exc_info=_sample_exc_info(exc_sample_rate)
+            )
         
-        return jsonify(get_error_response(
-            error="系统发生未知错误，请稍后重试",
-            status_code=500,
-            error_code=ErrorCode.INTERNAL_ERROR
-        )), 500
+        return make_response()
 
 
 def run_server():
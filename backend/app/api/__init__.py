@@ -1,16 +1,20 @@
 # API 模块
+import importlib
+import traceback
 from enum import Enum
+from types import MappingProxyType
 from typing import Optional
-from flask import Blueprint
+from flask import Blueprint, request
 from flask_cors import CORS
 
 from app.config_new import get_config
 
 
-class ErrorCode(Enum):
+class ErrorCode(str, Enum):
     """错误代码枚举类
     
-    用于标识不同类型的错误，便于前端分类处理和用户提示
+    用于标识不同类型的错误，便于前端分类处理和用户提示。
+    继承 str，成员可直接参与 JSON 序列化和字符串比较。
     """
     INVALID_INPUT = "INVALID_INPUT"
     RESOURCE_NOT_FOUND = "RESOURCE_NOT_FOUND"
@@ -58,8 +62,10 @@ class ErrorRecovery:
     def get(cls, error_code: ErrorCode) -> str:
         """获取指定错误代码的恢复建议
         
+        ErrorCode 成员与其字符串值哈希一致，传入 "INVALID_INPUT" 等字符串同样可以命中。
+        
         Args:
-            error_code: 错误代码
+            error_code: 错误代码（枚举成员或其字符串值）
             
         Returns:
             恢复建议字符串
@@ -73,25 +79,49 @@ simulation_bp = Blueprint("simulation", __name__, url_prefix="/api/simulation")
 graph_bp = Blueprint("graph", __name__, url_prefix="/api/graph")
 report_bp = Blueprint("report", __name__, url_prefix="/api/report")
 
-# 获取配置
-config = get_config()
+# 需要登录才能访问的蓝图
+AUTH_REQUIRED_BLUEPRINTS = frozenset({simulation_bp.name, graph_bp.name, report_bp.name})
+
+# 根级健康检查（Docker healthcheck 使用）
+HEALTH_CHECK_PATH = "/api/health"
+HEALTH_CHECK_BODY = {
+    "success": True,
+    "status": "healthy",
+    "version": "2.0.0",
+    "message": "Multimo API is running"
+}
+
+# 需要跨域支持的路径（各 API 蓝图前缀）
+CORS_RESOURCES = {
+    rf"{bp.url_prefix}/.*": {}
+    for bp in (api_v1_bp, simulation_bp, graph_bp, report_bp)
+}
 
 
 def init_api(app):
     """初始化 API
     
+    配置在此处读取，导入 app.api 本身不做任何配置工作。
+    
     Args:
         app: Flask 应用实例
     """
-    # 配置 CORS
+    config = get_config()
+    
+    # 配置 CORS：仅作用于 API 蓝图路径，健康检查等其他响应不做跨域匹配
+    # 蓝图为模块级对象且可能被多个应用实例注册，因此在应用层按路径限定而非修改蓝图
     cors_config = config.get_cors_config()
-    CORS(app, **cors_config)
+    CORS(app, resources=CORS_RESOURCES, **cors_config)
 
-    # 蓝图级统一鉴权：graph / simulation / report 下所有路由需登录
+    # 统一鉴权：graph / simulation / report 下所有路由需登录
+    # 注册在应用上而非蓝图上，蓝图为模块级对象，多次创建应用时不会重复挂载
     from app.api.decorators import user_auth_required_for_request
-    graph_bp.before_request(user_auth_required_for_request)
-    simulation_bp.before_request(user_auth_required_for_request)
-    report_bp.before_request(user_auth_required_for_request)
+    
+    @app.before_request
+    def require_login_for_blueprints():
+        if request.blueprint in AUTH_REQUIRED_BLUEPRINTS:
+            return user_auth_required_for_request()
+        return None
 
     # 注册蓝图
     app.register_blueprint(api_v1_bp)
@@ -100,34 +130,54 @@ def init_api(app):
     app.register_blueprint(report_bp)
     
     # 添加根级健康检查路由（兼容 Docker healthcheck）
-    @app.route('/api/health', methods=['GET'])
+    # 探针高频调用，响应体预先序列化，并豁免限流
+    health_payload = app.json.dumps(HEALTH_CHECK_BODY, separators=(",", ":"))
+    health_mimetype = app.json.mimetype
+    
+    @app.route(HEALTH_CHECK_PATH, methods=['GET'])
     def root_health_check():
         """根级健康检查端点（兼容旧版配置）"""
-        return {
-            "success": True,
-            "status": "healthy",
-            "version": "2.0.0",
-            "message": "Multimo API is running"
-        }, 200
+        return app.response_class(health_payload, status=200, mimetype=health_mimetype)
+    
+    limiter = getattr(app, "limiter", None)
+    if limiter is not None:
+        limiter.exempt(root_health_check)
+
+
+# 路由模块列表（导入即通过装饰器注册到蓝图）
+ROUTE_MODULES = (
+    # v1 旧版路由
+    "app.api.v1.graph",
+    "app.api.v1.simulation",
+    "app.api.v1.report",
+    "app.api.v1.health",
+    "app.api.v1.interaction",
+    # 用户认证和邀请码路由
+    "app.api.v1.user_auth",
+    "app.api.v1.invitation",
+    # 新版完整路由
+    "app.api.graph",
+    "app.api.simulation",
+    "app.api.report",
+)
+
+_routes_registered = False
 
 
 def register_routes():
     """注册所有路由
     注意：实际的路由注册在各个路由文件中通过装饰器完成
-    此函数用于确保所有路由模块被导入
+    此函数用于确保所有路由模块被导入，重复调用不会再次导入
     """
-    # v1 旧版路由
-    from app.api.v1 import graph, simulation, report, health, interaction
-    
-    # 用户认证和邀请码路由
-    from app.api.v1 import user_auth, invitation
+    global _routes_registered
+    if _routes_registered:
+        return
     
-    # 新版完整路由
-    from app.api import graph as graph_module
-    from app.api import simulation as simulation_module
-    from app.api import report as report_module
+    for module_name in ROUTE_MODULES:
+        importlib.import_module(module_name)
     
     # 路由模块导入后自动注册
+    _routes_registered = True
 
 
 def get_response(data: any, status_code: int = 200, 
@@ -200,8 +250,6 @@ def make_error_response(
     Returns:
         错误响应字典
     """
-    import traceback
-    
     config = get_config()
     error_message = custom_message if custom_message else str(error)
     
@@ -219,6 +267,47 @@ def make_error_response(
     return response
 
 
+# HTTP 状态码 -> 错误代码（只读）
+HTTP_ERROR_CODES = MappingProxyType({
+    400: ErrorCode.INVALID_INPUT,
+    401: ErrorCode.UNAUTHORIZED,
+    403: ErrorCode.FORBIDDEN,
+    404: ErrorCode.RESOURCE_NOT_FOUND,
+    405: ErrorCode.INVALID_INPUT,
+    409: ErrorCode.CONFLICT,
+    422: ErrorCode.VALIDATION_ERROR,
+    429: ErrorCode.RATE_LIMIT_EXCEEDED,
+    500: ErrorCode.INTERNAL_ERROR,
+    502: ErrorCode.EXTERNAL_SERVICE_ERROR,
+    503: ErrorCode.EXTERNAL_SERVICE_ERROR,
+})
+
+# HTTP 状态码 -> 默认错误消息（只读）
+HTTP_ERROR_MESSAGES = MappingProxyType({
+    400: "请求参数错误",
+    401: "未授权访问",
+    403: "禁止访问",
+    404: "资源不存在",
+    405: "不支持的请求方法",
+    409: "资源冲突",
+    422: "数据验证失败",
+    429: "请求过于频繁",
+    500: "服务器内部错误",
+    502: "网关错误",
+    503: "服务暂时不可用",
+})
+
+# 预先构建的 HTTP 错误响应模板（只读），错误处理器只需复制
+_ERROR_TEMPLATES = MappingProxyType({
+    status_code: get_error_response(
+        error=HTTP_ERROR_MESSAGES[status_code],
+        status_code=status_code,
+        error_code=error_code
+    )
+    for status_code, error_code in HTTP_ERROR_CODES.items()
+})
+
+
 def get_http_error_response(status_code: int, error_message: str = None) -> tuple:
     """根据 HTTP 状态码获取统一的错误响应
     
@@ -231,41 +320,17 @@ def get_http_error_response(status_code: int, error_message: str = None) -> tupl
     Returns:
         (响应字典, 状态码) 元组
     """
-    error_code_map = {
-        400: ErrorCode.INVALID_INPUT,
-        401: ErrorCode.UNAUTHORIZED,
-        403: ErrorCode.FORBIDDEN,
-        404: ErrorCode.RESOURCE_NOT_FOUND,
-        405: ErrorCode.INVALID_INPUT,
-        409: ErrorCode.CONFLICT,
-        422: ErrorCode.VALIDATION_ERROR,
-        429: ErrorCode.RATE_LIMIT_EXCEEDED,
-        500: ErrorCode.INTERNAL_ERROR,
-        502: ErrorCode.EXTERNAL_SERVICE_ERROR,
-        503: ErrorCode.EXTERNAL_SERVICE_ERROR,
-    }
-    
-    default_messages = {
-        400: "请求参数错误",
-        401: "未授权访问",
-        403: "禁止访问",
-        404: "资源不存在",
-        405: "不支持的请求方法",
-        409: "资源冲突",
-        422: "数据验证失败",
-        429: "请求过于频繁",
-        500: "服务器内部错误",
-        502: "网关错误",
-        503: "服务暂时不可用",
-    }
+    template = _ERROR_TEMPLATES.get(status_code)
+    if template is None:
+        response = get_error_response(
+            error=error_message or "发生错误",
+            status_code=status_code,
+            error_code=ErrorCode.UNKNOWN_ERROR
+        )
+        return response, status_code
     
-    error_code = error_code_map.get(status_code, ErrorCode.UNKNOWN_ERROR)
-    message = error_message or default_messages.get(status_code, "发生错误")
-    
-    response = get_error_response(
-        error=message,
-        status_code=status_code,
-        error_code=error_code
-    )
+    response = template.copy()
+    if error_message:
+        response["message"] = error_message
     
     return response, status_code
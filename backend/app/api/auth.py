@@ -8,14 +8,20 @@ import hashlib
 import hmac
 import time
 import secrets
+import threading
+from dataclasses import dataclass, replace
 from functools import wraps
-from typing import Optional, Dict, Any, Callable
-from flask import request, jsonify, current_app, g
+from typing import Optional, Dict, Any, Callable, Union
+from flask import request, current_app, g
 
+from app.api.response import prebuilt_json
+from app.config_new import get_config
 from app.utils.logger import get_logger
 
 logger = get_logger(__name__)
 
+_blake2b = hashlib.blake2b
+
 
 class AuthenticationError(Exception):
     """认证错误异常"""
@@ -39,26 +45,29 @@ def generate_api_key(length: int = 32) -> str:
     return secrets.token_hex(length)
 
 
-def hash_api_key(api_key: str) -> str:
+def hash_api_key(api_key: str) -> bytes:
     """
     对 API Key 进行哈希处理（用于存储）
 
+    使用 BLAKE2b-256：短输入上比 SHA-256 更快。哈希值只在启动时由
+    配置中的原始 Key 计算并保存在内存中，更换算法无需迁移。
+
     Args:
         api_key: 原始 API Key
 
     Returns:
-        哈希后的密钥
+        哈希后的密钥（32 字节摘要，比十六进制字符串更短，比较更快）
     """
-    return hashlib.sha256(api_key.encode()).hexdigest()
+    return _blake2b(api_key.encode(), digest_size=32).digest()
 
 
-def verify_api_key(api_key: str, hashed_key: str) -> bool:
+def verify_api_key(api_key: str, hashed_key: bytes) -> bool:
     """
     验证 API Key 是否匹配
 
     Args:
         api_key: 待验证的 API Key
-        hashed_key: 存储的哈希密钥
+        hashed_key: 存储的哈希摘要
 
     Returns:
         是否匹配
@@ -86,20 +95,50 @@ def generate_signature(
     Returns:
         生成的签名
     """
-    message = f"{method}\n{path}\n{timestamp}\n{body}"
-    signature = hmac.new(
-        secret.encode(),
-        message.encode(),
-        hashlib.sha256
-    ).hexdigest()
-    return signature
+    return generate_signature_bytes(
+        method.encode(),
+        path.encode(),
+        timestamp.encode(),
+        body.encode(),
+        secret.encode()
+    )
+
+
+def generate_signature_bytes(
+    method: bytes,
+    path: bytes,
+    timestamp: bytes,
+    body: bytes,
+    secret: bytes
+) -> str:
+    """
+    基于字节串生成请求签名
+
+    与 generate_signature 结果一致；各部分依次送入 HMAC，
+    请求体无需解码为字符串或拼接成新的消息。
+
+    Args:
+        method: HTTP 方法
+        path: 请求路径
+        timestamp: 时间戳
+        body: 请求体原始字节
+        secret: 签名密钥
+
+    Returns:
+        生成的签名
+    """
+    mac = hmac.new(secret, method, hashlib.sha256)
+    for part in (path, timestamp, body):
+        mac.update(b"\n")
+        mac.update(part)
+    return mac.hexdigest()
 
 
 def verify_signature(
     method: str,
     path: str,
     timestamp: str,
-    body: str,
+    body: Union[str, bytes],
     signature: str,
     secret: str,
     max_age: int = 300
@@ -111,7 +150,7 @@ def verify_signature(
         method: HTTP 方法
         path: 请求路径
         timestamp: 时间戳
-        body: 请求体
+        body: 请求体（字符串或原始字节）
         signature: 待验证的签名
         secret: 签名密钥
         max_age: 签名最大有效期（秒）
@@ -130,22 +169,69 @@ def verify_signature(
         logger.warning(f"无效的时间戳格式: {timestamp}")
         return False
 
-    expected_signature = generate_signature(method, path, timestamp, body, secret)
+    if isinstance(body, str):
+        body = body.encode()
+
+    expected_signature = generate_signature_bytes(
+        method.encode(),
+        path.encode(),
+        timestamp.encode(),
+        body,
+        secret.encode()
+    )
 
     return hmac.compare_digest(signature, expected_signature)
 
 
+@dataclass(slots=True)
+class _KeyRecord:
+    """单个 API Key 的存储记录（固定字段，使用 slots 代替内层字典）"""
+    key_id: str
+    hashed_key: bytes
+    name: str
+    permissions: frozenset
+    rate_limit: str
+    created_at: float
+    last_used: Optional[float] = None
+    active: bool = True
+
+    def to_dict(self) -> Dict[str, Any]:
+        """转换为字典"""
+        return {
+            "key_id": self.key_id,
+            "hashed_key": self.hashed_key,
+            "name": self.name,
+            "permissions": self.permissions,
+            "rate_limit": self.rate_limit,
+            "created_at": self.created_at,
+            "last_used": self.last_used,
+            "active": self.active
+        }
+
+
 class APIKeyManager:
     """API Key 管理器"""
 
+    # last_used 的更新粒度（秒），高频请求下每个 Key 每秒最多写一次
+    LAST_USED_RESOLUTION = 1.0
+
     def __init__(self):
-        """初始化 API Key 管理器"""
-        self._api_keys: Dict[str, Dict[str, Any]] = {}
+        """初始化 API Key 管理器
+
+        _api_keys 与 _hash_to_id 采用写时复制：写操作在锁内构建新字典后整体替换引用，
+        验证路径只读取当前快照，无需加锁。
+        """
+        self._write_lock = threading.Lock()
+        self._api_keys: Dict[str, _KeyRecord] = {}
+        # 哈希摘要 -> key_id 索引，验证时一次字典查找即可定位
+        self._hash_to_id: Dict[bytes, str] = {}
+        # key_id -> 上次写入 last_used 时的单调时钟
+        self._last_touched: Dict[str, float] = {}
 
     def add_api_key(
         self,
         key_id: str,
-        hashed_key: str,
+        hashed_key: bytes,
         name: str = "",
         permissions: list = None,
         rate_limit: str = "100/hour"
@@ -155,20 +241,35 @@ class APIKeyManager:
 
         Args:
             key_id: Key 标识符
-            hashed_key: 哈希后的密钥
+            hashed_key: hash_api_key 返回的哈希摘要
             name: Key 名称
-            permissions: 权限列表
+            permissions: 权限列表（以 frozenset 保存）
             rate_limit: 限流策略
         """
-        self._api_keys[key_id] = {
-            "hashed_key": hashed_key,
-            "name": name,
-            "permissions": permissions or [],
-            "rate_limit": rate_limit,
-            "created_at": time.time(),
-            "last_used": None,
-            "active": True
-        }
+        record = _KeyRecord(
+            key_id=key_id,
+            hashed_key=hashed_key,
+            name=name,
+            permissions=frozenset(permissions or ()),
+            rate_limit=rate_limit,
+            created_at=time.time()
+        )
+
+        with self._write_lock:
+            api_keys = dict(self._api_keys)
+            hash_to_id = dict(self._hash_to_id)
+
+            previous = api_keys.get(key_id)
+            if previous is not None:
+                hash_to_id.pop(previous.hashed_key, None)
+
+            api_keys[key_id] = record
+            hash_to_id[hashed_key] = key_id
+
+            # 先发布记录再发布索引，读者通过索引查到的 key_id 总能找到记录
+            self._api_keys = api_keys
+            self._hash_to_id = hash_to_id
+
         logger.info(f"添加 API Key: key_id={key_id}, name={name}")
 
     def validate_api_key(self, api_key: str) -> Optional[Dict[str, Any]]:
@@ -183,15 +284,20 @@ class APIKeyManager:
         """
         hashed = hash_api_key(api_key)
 
-        for key_id, key_info in self._api_keys.items():
-            if key_info["active"] and hmac.compare_digest(hashed, key_info["hashed_key"]):
-                key_info["last_used"] = time.time()
-                return {
-                    "key_id": key_id,
-                    **key_info
-                }
+        key_id = self._hash_to_id.get(hashed)
+        if key_id is None:
+            return None
 
-        return None
+        record = self._api_keys.get(key_id)
+        if record is None or not record.active or not hmac.compare_digest(hashed, record.hashed_key):
+            return None
+
+        now = time.monotonic()
+        if now - self._last_touched.get(key_id, float("-inf")) >= self.LAST_USED_RESOLUTION:
+            self._last_touched[key_id] = now
+            record.last_used = time.time()
+
+        return record.to_dict()
 
     def revoke_api_key(self, key_id: str) -> bool:
         """
@@ -203,11 +309,21 @@ class APIKeyManager:
         Returns:
             是否成功撤销
         """
-        if key_id in self._api_keys:
-            self._api_keys[key_id]["active"] = False
-            logger.info(f"撤销 API Key: key_id={key_id}")
-            return True
-        return False
+        with self._write_lock:
+            record = self._api_keys.get(key_id)
+            if record is None:
+                return False
+
+            hash_to_id = dict(self._hash_to_id)
+            hash_to_id.pop(record.hashed_key, None)
+            api_keys = dict(self._api_keys)
+            api_keys[key_id] = replace(record, active=False)
+
+            self._hash_to_id = hash_to_id
+            self._api_keys = api_keys
+
+        logger.info(f"撤销 API Key: key_id={key_id}")
+        return True
 
     def get_key_info(self, key_id: str) -> Optional[Dict[str, Any]]:
         """
@@ -219,14 +335,33 @@ class APIKeyManager:
         Returns:
             Key 信息
         """
-        if key_id in self._api_keys:
-            return {
-                "key_id": key_id,
-                **self._api_keys[key_id]
-            }
+        record = self._api_keys.get(key_id)
+        if record is not None:
+            return record.to_dict()
         return None
 
 
+# 认证失败响应：error_code -> (错误消息, HTTP 状态码)
+AUTH_ERRORS = {
+    "MISSING_API_KEY": ("缺少 API Key", 401),
+    "INVALID_API_KEY": ("无效的 API Key", 401),
+    "DISABLED_API_KEY": ("API Key 已禁用", 401),
+    "INSUFFICIENT_PERMISSIONS": ("权限不足", 403),
+    "MISSING_SIGNATURE": ("缺少请求签名", 401),
+    "INVALID_SIGNATURE": ("签名验证失败", 401),
+}
+
+# 响应体在模块加载时序列化一次
+_AUTH_ERROR_RESPONSES = {
+    error_code: prebuilt_json({"success": False, "error": message, "error_code": error_code}, status_code)
+    for error_code, (message, status_code) in AUTH_ERRORS.items()
+}
+
+
+# app.extensions 中 API Key 管理器的键名
+API_KEY_MANAGER_EXTENSION = "api_key_manager"
+
+
 def get_api_key_manager() -> APIKeyManager:
     """
     获取全局 API Key 管理器实例
@@ -234,9 +369,11 @@ def get_api_key_manager() -> APIKeyManager:
     Returns:
         API Key 管理器实例
     """
-    if not hasattr(current_app, "_api_key_manager"):
-        current_app._api_key_manager = APIKeyManager()
-    return current_app._api_key_manager
+    extensions = current_app.extensions
+    manager = extensions.get(API_KEY_MANAGER_EXTENSION)
+    if manager is None:
+        manager = extensions.setdefault(API_KEY_MANAGER_EXTENSION, APIKeyManager())
+    return manager
 
 
 def require_api_key(
@@ -253,71 +390,52 @@ def require_api_key(
     Returns:
         装饰器函数
     """
+    required_permissions = frozenset(permissions or ())
+
     def decorator(f: Callable) -> Callable:
         @wraps(f)
         def decorated_function(*args, **kwargs):
-            from app.config_new import get_config
             config = get_config()
 
             if not config.API_KEY_ENABLED:
                 return f(*args, **kwargs)
 
-            api_key_header = config.API_KEY_HEADER
-            api_key = request.headers.get(api_key_header)
+            headers = request.headers
+            api_key = headers.get(config.API_KEY_HEADER)
 
             if not api_key:
                 logger.warning(f"缺少 API Key: path={request.path}")
-                return jsonify({
-                    "success": False,
-                    "error": "缺少 API Key",
-                    "error_code": "MISSING_API_KEY"
-                }), 401
+                return _AUTH_ERROR_RESPONSES["MISSING_API_KEY"]()
 
             manager = get_api_key_manager()
             key_info = manager.validate_api_key(api_key)
 
             if not key_info:
                 logger.warning(f"无效的 API Key: path={request.path}")
-                return jsonify({
-                    "success": False,
-                    "error": "无效的 API Key",
-                    "error_code": "INVALID_API_KEY"
-                }), 401
+                return _AUTH_ERROR_RESPONSES["INVALID_API_KEY"]()
 
             if not key_info["active"]:
                 logger.warning(f"API Key 已禁用: key_id={key_info['key_id']}")
-                return jsonify({
-                    "success": False,
-                    "error": "API Key 已禁用",
-                    "error_code": "DISABLED_API_KEY"
-                }), 401
-
-            if permissions:
-                key_permissions = key_info.get("permissions", [])
-                if not any(p in key_permissions for p in permissions):
-                    logger.warning(
-                        f"权限不足: key_id={key_info['key_id']}, "
-                        f"required={permissions}, has={key_permissions}"
-                    )
-                    return jsonify({
-                        "success": False,
-                        "error": "权限不足",
-                        "error_code": "INSUFFICIENT_PERMISSIONS"
-                    }), 403
+                return _AUTH_ERROR_RESPONSES["DISABLED_API_KEY"]()
+
+            # 持有任一所需权限即可
+            key_permissions = key_info["permissions"]
+            if required_permissions and required_permissions.isdisjoint(key_permissions):
+                logger.warning(
+                    f"权限不足: key_id={key_info['key_id']}, "
+                    f"required={sorted(required_permissions)}, has={sorted(key_permissions)}"
+                )
+                return _AUTH_ERROR_RESPONSES["INSUFFICIENT_PERMISSIONS"]()
 
             if signature_required and config.SIGNATURE_ENABLED:
-                signature = request.headers.get("X-Signature")
-                timestamp = request.headers.get("X-Timestamp")
+                signature = headers.get("X-Signature")
+                timestamp = headers.get("X-Timestamp")
 
                 if not signature or not timestamp:
                     logger.warning(f"缺少签名: path={request.path}")
-                    return jsonify({
-                        "success": False,
-                        "error": "缺少请求签名",
-                        "error_code": "MISSING_SIGNATURE"
-                    }), 401
+                    return _AUTH_ERROR_RESPONSES["MISSING_SIGNATURE"]()
 
-                body = request.get_data(as_text=True) or ""
+                body = request.get_data()
                 is_valid = verify_signature(
                     request.method,
                     request.path,
@@ -329,16 +447,12 @@ def require_api_key(
 
                 if not is_valid:
                     logger.warning(f"签名验证失败: path={request.path}")
-                    return jsonify({
-                        "success": False,
-                        "error": "签名验证失败",
-                        "error_code": "INVALID_SIGNATURE"
-                    }), 401
+                    return _AUTH_ERROR_RESPONSES["INVALID_SIGNATURE"]()
 
             g.api_key_info = {
                 "key_id": key_info["key_id"],
                 "name": key_info.get("name", ""),
-                "permissions": key_info.get("permissions", [])
+                "permissions": key_permissions
             }
 
             logger.debug(f"API Key 认证成功: key_id={key_info['key_id']}")
@@ -356,30 +470,28 @@ def init_auth(app) -> None:
     Args:
         app: Flask 应用实例
     """
-    from app.config_new import get_config
     config = get_config()
 
     if not config.API_KEY_ENABLED:
         logger.info("API Key 认证未启用")
         return
 
-    # 在应用上下文中初始化 API Key Manager
-    with app.app_context():
-        manager = get_api_key_manager()
-
-        if config.API_KEYS:
-            for key_config in config.API_KEYS:
-                key_id = key_config.get("id", f"key_{len(manager._api_keys) + 1}")
-                raw_key = key_config.get("key")
-                if raw_key:
-                    hashed = hash_api_key(raw_key)
-                    manager.add_api_key(
-                        key_id=key_id,
-                        hashed_key=hashed,
-                        name=key_config.get("name", ""),
-                        permissions=key_config.get("permissions", []),
-                        rate_limit=key_config.get("rate_limit", "100/hour")
-                    )
-                    logger.info(f"加载 API Key: key_id={key_id}, name={key_config.get('name', '')}")
-
-        logger.info(f"认证模块初始化完成，共加载 {len(manager._api_keys)} 个 API Key")
+    # 管理器登记在 app.extensions 中，请求期间只需一次字典查找
+    manager = app.extensions.setdefault(API_KEY_MANAGER_EXTENSION, APIKeyManager())
+
+    if config.API_KEYS:
+        for key_config in config.API_KEYS:
+            key_id = key_config.get("id", f"key_{len(manager._api_keys) + 1}")
+            raw_key = key_config.get("key")
+            if raw_key:
+                hashed = hash_api_key(raw_key)
+                manager.add_api_key(
+                    key_id=key_id,
+                    hashed_key=hashed,
+                    name=key_config.get("name", ""),
+                    permissions=key_config.get("permissions", []),
+                    rate_limit=key_config.get("rate_limit", "100/hour")
+                )
+                logger.info(f"加载 API Key: key_id={key_id}, name={key_config.get('name', '')}")
+
+    logger.info(f"认证模块初始化完成，共加载 {len(manager._api_keys)} 个 API Key")
@@ -15,25 +15,202 @@ API 请求验证装饰器模块
         pass
 """
 
-from functools import wraps
-from typing import Dict, List, Callable, Any, Optional
+import hashlib
+import logging
+import threading
+import time
+from functools import lru_cache, partial, wraps
+from typing import Dict, List, Callable, Any, NamedTuple, Optional
+import jwt
 from flask import request, jsonify, g
 
 from . import get_error_response, ErrorCode
+from .response import prebuilt_json
+from ..config_new import get_config
+from ..storage.database import get_sqlite_storage
 from ..utils.validators import (
+    SchemaValidator,
     ValidationResult,
+    ValidationType,
     validate_graph_id,
-    validate_no_sql_injection,
+    is_sql_injection_free,
     sanitize_string,
     sanitize_dict
 )
+from ..utils.cache import TTLCache, USER_CACHE_TTL as _USER_CACHE_TTL, user_cache as _user_cache
 from ..utils.logger import get_logger
 
 logger = get_logger(__name__)
 
 
+# 错误代码在导入时绑定为模块级名称，错误路径上不再经过 Enum 类属性查找
+_EC_FORBIDDEN = ErrorCode.FORBIDDEN
+_EC_INTERNAL_ERROR = ErrorCode.INTERNAL_ERROR
+_EC_INVALID_INPUT = ErrorCode.INVALID_INPUT
+_EC_RATE_LIMIT_EXCEEDED = ErrorCode.RATE_LIMIT_EXCEEDED
+_EC_RESOURCE_NOT_FOUND = ErrorCode.RESOURCE_NOT_FOUND
+_EC_UNAUTHORIZED = ErrorCode.UNAUTHORIZED
+_EC_VALIDATION_ERROR = ErrorCode.VALIDATION_ERROR
+
+# 携带请求体的 HTTP 方法
+_BODY_METHODS = frozenset({"POST", "PUT", "PATCH"})
+
+
+def _prebuilt_error(error: str, status_code: int, error_code: ErrorCode):
+    """在导入时序列化固定文案的 get_error_response 格式错误响应"""
+    return prebuilt_json(
+        get_error_response(error=error, status_code=status_code, error_code=error_code),
+        status_code
+    )
+
+
+# 固定文案的错误响应在导入时序列化，错误路径上不再构造字典和调用 jsonify
+_RESP_NO_AUTH = _prebuilt_error("未提供认证信息", 401, _EC_UNAUTHORIZED)
+_RESP_BAD_AUTH_FORMAT = _prebuilt_error("无效的认证格式，请使用 Bearer Token", 401, _EC_UNAUTHORIZED)
+_RESP_TOKEN_EXPIRED = _prebuilt_error("登录已过期，请重新登录", 401, _EC_UNAUTHORIZED)
+_RESP_INVALID_TOKEN = _prebuilt_error("无效的认证令牌", 401, _EC_UNAUTHORIZED)
+_RESP_USER_MISSING = _prebuilt_error("用户不存在", 401, _EC_UNAUTHORIZED)
+_RESP_USER_DISABLED = _prebuilt_error("用户账户已被禁用", 401, _EC_UNAUTHORIZED)
+_RESP_MISSING_PROJECT_ID = _prebuilt_error("缺少项目 ID", 400, _EC_INVALID_INPUT)
+_RESP_PROJECT_OWNER_UNKNOWN = _prebuilt_error("项目归属未知", 403, _EC_FORBIDDEN)
+_RESP_PROJECT_FORBIDDEN = _prebuilt_error("无权操作该项目", 403, _EC_FORBIDDEN)
+_RESP_MISSING_SIMULATION_ID = _prebuilt_error("缺少模拟 ID", 400, _EC_INVALID_INPUT)
+_RESP_PROJECT_NOT_FOUND = _prebuilt_error("项目不存在", 404, _EC_RESOURCE_NOT_FOUND)
+_RESP_SIMULATION_FORBIDDEN = _prebuilt_error("无权操作该模拟", 403, _EC_FORBIDDEN)
+_RESP_MISSING_TASK_ID = _prebuilt_error("缺少任务 ID", 400, _EC_INVALID_INPUT)
+_RESP_TASK_FORBIDDEN = _prebuilt_error("无权操作该任务", 403, _EC_FORBIDDEN)
+_RESP_ADMIN_REQUIRED = _prebuilt_error("需要管理员权限", 403, _EC_FORBIDDEN)
+_RESP_TOO_MANY_ACTIVE = _prebuilt_error("进行中的请求过多，请等待当前请求完成后重试", 429, _EC_RATE_LIMIT_EXCEEDED)
+_RESP_ILLEGAL_CHARS = _prebuilt_error("请求包含非法字符", 400, _EC_VALIDATION_ERROR)
+_RESP_EMPTY_BODY = _prebuilt_error("请求体不能为空或必须是有效的 JSON", 400, _EC_INVALID_INPUT)
+_RESP_BODY_NOT_OBJECT = _prebuilt_error("请求体必须是 JSON 对象", 400, _EC_INVALID_INPUT)
+
+
 # ============== JWT 用户认证装饰器 ==============
 
+class AuthParams(NamedTuple):
+    """JWT 认证所需的配置项"""
+    secret_key: str
+    algorithms: List[str]
+    database_path: str
+    profile: bool = False
+
+
+@lru_cache(maxsize=1)
+def _auth_params() -> AuthParams:
+    """
+    读取认证配置，首次调用后缓存
+    
+    配置在运行期间不变；需要重新加载时调用 _auth_params.cache_clear()。
+    """
+    config = get_config()
+    return AuthParams(
+        secret_key=config.JWT_SECRET_KEY,
+        algorithms=[config.JWT_ALGORITHM],
+        database_path=config.TASKS_DATABASE_PATH,
+        profile=config.AUTH_PROFILE_ENABLED
+    )
+
+
+# 认证各阶段的累计调用次数与耗时（纳秒），仅在 AUTH_PROFILE_ENABLED 时记录
+_AUTH_METRIC_STAGES = ("jwt_decode", "user_lookup")
+_auth_metrics: Dict[str, int] = {}
+_auth_metrics_lock = threading.Lock()
+
+
+def _record_auth_timing(stage: str, started_ns: int) -> None:
+    """记录一次认证阶段耗时"""
+    elapsed = time.perf_counter_ns() - started_ns
+    with _auth_metrics_lock:
+        _auth_metrics[f"{stage}_count"] = _auth_metrics.get(f"{stage}_count", 0) + 1
+        _auth_metrics[f"{stage}_ns"] = _auth_metrics.get(f"{stage}_ns", 0) + elapsed
+
+
+def get_auth_metrics() -> Dict[str, int]:
+    """
+    获取认证各阶段的累计调用次数与耗时
+
+    Returns:
+        {"jwt_decode_count": ..., "jwt_decode_ns": ..., "user_lookup_count": ..., "user_lookup_ns": ...}
+    """
+    with _auth_metrics_lock:
+        metrics = dict(_auth_metrics)
+    for stage in _AUTH_METRIC_STAGES:
+        metrics.setdefault(f"{stage}_count", 0)
+        metrics.setdefault(f"{stage}_ns", 0)
+    return metrics
+
+
+def reset_auth_metrics() -> None:
+    """清空认证耗时统计"""
+    with _auth_metrics_lock:
+        _auth_metrics.clear()
+
+
+# JWT 校验结果缓存：同一 token 在有效期内无需重复验签
+_JWT_CACHE_TTL = 30
+_jwt_cache = TTLCache(maxsize=10000, ttl=_JWT_CACHE_TTL)
+_JWT_DECODE_OPTIONS = {"require": ["exp", "user_id"]}
+
+
+def _decode_token(token: str, params: "AuthParams") -> Dict[str, Any]:
+    """
+    验证并解码 JWT，验证成功的 payload 按 token 摘要缓存
+    
+    缓存时间不超过 token 剩余有效期；验证失败的 token 不缓存。
+    
+    Raises:
+        jwt.InvalidTokenError: token 无效、已过期或缺少必需声明
+    """
+    cache_key = hashlib.sha256(token.encode()).digest()
+    payload = _jwt_cache.get(cache_key)
+    if payload is not None:
+        return payload
+    
+    # exp 与 user_id 为必需声明，缺失时由 PyJWT 抛出 MissingRequiredClaimError
+    payload = jwt.decode(
+        token,
+        params.secret_key,
+        algorithms=params.algorithms,
+        options=_JWT_DECODE_OPTIONS
+    )
+    
+    ttl = min(_JWT_CACHE_TTL, payload["exp"] - time.time())
+    if ttl > 0:
+        _jwt_cache.set(cache_key, payload, ttl=ttl)
+    
+    return payload
+
+
+def _get_user(user_id, params: "AuthParams") -> Optional[Dict[str, Any]]:
+    """
+    获取认证所需的用户信息（id、username、email、role、is_active）
+    
+    结果缓存 _USER_CACHE_TTL 秒。SQLiteStorage.update_user 会清除本进程的缓存条目，
+    但缓存是进程内的：多进程部署时，其他进程最多仍有 _USER_CACHE_TTL 秒读到旧的 role/is_active。
+    
+    Returns:
+        用户信息字典，用户不存在时返回 None
+    """
+    user = _user_cache.get(user_id)
+    if user is not None:
+        return user
+    
+    record = get_sqlite_storage(params.database_path).get_user_by_id(user_id)
+    if not record:
+        return None
+    
+    user = {
+        "id": record["id"],
+        "username": record["username"],
+        "email": record["email"],
+        "role": record["role"],
+        "is_active": record["is_active"]
+    }
+    _user_cache.set(user_id, user)
+    return user
+
+
 def require_user_auth(func: Callable) -> Callable:
     """
     JWT 用户认证装饰器
@@ -49,98 +226,9 @@ def require_user_auth(func: Callable) -> Callable:
     """
     @wraps(func)
     def wrapper(*args, **kwargs):
-        import jwt
-        from ..config_new import get_config
-        from ..storage.database import SQLiteStorage
-        
-        config = get_config()
-        
-        # 获取 Authorization 头
-        auth_header = request.headers.get("Authorization")
-        
-        if not auth_header:
-            logger.warning(f"缺少 Authorization 头: path={request.path}")
-            return jsonify(get_error_response(
-                error="未提供认证信息",
-                status_code=401,
-                error_code=ErrorCode.UNAUTHORIZED
-            )), 401
-        
-        # 解析 Bearer Token
-        parts = auth_header.split()
-        if len(parts) != 2 or parts[0].lower() != "bearer":
-            logger.warning(f"无效的 Authorization 格式: path={request.path}")
-            return jsonify(get_error_response(
-                error="无效的认证格式，请使用 Bearer Token",
-                status_code=401,
-                error_code=ErrorCode.UNAUTHORIZED
-            )), 401
-        
-        token = parts[1]
-        
-        # 验证 JWT Token
-        try:
-            payload = jwt.decode(
-                token,
-                config.JWT_SECRET_KEY,
-                algorithms=[config.JWT_ALGORITHM]
-            )
-        except jwt.ExpiredSignatureError:
-            logger.warning(f"Token 已过期: path={request.path}")
-            return jsonify(get_error_response(
-                error="登录已过期，请重新登录",
-                status_code=401,
-                error_code=ErrorCode.UNAUTHORIZED
-            )), 401
-        except jwt.InvalidTokenError as e:
-            logger.warning(f"无效的 Token: path={request.path}, error={e}")
-            return jsonify(get_error_response(
-                error="无效的认证令牌",
-                status_code=401,
-                error_code=ErrorCode.UNAUTHORIZED
-            )), 401
-        
-        # 获取用户信息
-        user_id = payload.get("user_id")
-        if not user_id:
-            logger.warning(f"Token 中缺少 user_id: path={request.path}")
-            return jsonify(get_error_response(
-                error="无效的认证令牌",
-                status_code=401,
-                error_code=ErrorCode.UNAUTHORIZED
-            )), 401
-        
-        # 从数据库获取用户
-        storage = SQLiteStorage(config.TASKS_DATABASE_PATH)
-        user = storage.get_user_by_id(user_id)
-        
-        if not user:
-            logger.warning(f"用户不存在: user_id={user_id}, path={request.path}")
-            return jsonify(get_error_response(
-                error="用户不存在",
-                status_code=401,
-                error_code=ErrorCode.UNAUTHORIZED
-            )), 401
-        
-        if not user.get("is_active"):
-            logger.warning(f"用户已禁用: user_id={user_id}, path={request.path}")
-            return jsonify(get_error_response(
-                error="用户账户已被禁用",
-                status_code=401,
-                error_code=ErrorCode.UNAUTHORIZED
-            )), 401
-        
-        # 将用户信息存入 g
-        g.current_user = {
-            "id": user["id"],
-            "username": user["username"],
-            "email": user["email"],
-            "role": user["role"],
-            "is_active": user["is_active"]
-        }
-        
-        logger.debug(f"用户认证成功: user_id={user_id}, username={user['username']}")
-
+        error_response = ensure_user_auth()
+        if error_response is not None:
+            return error_response
         return func(*args, **kwargs)
     
     return wrapper
@@ -149,77 +237,65 @@ def require_user_auth(func: Callable) -> Callable:
 def ensure_user_auth():
     """
     执行 JWT 用户认证逻辑，成功时设置 g.current_user，失败时返回错误响应。
-    用于蓝图 before_request，可与 require_user_auth 复用同一逻辑。
+    require_user_auth、require_admin、资源归属装饰器与蓝图级鉴权共用此逻辑。
 
     Returns:
         None 表示认证成功；否则返回 (response, status_code) 用于 return。
     """
-    import jwt
-    from ..config_new import get_config
-    from ..storage.database import SQLiteStorage
-
-    config = get_config()
+    # 同一请求已认证（蓝图级鉴权后再经过 @require_user_auth 等）时不再重复校验
+    if g.get("_auth_done"):
+        return None
+    
+    params = _auth_params()
+    
+    # 获取 Authorization 头
     auth_header = request.headers.get("Authorization")
+    
     if not auth_header:
-        return jsonify(get_error_response(
-            error="未提供认证信息",
-            status_code=401,
-            error_code=ErrorCode.UNAUTHORIZED
-        )), 401
-    parts = auth_header.split()
-    if len(parts) != 2 or parts[0].lower() != "bearer":
-        return jsonify(get_error_response(
-            error="无效的认证格式，请使用 Bearer Token",
-            status_code=401,
-            error_code=ErrorCode.UNAUTHORIZED
-        )), 401
-    token = parts[1]
+        logger.warning("缺少 Authorization 头: path=%s", request.path)
+        return _RESP_NO_AUTH()
+    
+    # 解析 Bearer Token（按前缀切片，不拆分整个请求头）
+    token = auth_header[7:].strip() if auth_header[:7].lower() == "bearer " else ""
+    if not token or " " in token:
+        logger.warning("无效的 Authorization 格式: path=%s", request.path)
+        return _RESP_BAD_AUTH_FORMAT()
+    
+    # 验证 JWT Token
+    started = time.perf_counter_ns() if params.profile else 0
     try:
-        payload = jwt.decode(
-            token,
-            config.JWT_SECRET_KEY,
-            algorithms=[config.JWT_ALGORITHM]
-        )
+        payload = _decode_token(token, params)
     except jwt.ExpiredSignatureError:
-        return jsonify(get_error_response(
-            error="登录已过期，请重新登录",
-            status_code=401,
-            error_code=ErrorCode.UNAUTHORIZED
-        )), 401
-    except jwt.InvalidTokenError:
-        return jsonify(get_error_response(
-            error="无效的认证令牌",
-            status_code=401,
-            error_code=ErrorCode.UNAUTHORIZED
-        )), 401
-    user_id = payload.get("user_id")
-    if not user_id:
-        return jsonify(get_error_response(
-            error="无效的认证令牌",
-            status_code=401,
-            error_code=ErrorCode.UNAUTHORIZED
-        )), 401
-    storage = SQLiteStorage(config.TASKS_DATABASE_PATH)
-    user = storage.get_user_by_id(user_id)
+        logger.warning("Token 已过期: path=%s", request.path)
+        return _RESP_TOKEN_EXPIRED()
+    except jwt.InvalidTokenError as e:
+        logger.warning("无效的 Token: path=%s, error=%s", request.path, e)
+        return _RESP_INVALID_TOKEN()
+    if started:
+        _record_auth_timing("jwt_decode", started)
+    
+    # 获取用户信息
+    user_id = payload["user_id"]
+    started = time.perf_counter_ns() if params.profile else 0
+    user = _get_user(user_id, params)
+    if started:
+        _record_auth_timing("user_lookup", started)
+    
     if not user:
-        return jsonify(get_error_response(
-            error="用户不存在",
-            status_code=401,
-            error_code=ErrorCode.UNAUTHORIZED
-        )), 401
+        logger.warning("用户不存在: user_id=%s, path=%s", user_id, request.path)
+        return _RESP_USER_MISSING()
+    
     if not user.get("is_active"):
-        return jsonify(get_error_response(
-            error="用户账户已被禁用",
-            status_code=401,
-            error_code=ErrorCode.UNAUTHORIZED
-        )), 401
-    g.current_user = {
-        "id": user["id"],
-        "username": user["username"],
-        "email": user["email"],
-        "role": user["role"],
-        "is_active": user["is_active"]
-    }
+        logger.warning("用户已禁用: user_id=%s, path=%s", user_id, request.path)
+        return _RESP_USER_DISABLED()
+    
+    # 将用户信息存入 g
+    g.current_user = dict(user)
+    g._auth_done = True
+    
+    if logger.isEnabledFor(logging.DEBUG):
+        logger.debug("用户认证成功: user_id=%s, username=%s", user_id, user['username'])
+    
     return None
 
 
@@ -231,89 +307,153 @@ def user_auth_required_for_request():
     return ensure_user_auth()
 
 
+# 项目归属缓存：project_id -> user_id（项目归属极少变化）
+_PROJECT_OWNER_CACHE_TTL = 30
+_project_owner_cache = TTLCache(maxsize=2048, ttl=_PROJECT_OWNER_CACHE_TTL)
+
+# 项目不存在的哨兵值，区别于归属未知（user_id 为 None）
+_MISSING = object()
+
+
+def _get_project_owner(project_id: str) -> Any:
+    """
+    获取项目归属用户 ID，结果缓存 _PROJECT_OWNER_CACHE_TTL 秒
+
+    Returns:
+        项目的 user_id（可能为 None 表示归属未知）；项目不存在返回 _MISSING
+    """
+    owner = _project_owner_cache.get(project_id, _MISSING)
+    if owner is not _MISSING:
+        return owner
+    
+    from ..models.project import ProjectManager
+    project = ProjectManager.get_project(project_id)
+    if not project:
+        # 不存在的项目不缓存，新建后可立即访问
+        return _MISSING
+    
+    owner = project.user_id
+    _project_owner_cache.set(project_id, owner)
+    return owner
+
+
+def invalidate_project_owner_cache(project_id: str) -> None:
+    """删除项目或变更项目归属后调用，清除缓存的归属信息"""
+    _project_owner_cache.pop(project_id)
+
+
+def get_current_user_project_ids() -> frozenset:
+    """
+    当前用户的项目 ID 集合（数据隔离过滤用），同一请求内只查询一次。
+    需已完成用户认证。
+    """
+    project_ids = g.get("_user_project_ids")
+    if project_ids is None:
+        from ..models.project import ProjectManager
+        project_ids = g._user_project_ids = frozenset(
+            ProjectManager._get_storage().list_project_ids_by_user(g.current_user["id"])
+        )
+    return project_ids
+
+
+# 模拟所属项目缓存：simulation_id -> project_id（模拟创建后所属项目不再变化）
+_SIMULATION_PROJECT_CACHE_TTL = 300
+_simulation_project_cache = TTLCache(maxsize=4096, ttl=_SIMULATION_PROJECT_CACHE_TTL)
+
+
+def _get_simulation_project_id(simulation_id: str) -> Optional[str]:
+    """
+    获取模拟所属项目 ID，结果缓存 _SIMULATION_PROJECT_CACHE_TTL 秒
+
+    Returns:
+        项目 ID；模拟不存在返回 None
+    """
+    project_id = _simulation_project_cache.get(simulation_id)
+    if project_id is not None:
+        return project_id
+    
+    from ..services.simulation_manager import SimulationManager
+    project_id = SimulationManager().get_simulation_project_id(simulation_id)
+    if project_id is not None:
+        _simulation_project_cache.set(simulation_id, project_id)
+    return project_id
+
+
 def require_project_owner(project_id_param: str = "project_id"):
     """
-    校验当前用户为项目所有者。依赖 require_user_auth 已执行（或蓝图级鉴权）。
+    校验当前用户为项目所有者。未经蓝图级鉴权时先执行用户认证，
+    无需再叠加 @require_user_auth。
     project_id_param: 从 kwargs 或 request 中取 project_id 的参数名。
     """
     def decorator(func: Callable) -> Callable:
         @wraps(func)
         def wrapper(*args, **kwargs):
-            from ..models.project import ProjectManager
+            error_response = ensure_user_auth()
+            if error_response is not None:
+                return error_response
             project_id = kwargs.get(project_id_param)
             if not project_id and request.is_json:
                 project_id = (request.get_json(silent=True) or {}).get(project_id_param)
             if not project_id:
-                return jsonify(get_error_response(
-                    error="缺少项目 ID",
-                    status_code=400,
-                    error_code=ErrorCode.INVALID_INPUT
-                )), 400
-            project = ProjectManager.get_project(project_id)
-            if not project:
+                return _RESP_MISSING_PROJECT_ID()
+            project_user_id = _get_project_owner(project_id)
+            if project_user_id is _MISSING:
                 return jsonify(get_error_response(
                     error=f"项目不存在: {project_id}",
                     status_code=404,
-                    error_code=ErrorCode.RESOURCE_NOT_FOUND
+                    error_code=_EC_RESOURCE_NOT_FOUND
                 )), 404
-            project_user_id = getattr(project, "user_id", None) or (project.to_dict() if hasattr(project, "to_dict") else {}).get("user_id")
             if project_user_id is None:
-                return jsonify(get_error_response(
-                    error="项目归属未知",
-                    status_code=403,
-                    error_code=ErrorCode.FORBIDDEN
-                )), 403
+                return _RESP_PROJECT_OWNER_UNKNOWN()
             if project_user_id != g.current_user["id"]:
-                return jsonify(get_error_response(
-                    error="无权操作该项目",
-                    status_code=403,
-                    error_code=ErrorCode.FORBIDDEN
-                )), 403
+                return _RESP_PROJECT_FORBIDDEN()
             return func(*args, **kwargs)
         return wrapper
     return decorator
 
 
+def check_simulation_owner(simulation_id: str):
+    """
+    校验当前用户为模拟所有者（simulation -> project -> user_id，两级均走缓存）。
+    需已完成用户认证。
+
+    Returns:
+        None 表示通过；否则为 (response, status_code)。
+    """
+    project_id = _get_simulation_project_id(simulation_id)
+    if project_id is None:
+        return jsonify(get_error_response(
+            error=f"模拟不存在: {simulation_id}",
+            status_code=404,
+            error_code=_EC_RESOURCE_NOT_FOUND
+        )), 404
+    project_user_id = _get_project_owner(project_id)
+    if project_user_id is _MISSING:
+        return _RESP_PROJECT_NOT_FOUND()
+    if project_user_id != g.current_user["id"]:
+        return _RESP_SIMULATION_FORBIDDEN()
+    return None
+
+
 def require_simulation_owner(simulation_id_param: str = "simulation_id"):
     """
     校验当前用户为模拟所有者（通过 simulation.project_id -> project.user_id）。
-    依赖 require_user_auth 或蓝图级鉴权已执行。
+    未经蓝图级鉴权时先执行用户认证，无需再叠加 @require_user_auth。
     """
     def decorator(func: Callable) -> Callable:
         @wraps(func)
         def wrapper(*args, **kwargs):
-            from ..models.project import ProjectManager
-            from ..services.simulation_manager import SimulationManager
+            error_response = ensure_user_auth()
+            if error_response is not None:
+                return error_response
             sim_id = kwargs.get(simulation_id_param)
             if not sim_id and request.is_json:
                 sim_id = (request.get_json(silent=True) or {}).get(simulation_id_param)
             if not sim_id:
-                return jsonify(get_error_response(
-                    error="缺少模拟 ID",
-                    status_code=400,
-                    error_code=ErrorCode.INVALID_INPUT
-                )), 400
-            manager = SimulationManager()
-            state = manager.get_simulation(sim_id)
-            if not state:
-                return jsonify(get_error_response(
-                    error=f"模拟不存在: {sim_id}",
-                    status_code=404,
-                    error_code=ErrorCode.RESOURCE_NOT_FOUND
-                )), 404
-            project = ProjectManager.get_project(state.project_id)
-            if not project:
-                return jsonify(get_error_response(
-                    error="项目不存在",
-                    status_code=404,
-                    error_code=ErrorCode.RESOURCE_NOT_FOUND
-                )), 404
-            if getattr(project, "user_id", None) != g.current_user["id"]:
-                return jsonify(get_error_response(
-                    error="无权操作该模拟",
-                    status_code=403,
-                    error_code=ErrorCode.FORBIDDEN
-                )), 403
+                return _RESP_MISSING_SIMULATION_ID()
+            error_response = check_simulation_owner(sim_id)
+            if error_response is not None:
+                return error_response
             return func(*args, **kwargs)
         return wrapper
     return decorator
@@ -321,43 +461,35 @@ def require_simulation_owner(simulation_id_param: str = "simulation_id"):
 
 def require_task_owner(task_id_param: str = "task_id"):
     """
-    校验当前用户为任务所有者。依赖 require_user_auth 已执行。
+    校验当前用户为任务所有者。未经蓝图级鉴权时先执行用户认证，
+    无需再叠加 @require_user_auth。
     task_id_param: 从 kwargs 取 task_id 的参数名（如 URL 中的 task_id）。
     """
     def decorator(func: Callable) -> Callable:
         @wraps(func)
         def wrapper(*args, **kwargs):
+            error_response = ensure_user_auth()
+            if error_response is not None:
+                return error_response
             from ..models.task import TaskManager
             task_id = kwargs.get(task_id_param)
             if not task_id:
-                return jsonify(get_error_response(
-                    error="缺少任务 ID",
-                    status_code=400,
-                    error_code=ErrorCode.INVALID_INPUT
-                )), 400
+                return _RESP_MISSING_TASK_ID()
             task_mgr = TaskManager()
             task = task_mgr.get_task(task_id)
             if not task:
                 return jsonify(get_error_response(
                     error=f"任务不存在: {task_id}",
                     status_code=404,
-                    error_code=ErrorCode.RESOURCE_NOT_FOUND
+                    error_code=_EC_RESOURCE_NOT_FOUND
                 )), 404
-            task_user_id = getattr(task, "user_id", None) or (task.metadata or {}).get("user_id")
+            task_user_id = task.user_id or (task.metadata or {}).get("user_id")
             if task_user_id is None:
                 # 任务未关联用户，拒绝访问（防止旧数据绕过校验）
-                logger.warning(f"任务缺少 user_id，拒绝访问: task_id={task_id}, path={request.path}")
-                return jsonify(get_error_response(
-                    error="无权操作该任务",
-                    status_code=403,
-                    error_code=ErrorCode.FORBIDDEN
-                )), 403
+                logger.warning("任务缺少 user_id，拒绝访问: task_id=%s, path=%s", task_id, request.path)
+                return _RESP_TASK_FORBIDDEN()
             if task_user_id != g.current_user["id"]:
-                return jsonify(get_error_response(
-                    error="无权操作该任务",
-                    status_code=403,
-                    error_code=ErrorCode.FORBIDDEN
-                )), 403
+                return _RESP_TASK_FORBIDDEN()
             return func(*args, **kwargs)
         return wrapper
     return decorator
@@ -367,7 +499,7 @@ def require_admin(func: Callable) -> Callable:
     """
     管理员权限装饰器
     
-    继承 @require_user_auth，并额外检查 role == 'admin'
+    执行与 @require_user_auth 相同的认证，并额外检查 role == 'admin'
     
     Example:
         @api_v1_bp.route('/admin/users')
@@ -378,29 +510,92 @@ def require_admin(func: Callable) -> Callable:
     """
     @wraps(func)
     def wrapper(*args, **kwargs):
-        # 先执行用户认证
-        auth_wrapper = require_user_auth(lambda *a, **k: None)
-        result = auth_wrapper(*args, **kwargs)
-        
-        # 如果认证失败，返回错误响应
-        if result is not None:
-            return result
+        # 先执行用户认证，失败时返回错误响应
+        error_response = ensure_user_auth()
+        if error_response is not None:
+            return error_response
         
         # 检查管理员权限
         user = g.current_user
         if user.get("role") != "admin":
-            logger.warning(f"非管理员访问管理接口: user_id={user['id']}, path={request.path}")
-            return jsonify(get_error_response(
-                error="需要管理员权限",
-                status_code=403,
-                error_code=ErrorCode.FORBIDDEN
-            )), 403
+            logger.warning("非管理员访问管理接口: user_id=%s, path=%s", user['id'], request.path)
+            return _RESP_ADMIN_REQUIRED()
         
         return func(*args, **kwargs)
     
     return wrapper
 
 
+# ============== 并发请求限制装饰器 ==============
+
+# 每个用户（未登录时按 IP）正在处理中的请求数
+_active_requests: Dict[str, int] = {}
+_active_requests_lock = threading.Lock()
+
+
+def _concurrent_limit_key() -> str:
+    """并发计数键：优先使用当前登录用户，否则使用客户端地址"""
+    user = g.get("current_user")
+    if user:
+        return f"user:{user['id']}"
+    return f"ip:{request.remote_addr}"
+
+
+def concurrent_limit(max_active: int = 5):
+    """
+    并发请求限制装饰器
+    
+    与按时间窗口计数的限流互补：限制同一用户同时处理中的请求数，
+    避免单个用户的长耗时 LLM 调用占满所有 worker。计数保存在进程内。
+    
+    Args:
+        max_active: 同一用户允许同时处理的最大请求数
+    
+    Example:
+        @report_bp.route('/chat', methods=['POST'])
+        @concurrent_limit(max_active=3)
+        def chat_with_report_agent():
+            pass
+    """
+    def decorator(func: Callable) -> Callable:
+        @wraps(func)
+        def wrapper(*args, **kwargs):
+            key = _concurrent_limit_key()
+            
+            with _active_requests_lock:
+                active = _active_requests.get(key, 0)
+                if active >= max_active:
+                    logger.warning("并发请求超限: key=%s, active=%s, path=%s", key, active, request.path)
+                    return _RESP_TOO_MANY_ACTIVE()
+                _active_requests[key] = active + 1
+            
+            try:
+                return func(*args, **kwargs)
+            finally:
+                with _active_requests_lock:
+                    remaining = _active_requests[key] - 1
+                    if remaining:
+                        _active_requests[key] = remaining
+                    else:
+                        del _active_requests[key]
+        
+        return wrapper
+    return decorator
+
+
+def _request_body_is_safe(json_data: Any) -> bool:
+    """
+    检查请求体是否不含 SQL 注入特征
+    
+    结果缓存在 g 上，同一请求叠加多个验证装饰器时只遍历一次请求体。
+    """
+    is_safe = g.get("_body_sql_safe")
+    if is_safe is None:
+        is_safe = is_sql_injection_free(json_data)
+        g._body_sql_safe = is_safe
+    return is_safe
+
+
 def validate_request(
     required: List[str] = None,
     validators: Dict[str, Callable] = None,
@@ -433,30 +628,31 @@ def validate_request(
             # simulation_id 已验证
             pass
     """
-    required = required or []
-    validators = validators or {}
-    sanitizers = sanitizers or {}
+    # 装饰时固化为元组，请求路径上只做顺序遍历
+    required = tuple(required or ())
+    validator_items = tuple((validators or {}).items())
+    sanitizer_items = tuple((sanitizers or {}).items())
+    uses_params = bool(required or validator_items)
     
     def decorator(func: Callable) -> Callable:
         @wraps(func)
         def wrapper(*args, **kwargs):
             errors = []
             
-            # 收集所有参数（URL 参数 + JSON body）
-            params = dict(kwargs)
+            # JSON body 只解析一次，字段合并和 SQL 注入检查共用
+            json_data = None
+            if request.method in _BODY_METHODS and (uses_params or check_sql_injection):
+                json_data = request.get_json(silent=True)
             
-            # 如果是 POST/PUT 请求，合并 JSON body
-            if request.method in ['POST', 'PUT', 'PATCH']:
-                try:
-                    json_data = request.get_json(silent=True) or {}
-                    if isinstance(json_data, dict):
-                        params.update(json_data)
-                except Exception:
-                    pass
+            # 收集所有参数（URL 参数 + JSON body），无 body 时直接使用 kwargs
+            if isinstance(json_data, dict) and json_data:
+                params = {**kwargs, **json_data}
+            else:
+                params = kwargs
             
             # 1. 检查必填字段
             for field in required:
-                value = params.get(field) or kwargs.get(field)
+                value = params.get(field)
                 if value is None or value == '':
                     errors.append(f"{field} 是必填字段")
             
@@ -464,49 +660,40 @@ def validate_request(
                 return jsonify(get_error_response(
                     error="; ".join(errors),
                     status_code=400,
-                    error_code=ErrorCode.INVALID_INPUT
+                    error_code=_EC_INVALID_INPUT
                 )), 400
             
             # 2. 执行字段验证
-            for field, validator in validators.items():
-                value = params.get(field) or kwargs.get(field)
+            for field, validator in validator_items:
+                value = params.get(field)
                 if value is not None:
                     try:
                         result = validator(value, field)
                         if isinstance(result, ValidationResult) and not result.is_valid:
                             errors.extend(result.get_error_messages())
                     except Exception as e:
-                        logger.warning(f"验证字段 {field} 时出错: {e}")
+                        logger.warning("验证字段 %s 时出错: %s", field, e)
                         errors.append(f"{field} 验证失败")
             
             if errors:
                 return jsonify(get_error_response(
                     error="; ".join(errors),
                     status_code=400,
-                    error_code=ErrorCode.VALIDATION_ERROR
+                    error_code=_EC_VALIDATION_ERROR
                 )), 400
             
             # 3. 检查 SQL 注入
-            if check_sql_injection:
-                # 检查 JSON body
-                if request.method in ['POST', 'PUT', 'PATCH']:
-                    json_data = request.get_json(silent=True)
-                    if json_data:
-                        sql_result = validate_no_sql_injection(json_data, "request_data")
-                        if not sql_result.is_valid:
-                            return jsonify(get_error_response(
-                                error="请求包含非法字符",
-                                status_code=400,
-                                error_code=ErrorCode.VALIDATION_ERROR
-                            )), 400
+            if check_sql_injection and json_data:
+                if not _request_body_is_safe(json_data):
+                    return _RESP_ILLEGAL_CHARS()
             
             # 4. 清理字段值并更新 kwargs
-            for field, sanitizer in sanitizers.items():
+            for field, sanitizer in sanitizer_items:
                 if field in kwargs:
                     try:
                         kwargs[field] = sanitizer(kwargs[field])
                     except Exception as e:
-                        logger.warning(f"清理字段 {field} 时出错: {e}")
+                        logger.warning("清理字段 %s 时出错: %s", field, e)
             
             return func(*args, **kwargs)
         
@@ -514,6 +701,23 @@ def validate_request(
     return decorator
 
 
+# 取值不可能携带 SQL 片段的 schema 字段类型，这些字段经 schema 校验后无需再做 SQL 注入扫描
+_SQL_SAFE_SCHEMA_TYPES = frozenset({
+    ValidationType.INTEGER,
+    ValidationType.FLOAT,
+    ValidationType.BOOLEAN,
+    ValidationType.UUID,
+})
+
+
+def _sql_safe_schema_fields(schema: Optional[Dict[str, Dict]]) -> frozenset:
+    """返回 schema 中类型严格、可跳过 SQL 注入扫描的字段名"""
+    return frozenset(
+        field for field, field_config in (schema or {}).items()
+        if field_config.get("type") in _SQL_SAFE_SCHEMA_TYPES
+    )
+
+
 def validate_json_body(
     required: List[str] = None,
     schema: Dict[str, Dict] = None,
@@ -526,7 +730,8 @@ def validate_json_body(
     
     Args:
         required: 必填字段列表
-        schema: 字段验证 schema
+        schema: 字段验证 schema（格式同 SchemaValidator）；整数、浮点、布尔、UUID
+                类型的字段通过校验后不再参与 SQL 注入扫描
         check_sql_injection: 是否检查 SQL 注入
     
     Returns:
@@ -540,7 +745,9 @@ def validate_json_body(
             # data 已验证
             pass
     """
-    required = required or []
+    required = tuple(required or ())
+    schema_validator = SchemaValidator(schema) if schema else None
+    sql_safe_fields = _sql_safe_schema_fields(schema) if check_sql_injection else frozenset()
     
     def decorator(func: Callable) -> Callable:
         @wraps(func)
@@ -549,38 +756,41 @@ def validate_json_body(
             data = request.get_json(silent=True)
             
             if data is None:
-                return jsonify(get_error_response(
-                    error="请求体不能为空或必须是有效的 JSON",
-                    status_code=400,
-                    error_code=ErrorCode.INVALID_INPUT
-                )), 400
+                return _RESP_EMPTY_BODY()
             
             if not isinstance(data, dict):
-                return jsonify(get_error_response(
-                    error="请求体必须是 JSON 对象",
-                    status_code=400,
-                    error_code=ErrorCode.INVALID_INPUT
-                )), 400
+                return _RESP_BODY_NOT_OBJECT()
             
             # 检查必填字段
-            missing = [f for f in required if f not in data or data[f] is None or data[f] == '']
+            missing = [f for f in required if (value := data.get(f)) is None or value == ''] if required else None
             if missing:
                 return jsonify(get_error_response(
                     error=f"缺少必填字段: {', '.join(missing)}",
                     status_code=400,
-                    error_code=ErrorCode.INVALID_INPUT
+                    error_code=_EC_INVALID_INPUT
                 )), 400
             
-            # 检查 SQL 注入
-            if check_sql_injection:
-                sql_result = validate_no_sql_injection(data, "request_data")
-                if not sql_result.is_valid:
+            # 按 schema 校验字段
+            if schema_validator is not None:
+                result = schema_validator.validate(data)
+                if not result.is_valid:
                     return jsonify(get_error_response(
-                        error="请求包含非法字符",
+                        error="; ".join(result.get_error_messages()),
                         status_code=400,
-                        error_code=ErrorCode.VALIDATION_ERROR
+                        error_code=_EC_VALIDATION_ERROR
                     )), 400
             
+            # 检查 SQL 注入（已按严格类型校验的字段不再扫描）
+            if check_sql_injection:
+                if sql_safe_fields:
+                    is_safe = is_sql_injection_free(
+                        [value for field, value in data.items() if field not in sql_safe_fields]
+                    )
+                else:
+                    is_safe = _request_body_is_safe(data)
+                if not is_safe:
+                    return _RESP_ILLEGAL_CHARS()
+            
             return func(*args, **kwargs)
         
         return wrapper
@@ -613,6 +823,8 @@ def validate_path_param(
         def get_simulation(simulation_id: str):
             pass
     """
+    missing_message = error_message or f"{param_name} 是必填参数"
+    
     def decorator(func: Callable) -> Callable:
         @wraps(func)
         def wrapper(*args, **kwargs):
@@ -620,11 +832,10 @@ def validate_path_param(
             
             # 检查是否存在
             if value is None or value == '':
-                msg = error_message or f"{param_name} 是必填参数"
                 return jsonify(get_error_response(
-                    error=msg,
+                    error=missing_message,
                     status_code=400,
-                    error_code=ErrorCode.INVALID_INPUT
+                    error_code=_EC_INVALID_INPUT
                 )), 400
             
             # 验证
@@ -636,17 +847,17 @@ def validate_path_param(
                         return jsonify(get_error_response(
                             error=msg,
                             status_code=400,
-                            error_code=ErrorCode.VALIDATION_ERROR
+                            error_code=_EC_VALIDATION_ERROR
                         )), 400
                 except Exception as e:
-                    logger.warning(f"验证参数 {param_name} 时出错: {e}")
+                    logger.warning("验证参数 %s 时出错: %s", param_name, e)
             
             # 清理
             if sanitizer:
                 try:
                     kwargs[param_name] = sanitizer(value)
                 except Exception as e:
-                    logger.warning(f"清理参数 {param_name} 时出错: {e}")
+                    logger.warning("清理参数 %s 时出错: %s", param_name, e)
             
             return func(*args, **kwargs)
         
@@ -696,7 +907,7 @@ def require_resource(
                 return jsonify(get_error_response(
                     error=f"请提供{resource_name} ID",
                     status_code=400,
-                    error_code=ErrorCode.INVALID_INPUT
+                    error_code=_EC_INVALID_INPUT
                 )), 400
             
             # 获取资源
@@ -706,14 +917,14 @@ def require_resource(
                     return jsonify(get_error_response(
                         error=f"{resource_name}不存在: {resource_id}",
                         status_code=404,
-                        error_code=ErrorCode.RESOURCE_NOT_FOUND
+                        error_code=_EC_RESOURCE_NOT_FOUND
                     )), 404
             except Exception as e:
-                logger.error(f"获取{resource_name}时出错: {e}")
+                logger.error("获取%s时出错: %s", resource_name, e)
                 return jsonify(get_error_response(
                     error=f"获取{resource_name}失败",
                     status_code=500,
-                    error_code=ErrorCode.INTERNAL_ERROR
+                    error_code=_EC_INTERNAL_ERROR
                 )), 500
             
             return func(*args, **kwargs)
@@ -724,49 +935,57 @@ def require_resource(
 
 # ============== 常用验证器快捷方式 ==============
 
-def validate_simulation_id(func: Callable) -> Callable:
-    """
-    模拟 ID 验证装饰器（快捷方式）
-    
-    等同于:
-        @validate_path_param('simulation_id', validator=validate_graph_id,
-                            sanitizer=lambda x: sanitize_string(x, max_length=100))
-    """
-    return validate_path_param(
-        'simulation_id',
-        validator=validate_graph_id,
-        sanitizer=lambda x: sanitize_string(x, max_length=100)
-    )(func)
+# ID 类参数的清理函数，模块加载时绑定一次
+_sanitize_id = partial(sanitize_string, max_length=100)
 
 
-def validate_graph_id_param(func: Callable) -> Callable:
+def _id_param_decorator(param_name: str) -> Callable:
     """
-    图谱 ID 验证装饰器（快捷方式）
+    生成 ID 类路径参数的专用验证装饰器
+
+    行为等同于 validate_path_param(param_name, validator=validate_graph_id,
+    sanitizer=_sanitize_id)，但验证函数和清理函数在生成时固定，
+    缺失参数的错误响应在导入时序列化，请求路径上没有可选分支判断。
     """
-    return validate_path_param(
-        'graph_id',
-        validator=validate_graph_id,
-        sanitizer=lambda x: sanitize_string(x, max_length=100)
-    )(func)
+    missing_response = _prebuilt_error(f"{param_name} 是必填参数", 400, _EC_INVALID_INPUT)
+    
+    def decorator(func: Callable) -> Callable:
+        @wraps(func)
+        def wrapper(*args, **kwargs):
+            value = kwargs.get(param_name)
+            if value is None or value == '':
+                return missing_response()
+            
+            try:
+                result = validate_graph_id(value, param_name)
+                if not result.is_valid:
+                    return jsonify(get_error_response(
+                        error=result.get_error_messages()[0],
+                        status_code=400,
+                        error_code=_EC_VALIDATION_ERROR
+                    )), 400
+            except Exception as e:
+                logger.warning("验证参数 %s 时出错: %s", param_name, e)
+            
+            try:
+                kwargs[param_name] = _sanitize_id(value)
+            except Exception as e:
+                logger.warning("清理参数 %s 时出错: %s", param_name, e)
+            
+            return func(*args, **kwargs)
+        
+        return wrapper
+    return decorator
 
 
-def validate_project_id(func: Callable) -> Callable:
-    """
-    项目 ID 验证装饰器（快捷方式）
-    """
-    return validate_path_param(
-        'project_id',
-        validator=validate_graph_id,
-        sanitizer=lambda x: sanitize_string(x, max_length=100)
-    )(func)
+# 模拟 ID 验证装饰器（快捷方式）
+validate_simulation_id = _id_param_decorator('simulation_id')
 
+# 图谱 ID 验证装饰器（快捷方式）
+validate_graph_id_param = _id_param_decorator('graph_id')
 
-def validate_report_id(func: Callable) -> Callable:
-    """
-    报告 ID 验证装饰器（快捷方式）
-    """
-    return validate_path_param(
-        'report_id',
-        validator=validate_graph_id,
-        sanitizer=lambda x: sanitize_string(x, max_length=100)
-    )(func)
+# 项目 ID 验证装饰器（快捷方式）
+validate_project_id = _id_param_decorator('project_id')
+
+# 报告 ID 验证装饰器（快捷方式）
+validate_report_id = _id_param_decorator('report_id')
@@ -14,7 +14,7 @@ from flask import request, jsonify
 from . import graph_bp
 from . import get_error_response, make_error_response, ErrorCode
 from .auth import require_api_key
-from .decorators import require_project_owner, require_task_owner
+from .decorators import require_project_owner, require_task_owner, concurrent_limit, invalidate_project_owner_cache
 from flask import g
 from ..config_new import get_config
 from ..services.ontology_generator import OntologyGenerator
@@ -86,6 +86,7 @@ def delete_project(project_id: str):
     删除项目（仅项目所有者）
     """
     success = ProjectManager.delete_project(project_id)
+    invalidate_project_owner_cache(project_id)
     if not success:
         return jsonify(get_error_response(
             error=f"项目不存在或删除失败: {project_id}",
@@ -188,6 +189,7 @@ def repair_project(project_id: str):
 
 @graph_bp.route('/ontology/generate', methods=['POST'])
 @require_api_key(permissions=["write"], signature_required=False)
+@concurrent_limit()
 def generate_ontology():
     """
     接口1：上传文件，分析生成本体定义
@@ -667,7 +669,7 @@ def _resolve_graph_owner_project(graph_id: str):
         project = None
         for pid in ProjectManager._get_storage().list_project_ids_by_user(g.current_user["id"], limit=500):
             p = ProjectManager.get_project(pid)
-            if p and getattr(p, "graph_id", None) == graph_id:
+            if p and p.graph_id == graph_id:
                 project = p
                 break
     if not project:
@@ -676,7 +678,7 @@ def _resolve_graph_owner_project(graph_id: str):
             status_code=404,
             error_code=ErrorCode.RESOURCE_NOT_FOUND
         )), 404)
-    if getattr(project, "user_id", None) != g.current_user["id"]:
+    if project.user_id != g.current_user["id"]:
         return None, (jsonify(get_error_response(
             error="无权访问该图谱",
             status_code=403,
@@ -8,16 +8,19 @@ import os
 import json
 import traceback
 import threading
-from flask import request, jsonify, send_file, g
+from flask import request, jsonify, send_file, g, stream_with_context
 
 from . import report_bp
 from . import get_error_response, make_error_response, ErrorCode
 from .auth import require_api_key
+from .decorators import concurrent_limit, check_simulation_owner, get_current_user_project_ids
+from .response import stream
 from ..config_new import get_config
 from ..services.report_agent import ReportAgent, ReportManager, ReportStatus
 from ..services.simulation_manager import SimulationManager
 from ..models.project import ProjectManager
-from ..models.task import TaskManager, TaskStatus
+from ..models.task import TaskManager
+from ..utils.cache import TTLCache
 from ..utils.logger import get_logger
 from ..utils.validators import (
     validate_no_sql_injection,
@@ -30,69 +33,99 @@ logger = get_logger('multimo.api.report')
 
 # ============== 数据隔离辅助函数 ==============
 
-def _resolve_report_owner(report_id: str):
+def _simulation_manager() -> SimulationManager:
+    """
+    获取本次请求共享的 SimulationManager。
+
+    归属校验与处理函数复用同一实例，已加载的模拟状态在请求内不再重复读取；
+    实例不跨请求共享，避免读到其他线程更新前的状态缓存。
+    """
+    manager = g.get("_simulation_manager")
+    if manager is None:
+        manager = g._simulation_manager = SimulationManager()
+    return manager
+
+
+def _report_not_found(report_id: str):
+    """构建报告不存在的 404 响应"""
+    return jsonify(get_error_response(
+        error=f"报告不存在: {report_id}",
+        status_code=404,
+        error_code=ErrorCode.RESOURCE_NOT_FOUND
+    )), 404
+
+
+def _check_report_owner(report_id: str):
     """
-    校验当前用户是否为报告所有者。
-    链路: report -> simulation_id -> project -> project.user_id == g.current_user["id"]
+    校验当前用户是否为报告所有者（不加载报告内容）。
+    链路: report -> simulation_id -> project -> project.user_id == g.current_user["id"]，
+    每一级映射均走进程内缓存，轮询时通常无需读盘。
 
     Returns:
-        (report, None) 成功；(None, (response, status_code)) 失败。
+        None 表示通过；否则为 (response, status_code)。
     """
-    report = ReportManager.get_report(report_id)
-    if not report:
-        return None, (jsonify(get_error_response(
-            error=f"报告不存在: {report_id}",
-            status_code=404,
-            error_code=ErrorCode.RESOURCE_NOT_FOUND
-        )), 404)
+    simulation_id = ReportManager.get_report_simulation_id(report_id)
+    if simulation_id is None:
+        return _report_not_found(report_id)
 
-    simulation_id = getattr(report, "simulation_id", None)
     if not simulation_id:
-        return None, (jsonify(get_error_response(
+        return jsonify(get_error_response(
             error="报告归属未知",
             status_code=403,
             error_code=ErrorCode.FORBIDDEN
-        )), 403)
+        )), 403
 
-    err = _check_simulation_belongs_to_user(simulation_id)
+    return check_simulation_owner(simulation_id)
+
+
+def _resolve_report_owner(report_id: str):
+    """
+    校验报告归属并加载报告。
+
+    Returns:
+        (report, None) 成功；(None, (response, status_code)) 失败。
+    """
+    err = _check_report_owner(report_id)
     if err is not None:
         return None, err
 
+    report = ReportManager.get_report(report_id)
+    if not report:
+        return None, _report_not_found(report_id)
+
     return report, None
 
 
-def _check_simulation_belongs_to_user(simulation_id: str):
+def _poll_response(payload):
     """
-    校验 simulation_id 对应的项目是否属于当前用户。
+    构建状态轮询接口的响应，允许浏览器短暂缓存（按用户私有，不经共享代理）
+
+    附带内容 ETag：内容未变化时对 If-None-Match 直接返回 304，不再传输响应体
+    """
+    response = jsonify(payload)
+    response.headers['Cache-Control'] = 'private, max-age=1'
+    response.add_etag()
+    return response.make_conditional(request)
 
-    Returns:
-        None 表示校验通过；否则返回 (response, status_code)。
-    """
-    manager = SimulationManager()
-    state = manager.get_simulation(simulation_id)
-    if not state:
-        return (jsonify(get_error_response(
-            error=f"模拟不存在: {simulation_id}",
-            status_code=404,
-            error_code=ErrorCode.RESOURCE_NOT_FOUND
-        )), 404)
-
-    project = ProjectManager.get_project(state.project_id)
-    if not project:
-        return (jsonify(get_error_response(
-            error="项目不存在",
-            status_code=404,
-            error_code=ErrorCode.RESOURCE_NOT_FOUND
-        )), 404)
-
-    if getattr(project, "user_id", None) != g.current_user["id"]:
-        return (jsonify(get_error_response(
-            error="无权访问该资源",
-            status_code=403,
-            error_code=ErrorCode.FORBIDDEN
-        )), 403)
 
-    return None
+# 对话 Agent 缓存：(graph_id, simulation_id, simulation_requirement) -> ReportAgent
+# Agent 初始化需创建 LLM / Zep 客户端；chat() 的对话历史由调用方传入，实例本身无会话状态，可跨请求复用
+_CHAT_AGENT_CACHE_TTL = 1800
+_chat_agent_cache = TTLCache(maxsize=128, ttl=_CHAT_AGENT_CACHE_TTL)
+
+
+def _get_chat_agent(graph_id: str, simulation_id: str, simulation_requirement: str) -> ReportAgent:
+    """获取对话用的 ReportAgent，同一模拟在 _CHAT_AGENT_CACHE_TTL 秒内复用同一实例"""
+    key = (graph_id, simulation_id, simulation_requirement)
+    agent = _chat_agent_cache.get(key)
+    if agent is None:
+        agent = ReportAgent(
+            graph_id=graph_id,
+            simulation_id=simulation_id,
+            simulation_requirement=simulation_requirement
+        )
+        _chat_agent_cache.set(key, agent)
+    return agent
 
 
 # ============== 报告生成接口 ==============
@@ -155,7 +188,7 @@ def generate_report():
         force_regenerate = data.get('force_regenerate', False)
         
         # 获取模拟信息
-        manager = SimulationManager()
+        manager = _simulation_manager()
         state = manager.get_simulation(simulation_id)
         
         if not state:
@@ -260,7 +293,7 @@ def get_generate_status():
 
         # 如果提供了 simulation_id，先校验归属
         if simulation_id:
-            err = _check_simulation_belongs_to_user(simulation_id)
+            err = check_simulation_owner(simulation_id)
             if err is not None:
                 return err
 
@@ -278,28 +311,13 @@ def get_generate_status():
                     }
                 })
 
-        # 如果没有提供 task_id，尝试通过 simulation_id 查找任务
+        # 如果没有提供 task_id，尝试通过 simulation_id 查找进行中的任务
         task_manager = TaskManager()
+        task = None
         if not task_id and simulation_id:
-            # 查找该 simulation 对应的报告生成任务
-            all_tasks = task_manager.list_tasks(task_type="report_generate", user_id=g.current_user["id"])
-            task = None
-            for t_dict in all_tasks:
-                t_metadata = t_dict.get("metadata", {})
-                if isinstance(t_metadata, str):
-                    try:
-                        t_metadata = json.loads(t_metadata)
-                    except:
-                        t_metadata = {}
-                if t_metadata.get("simulation_id") == simulation_id:
-                    # 找到对应的任务，检查状态
-                    task_obj = task_manager.get_task(t_dict.get("task_id"))
-                    if task_obj:
-                        # 只返回进行中的任务（pending 或 processing）
-                        if task_obj.status in [TaskStatus.PENDING, TaskStatus.PROCESSING]:
-                            task = task_obj
-                            break
-                        # 如果任务已完成或失败，继续查找是否有其他进行中的任务
+            task = task_manager.find_active_task_by_simulation(
+                simulation_id, task_type="report_generate", user_id=g.current_user["id"]
+            )
             if not task:
                 return jsonify({
                     "success": False,
@@ -322,7 +340,7 @@ def get_generate_status():
                 }), 404
 
         # 校验任务归属
-        task_user_id = getattr(task, "user_id", None) or (task.metadata or {}).get("user_id")
+        task_user_id = task.user_id or (task.metadata or {}).get("user_id")
         if task_user_id is not None and task_user_id != g.current_user["id"]:
             return jsonify(get_error_response(
                 error="无权操作该任务",
@@ -370,7 +388,7 @@ def get_report_by_simulation(simulation_id: str):
     根据模拟ID获取报告（仅模拟所有者）
     """
     try:
-        err = _check_simulation_belongs_to_user(simulation_id)
+        err = check_simulation_owner(simulation_id)
         if err is not None:
             return err
 
@@ -416,32 +434,16 @@ def list_reports():
 
         # 如果指定了 simulation_id，先校验归属
         if simulation_id:
-            err = _check_simulation_belongs_to_user(simulation_id)
+            err = check_simulation_owner(simulation_id)
             if err is not None:
                 return err
 
+        # 未指定 simulation_id 时按当前用户过滤（已指定时上面已校验归属）
         reports = ReportManager.list_reports(
             simulation_id=simulation_id,
-            limit=limit
+            limit=limit,
+            project_ids=None if simulation_id else get_current_user_project_ids()
         )
-
-        # 未指定 simulation_id 时，过滤只保留当前用户的报告
-        if not simulation_id:
-            user_project_ids = set(
-                ProjectManager._get_storage().list_project_ids_by_user(
-                    g.current_user["id"]
-                )
-            )
-            sim_manager = SimulationManager()
-            filtered = []
-            for r in reports:
-                sid = getattr(r, "simulation_id", None)
-                if not sid:
-                    continue
-                state = sim_manager.get_simulation(sid)
-                if state and state.project_id in user_project_ids:
-                    filtered.append(r)
-            reports = filtered
         
         return jsonify({
             "success": True,
@@ -458,33 +460,36 @@ def list_reports():
 def download_report(report_id: str):
     """
     下载报告（Markdown格式，仅报告所有者）
+    
+    客户端接受 gzip 时直接发送生成时预压缩的副本（Content-Encoding: gzip）
     """
     try:
-        report, err = _resolve_report_owner(report_id)
+        err = _check_report_owner(report_id)
         if err is not None:
             return err
         
         md_path = ReportManager._get_report_markdown_path(report_id)
         
         if not os.path.exists(md_path):
-            # 如果MD文件不存在，使用内存缓冲区返回
-            import io
-            buffer = io.BytesIO()
-            buffer.write(report.markdown_content.encode('utf-8'))
-            buffer.seek(0)
-            
-            return send_file(
-                buffer,
-                mimetype='text/markdown',
-                as_attachment=True,
-                download_name=f"{report_id}.md"
-            )
+            # 如果MD文件不存在（旧格式报告），落盘一次，之后直接发送文件
+            report, err = _resolve_report_owner(report_id)
+            if err is not None:
+                return err
+            md_path = ReportManager.materialize_markdown(report_id, report.markdown_content or "")
         
-        return send_file(
-            md_path,
+        gz_path = ReportManager.get_markdown_gz_path(report_id) if 'gzip' in request.accept_encodings else None
+        
+        response = send_file(
+            gz_path or md_path,
+            mimetype='text/markdown',
             as_attachment=True,
-            download_name=f"{report_id}.md"
+            download_name=f"{report_id}.md",
+            conditional=True
         )
+        if gz_path:
+            response.headers['Content-Encoding'] = 'gzip'
+        response.vary.add('Accept-Encoding')
+        return response
         
     except Exception as e:
         logger.error(f"下载报告失败: {str(e)}")
@@ -495,7 +500,7 @@ def download_report(report_id: str):
 def delete_report(report_id: str):
     """删除报告（仅报告所有者）"""
     try:
-        _, err = _resolve_report_owner(report_id)
+        err = _check_report_owner(report_id)
         if err is not None:
             return err
 
@@ -520,6 +525,7 @@ def delete_report(report_id: str):
 # ============== Report Agent对话接口 ==============
 
 @report_bp.route('/chat', methods=['POST'])
+@concurrent_limit()
 def chat_with_report_agent():
     """
     与Report Agent对话
@@ -577,12 +583,12 @@ def chat_with_report_agent():
             }), 400
         
         # 校验模拟归属（数据隔离）
-        err = _check_simulation_belongs_to_user(simulation_id)
+        err = check_simulation_owner(simulation_id)
         if err is not None:
             return err
 
         # 获取模拟和项目信息
-        manager = SimulationManager()
+        manager = _simulation_manager()
         state = manager.get_simulation(simulation_id)
         
         if not state:
@@ -607,12 +613,8 @@ def chat_with_report_agent():
         
         simulation_requirement = project.simulation_requirement or ""
         
-        # 创建Agent并进行对话
-        agent = ReportAgent(
-            graph_id=graph_id,
-            simulation_id=simulation_id,
-            simulation_requirement=simulation_requirement
-        )
+        # 获取（复用）Agent并进行对话
+        agent = _get_chat_agent(graph_id, simulation_id, simulation_requirement)
         
         result = agent.chat(message=message, chat_history=chat_history)
         
@@ -634,7 +636,7 @@ def get_report_progress(report_id: str):
     获取报告生成进度（实时，仅报告所有者）
     """
     try:
-        _, err = _resolve_report_owner(report_id)
+        err = _check_report_owner(report_id)
         if err is not None:
             return err
 
@@ -646,7 +648,7 @@ def get_report_progress(report_id: str):
                 "error": f"报告不存在或进度信息不可用: {report_id}"
             }), 404
         
-        return jsonify({
+        return _poll_response({
             "success": True,
             "data": progress
         })
@@ -662,7 +664,7 @@ def get_report_sections(report_id: str):
     获取已生成的章节列表（分章节输出，仅报告所有者）
     """
     try:
-        _, err = _resolve_report_owner(report_id)
+        err = _check_report_owner(report_id)
         if err is not None:
             return err
 
@@ -672,7 +674,7 @@ def get_report_sections(report_id: str):
         report = ReportManager.get_report(report_id)
         is_complete = report is not None and report.status == ReportStatus.COMPLETED
         
-        return jsonify({
+        return _poll_response({
             "success": True,
             "data": {
                 "report_id": report_id,
@@ -687,31 +689,95 @@ def get_report_sections(report_id: str):
         return jsonify(make_error_response(e, 500, ErrorCode.INTERNAL_ERROR)), 500
 
 
+@report_bp.route('/<report_id>/state', methods=['GET'])
+def get_report_state(report_id: str):
+    """
+    一次返回报告的轮询状态（仅报告所有者）
+    
+    合并 /progress、/sections 与 /check/<simulation_id> 的信息，归属只校验一次；
+    章节仅返回文件信息与修改时间，内容通过 /section/<index> 获取
+    
+    返回：
+        {
+            "success": true,
+            "data": {
+                "report_id": "report_xxxx",
+                "simulation_id": "sim_xxxx",
+                "status": "generating",
+                "progress": {...} | null,
+                "sections": [{"filename", "section_index", "subsection_index", "is_subsection", "updated_at"}],
+                "total_sections": 2,
+                "is_complete": false,
+                "interview_unlocked": false
+            }
+        }
+    """
+    try:
+        report, err = _resolve_report_owner(report_id)
+        if err is not None:
+            return err
+
+        sections = ReportManager.list_section_files(report_id)
+        is_complete = report.status == ReportStatus.COMPLETED
+        
+        return _poll_response({
+            "success": True,
+            "data": {
+                "report_id": report_id,
+                "simulation_id": report.simulation_id,
+                "status": report.status.value,
+                "progress": ReportManager.get_progress(report_id),
+                "sections": sections,
+                "total_sections": len(sections),
+                "is_complete": is_complete,
+                "interview_unlocked": is_complete
+            }
+        })
+        
+    except Exception as e:
+        logger.error(f"获取报告状态失败: {str(e)}")
+        return jsonify(make_error_response(e, 500, ErrorCode.INTERNAL_ERROR)), 500
+
+
 @report_bp.route('/<report_id>/section/<int:section_index>', methods=['GET'])
 def get_single_section(report_id: str, section_index: int):
     """
     获取单个章节内容（仅报告所有者）
+    
+    默认返回 JSON；请求头 Accept 优先 text/markdown 时直接发送章节文件
+    （支持 ETag / Last-Modified 条件请求，章节序号见 X-Section-Index 响应头）
     """
     try:
-        _, err = _resolve_report_owner(report_id)
+        err = _check_report_owner(report_id)
         if err is not None:
             return err
 
         section_path = ReportManager._get_section_path(report_id, section_index)
+        filename = f"section_{section_index:02d}.md"
         
         if not os.path.exists(section_path):
             return jsonify({
                 "success": False,
-                "error": f"章节不存在: section_{section_index:02d}.md"
+                "error": f"章节不存在: {filename}"
             }), 404
         
+        if request.accept_mimetypes.best_match(['application/json', 'text/markdown']) == 'text/markdown':
+            response = send_file(
+                section_path,
+                mimetype='text/markdown',
+                download_name=filename,
+                conditional=True
+            )
+            response.headers['X-Section-Index'] = str(section_index)
+            return response
+        
         with open(section_path, 'r', encoding='utf-8') as f:
             content = f.read()
         
         return jsonify({
             "success": True,
             "data": {
-                "filename": f"section_{section_index:02d}.md",
+                "filename": filename,
                 "section_index": section_index,
                 "content": content
             }
@@ -745,7 +811,7 @@ def check_report_status(simulation_id: str):
     """
     try:
         # 校验模拟归属（数据隔离）
-        err = _check_simulation_belongs_to_user(simulation_id)
+        err = check_simulation_owner(simulation_id)
         if err is not None:
             return err
 
@@ -758,7 +824,7 @@ def check_report_status(simulation_id: str):
         # 只有报告完成后才解锁interview
         interview_unlocked = has_report and report.status == ReportStatus.COMPLETED
         
-        return jsonify({
+        return _poll_response({
             "success": True,
             "data": {
                 "simulation_id": simulation_id,
@@ -776,13 +842,22 @@ def check_report_status(simulation_id: str):
 
 # ============== Agent 日志接口 ==============
 
+def _sse_events(records):
+    """将日志记录逐条编码为 SSE 事件，结束时发送 end 事件"""
+    count = 0
+    for record in records:
+        count += 1
+        yield f"data: {json.dumps(record, ensure_ascii=False, separators=(',', ':'))}\n\n"
+    yield f"event: end\ndata: {json.dumps({'count': count}, separators=(',', ':'))}\n\n"
+
+
 @report_bp.route('/<report_id>/agent-log', methods=['GET'])
 def get_agent_log(report_id: str):
     """
     获取 Report Agent 的详细执行日志（仅报告所有者）
     """
     try:
-        _, err = _resolve_report_owner(report_id)
+        err = _check_report_owner(report_id)
         if err is not None:
             return err
 
@@ -803,22 +878,19 @@ def get_agent_log(report_id: str):
 @report_bp.route('/<report_id>/agent-log/stream', methods=['GET'])
 def stream_agent_log(report_id: str):
     """
-    获取完整的 Agent 日志（仅报告所有者）
+    以 SSE 流式推送 Agent 日志（仅报告所有者）
+    
+    每条日志一个 data 事件，结束时发送 end 事件（含总条数）；支持 from_line 增量读取
     """
     try:
-        _, err = _resolve_report_owner(report_id)
+        err = _check_report_owner(report_id)
         if err is not None:
             return err
 
-        logs = ReportManager.get_agent_log_stream(report_id)
-        
-        return jsonify({
-            "success": True,
-            "data": {
-                "logs": logs,
-                "count": len(logs)
-            }
-        })
+        from_line = request.args.get('from_line', 0, type=int)
+        return stream(stream_with_context(
+            _sse_events(ReportManager.iter_agent_log(report_id, from_line=from_line))
+        ))
         
     except Exception as e:
         logger.error(f"获取Agent日志失败: {str(e)}")
@@ -833,7 +905,7 @@ def get_console_log(report_id: str):
     获取 Report Agent 的控制台输出日志（仅报告所有者）
     """
     try:
-        _, err = _resolve_report_owner(report_id)
+        err = _check_report_owner(report_id)
         if err is not None:
             return err
 
@@ -854,22 +926,19 @@ def get_console_log(report_id: str):
 @report_bp.route('/<report_id>/console-log/stream', methods=['GET'])
 def stream_console_log(report_id: str):
     """
-    获取完整的控制台日志（仅报告所有者）
+    以 SSE 流式推送控制台日志（仅报告所有者）
+    
+    每条日志一个 data 事件，结束时发送 end 事件（含总条数）；支持 from_line 增量读取
     """
     try:
-        _, err = _resolve_report_owner(report_id)
+        err = _check_report_owner(report_id)
         if err is not None:
             return err
 
-        logs = ReportManager.get_console_log_stream(report_id)
-        
-        return jsonify({
-            "success": True,
-            "data": {
-                "logs": logs,
-                "count": len(logs)
-            }
-        })
+        from_line = request.args.get('from_line', 0, type=int)
+        return stream(stream_with_context(
+            _sse_events(ReportManager.iter_console_log(report_id, from_line=from_line))
+        ))
         
     except Exception as e:
         logger.error(f"获取控制台日志失败: {str(e)}")
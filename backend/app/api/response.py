@@ -36,11 +36,45 @@ API 响应构建模块
         return success(item)
 """
 
-from typing import Any, Optional, Dict, List
-from flask import jsonify, Response
+import json
+import traceback
+from functools import lru_cache
+from typing import Any, Callable, Optional, Dict, Iterable, List
+from flask import current_app, jsonify, Response
 
 from . import ErrorCode, ErrorRecovery, get_config
 
+# 各错误代码的恢复建议，导入时一次性展开，构建错误响应时直接按枚举成员取值
+_RECOVERY = {code: ErrorRecovery.get(code) for code in ErrorCode}
+
+
+def _dumps(body: Dict[str, Any]) -> bytes:
+    """按 jsonify 的紧凑输出格式序列化响应体（键排序、UTF-8 原文、末尾换行）"""
+    return (json.dumps(body, ensure_ascii=False, sort_keys=True, separators=(",", ":")) + "\n").encode("utf-8")
+
+
+@lru_cache(maxsize=256)
+def _error_body(message: str, error_code: ErrorCode, suggestion: str) -> bytes:
+    """
+    序列化不带 details 的错误响应体
+
+    校验失败等错误的消息多为固定文本，相同组合只序列化一次。
+    """
+    return _dumps({
+        "success": False,
+        "error": message,
+        "error_code": error_code.value,
+        "recovery_suggestion": suggestion
+    })
+
+
+def _response_factory(body: bytes, status_code: int) -> Callable[[], tuple[Response, int]]:
+    """返回由已序列化响应体构建 (Response, status_code) 的无参函数"""
+    def make_response() -> tuple[Response, int]:
+        return Response(body, status=status_code, mimetype="application/json"), status_code
+    
+    return make_response
+
 
 def success(
     data: Any = None,
@@ -77,7 +111,8 @@ def success(
         response["count"] = count
     
     # 添加额外字段
-    response.update(extra)
+    if extra:
+        response.update(extra)
     
     return jsonify(response), status_code
 
@@ -158,21 +193,71 @@ def error(
         return error("参数无效", ErrorCode.INVALID_INPUT, 400)
         return error("服务器错误", ErrorCode.INTERNAL_ERROR, 500)
     """
-    suggestion = recovery_suggestion or ErrorRecovery.get(error_code)
+    suggestion = recovery_suggestion or _RECOVERY[error_code]
+    
+    if details is None:
+        body = _error_body(message, error_code, suggestion)
+        return Response(body, status=status_code, mimetype="application/json"), status_code
     
     response = {
         "success": False,
         "error": message,
         "error_code": error_code.value,
-        "recovery_suggestion": suggestion
+        "recovery_suggestion": suggestion,
+        "details": details
     }
     
-    if details is not None:
-        response["details"] = details
-    
     return jsonify(response), status_code
 
 
+def prebuilt_json(body: Dict[str, Any], status_code: int) -> Callable[[], tuple[Response, int]]:
+    """
+    预先序列化固定内容的 JSON 响应（在模块导入或应用初始化时调用）
+    
+    返回的函数每次调用都新建 Response（after_request 会修改响应头，不能复用同一对象），
+    但不再构建响应字典或重复序列化。所有预序列化响应都经由本函数，编码格式与 jsonify 一致。
+    
+    Args:
+        body: 响应体字典
+        status_code: HTTP 状态码
+    
+    Returns:
+        无参函数，调用返回 (Response, status_code) 元组
+    
+    Example:
+        _NO_AUTH = prebuilt_json(get_error_response("未提供认证信息", 401, ErrorCode.UNAUTHORIZED), 401)
+        
+        if not token:
+            return _NO_AUTH()
+    """
+    return _response_factory(_dumps(body), status_code)
+
+
+def prebuilt_error(
+    message: str,
+    error_code: ErrorCode = ErrorCode.INVALID_INPUT,
+    status_code: int = 400
+) -> Callable[[], tuple[Response, int]]:
+    """
+    预先序列化固定文案的 error() 格式错误响应，见 prebuilt_json
+    
+    Args:
+        message: 错误消息
+        error_code: 错误代码枚举
+        status_code: HTTP 状态码（默认 400）
+    
+    Returns:
+        无参函数，调用返回 (Response, status_code) 元组
+    
+    Example:
+        _MISSING_ID = prebuilt_error("请提供 simulation_id")
+        
+        if not simulation_id:
+            return _MISSING_ID()
+    """
+    return _response_factory(_error_body(message, error_code, _RECOVERY[error_code]), status_code)
+
+
 def exception_error(
     e: Exception,
     error_code: ErrorCode = ErrorCode.INTERNAL_ERROR,
@@ -197,20 +282,17 @@ def exception_error(
         except Exception as e:
             return exception_error(e)
     """
-    import traceback
-    
-    config = get_config()
     message = custom_message or str(e)
     
     response = {
         "success": False,
         "error": message,
         "error_code": error_code.value,
-        "recovery_suggestion": ErrorRecovery.get(error_code)
+        "recovery_suggestion": _RECOVERY[error_code]
     }
     
     # 仅在 DEBUG 模式下包含 traceback
-    if config.DEBUG:
+    if get_config().DEBUG:
         response["traceback"] = traceback.format_exc()
     
     return jsonify(response), status_code
@@ -351,23 +433,27 @@ def paginated(
         total = count_items()
         return paginated(items, total, page=1, page_size=20)
     """
-    total_pages = (total + page_size - 1) // page_size if page_size > 0 else 0
-    
-    response = {
+    return jsonify({
         "success": True,
         "data": items,
         "message": message,
-        "pagination": {
-            "total": total,
-            "page": page,
-            "page_size": page_size,
-            "total_pages": total_pages,
-            "has_next": page < total_pages,
-            "has_prev": page > 1
-        }
+        "pagination": _pagination(total, page, page_size)
+    }), 200
+
+
+def _pagination(total: int, page: int, page_size: int) -> Dict[str, Any]:
+    """构建分页信息"""
+    # 向上取整除法；page_size 非正时视为没有分页
+    total_pages = -(-total // page_size) if page_size > 0 else 0
+    
+    return {
+        "total": total,
+        "page": page,
+        "page_size": page_size,
+        "total_pages": total_pages,
+        "has_next": page < total_pages,
+        "has_prev": page > 1
     }
-    
-    return jsonify(response), 200
 
 
 # ============== 流式响应 ==============
@@ -401,3 +487,45 @@ def stream(
             'Connection': 'keep-alive'
         }
     )
+
+
+def paginated_stream(
+    items: Iterable[Any],
+    total: int,
+    page: int = 1,
+    page_size: int = 20,
+    message: str = "获取成功"
+) -> Response:
+    """
+    以 NDJSON 流式构建分页响应（用于数据量很大的列表）
+    
+    首行为不含 data 的分页响应头，其后每行一个条目，逐条序列化，
+    不在内存中拼出完整的响应体。
+    
+    Args:
+        items: 当前页数据（可为生成器）
+        total: 总记录数
+        page: 当前页码（从 1 开始）
+        page_size: 每页大小
+        message: 成功消息
+    
+    Returns:
+        Flask Response 对象（application/x-ndjson）
+    
+    Example:
+        return paginated_stream(iter_items(page=1, size=500), total, page=1, page_size=500)
+    """
+    # 在请求上下文中取出序列化函数，生成器在响应发送阶段执行
+    dumps = current_app.json.dumps
+    header = {
+        "success": True,
+        "message": message,
+        "pagination": _pagination(total, page, page_size)
+    }
+    
+    def generate():
+        yield dumps(header, separators=(",", ":")) + "\n"
+        for item in items:
+            yield dumps(item, separators=(",", ":")) + "\n"
+    
+    return stream(generate(), content_type="application/x-ndjson")
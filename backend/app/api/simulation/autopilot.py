@@ -13,18 +13,48 @@
     POST /auto-pilot/reset      - 重置自动驾驶状态
 """
 
-from flask import request, jsonify
+from functools import wraps
 
-from .. import simulation_bp, make_error_response, ErrorCode
+from flask import request
+
+from .. import simulation_bp
+from ..response import success, bad_request, not_found, exception_error, prebuilt_error
 from ...services.simulation_manager import SimulationManager
-from ...services.auto_pilot_manager import AutoPilotManager, AutoPilotMode
+from ...services.auto_pilot_manager import get_auto_pilot_manager, AutoPilotMode
 from ...utils.logger import get_logger
 
 logger = get_logger('multimo.api.simulation.autopilot')
 
+# 固定文案的校验错误响应，导入时序列化一次
+_MISSING_SIMULATION_ID = prebuilt_error("请提供 simulation_id")
+_INVALID_MODE = prebuilt_error("mode 必须是 'auto' 或 'manual'")
+_AUTO_MODE_REQUIRED = prebuilt_error("请先启用自动驾驶模式（调用 /api/simulation/auto-pilot/config 设置 mode=auto）")
+
+# 请求中的 mode 取值 -> 自动驾驶模式
+_MODE_MAP = {
+    'auto': AutoPilotMode.AUTO,
+    'manual': AutoPilotMode.MANUAL,
+}
+
+
+def require_simulation_id(func):
+    """
+    解析请求 JSON 并校验 simulation_id，以 (simulation_id, data) 传给处理函数。
+    请求体缺失或无法解析时按空对象处理。
+    """
+    @wraps(func)
+    def wrapper(*args, **kwargs):
+        data = request.get_json(silent=True) or {}
+        simulation_id = data.get('simulation_id')
+        if not simulation_id:
+            return _MISSING_SIMULATION_ID()
+        return func(simulation_id, data, *args, **kwargs)
+    return wrapper
+
 
 @simulation_bp.route('/auto-pilot/config', methods=['POST'])
-def config_auto_pilot():
+@require_simulation_id
+def config_auto_pilot(simulation_id, data):
     """
     配置自动驾驶模式
     
@@ -40,58 +70,40 @@ def config_auto_pilot():
         配置结果
     """
     try:
-        data = request.get_json() or {}
-        
-        simulation_id = data.get('simulation_id')
-        if not simulation_id:
-            return jsonify({
-                "success": False,
-                "error": "请提供 simulation_id"
-            }), 400
-        
         mode = data.get('mode', '').lower()
-        if mode not in ['auto', 'manual']:
-            return jsonify({
-                "success": False,
-                "error": "mode 必须是 'auto' 或 'manual'"
-            }), 400
+        auto_mode = _MODE_MAP.get(mode)
+        if auto_mode is None:
+            return _INVALID_MODE()
         
-        manager = AutoPilotManager()
-        auto_mode = AutoPilotMode.AUTO if mode == 'auto' else AutoPilotMode.MANUAL
+        manager = get_auto_pilot_manager()
         
         # 检查模拟是否存在
         sim_manager = SimulationManager()
         sim_state = sim_manager.get_simulation(simulation_id)
         if not sim_state:
-            return jsonify({
-                "success": False,
-                "error": f"模拟不存在: {simulation_id}"
-            }), 404
+            return not_found(f"模拟不存在: {simulation_id}")
         
         # 设置模式
         state = manager.set_mode(simulation_id, auto_mode)
         
         # 更新 SimulationState
-        sim_state.auto_pilot_enabled = (mode == 'auto')
-        sim_manager._save_simulation_state(sim_state)
+        sim_manager.update_fields(simulation_id, auto_pilot_enabled=(auto_mode is AutoPilotMode.AUTO))
         
-        return jsonify({
-            "success": True,
-            "data": {
-                "simulation_id": simulation_id,
-                "mode": mode,
-                "message": "自动驾驶模式已启用" if mode == 'auto' else "手动模式已启用",
-                "available": True
-            }
+        return success({
+            "simulation_id": simulation_id,
+            "mode": mode,
+            "message": "自动驾驶模式已启用" if auto_mode is AutoPilotMode.AUTO else "手动模式已启用",
+            "available": True
         })
         
     except Exception as e:
         logger.error(f"配置自动驾驶模式失败: {str(e)}")
-        return jsonify(make_error_response(e, 500, ErrorCode.INTERNAL_ERROR)), 500
+        return exception_error(e)
 
 
 @simulation_bp.route('/auto-pilot/start', methods=['POST'])
-def start_auto_pilot():
+@require_simulation_id
+def start_auto_pilot(simulation_id, data):
     """
     启动自动驾驶
     
@@ -107,35 +119,20 @@ def start_auto_pilot():
         启动结果和当前状态
     """
     try:
-        data = request.get_json() or {}
-        
-        simulation_id = data.get('simulation_id')
-        if not simulation_id:
-            return jsonify({
-                "success": False,
-                "error": "请提供 simulation_id"
-            }), 400
-        
         force = data.get('force', False)
         
-        manager = AutoPilotManager()
+        manager = get_auto_pilot_manager()
         
         # 检查是否已启用自动驾驶模式
         current_mode = manager.get_mode(simulation_id)
         if current_mode.value != 'auto':
-            return jsonify({
-                "success": False,
-                "error": "请先启用自动驾驶模式（调用 /api/simulation/auto-pilot/config 设置 mode=auto）"
-            }), 400
+            return _AUTO_MODE_REQUIRED()
         
         # 检查模拟是否存在
         sim_manager = SimulationManager()
         sim_state = sim_manager.get_simulation(simulation_id)
         if not sim_state:
-            return jsonify({
-                "success": False,
-                "error": f"模拟不存在: {simulation_id}"
-            }), 404
+            return not_found(f"模拟不存在: {simulation_id}")
         
         # 如果强制模式，重置状态
         if force:
@@ -145,36 +142,33 @@ def start_auto_pilot():
         state = manager.start_auto_pilot(simulation_id, force=force)
         
         # 更新 SimulationState
-        sim_state.auto_pilot_enabled = True
-        sim_state.auto_pilot_started_at = state.started_at
-        sim_manager._save_simulation_state(sim_state)
-        
-        return jsonify({
-            "success": True,
-            "data": {
-                "simulation_id": simulation_id,
-                "status": state.status.value,
-                "current_step": state.current_step.value,
-                "step_progress": state.step_progress,
-                "step_message": state.step_message,
-                "message": "自动驾驶已启动",
-                "force_restarted": force
-            }
+        sim_manager.update_fields(
+            simulation_id,
+            auto_pilot_enabled=True,
+            auto_pilot_started_at=state.started_at
+        )
+        
+        return success({
+            "simulation_id": simulation_id,
+            "status": state.status.value,
+            "current_step": state.current_step.value,
+            "step_progress": state.step_progress,
+            "step_message": state.step_message,
+            "message": "自动驾驶已启动",
+            "force_restarted": force
         })
         
     except ValueError as e:
-        return jsonify({
-            "success": False,
-            "error": str(e)
-        }), 400
+        return bad_request(str(e))
         
     except Exception as e:
         logger.error(f"启动自动驾驶失败: {str(e)}")
-        return jsonify(make_error_response(e, 500, ErrorCode.INTERNAL_ERROR)), 500
+        return exception_error(e)
 
 
 @simulation_bp.route('/auto-pilot/pause', methods=['POST'])
-def pause_auto_pilot():
+@require_simulation_id
+def pause_auto_pilot(simulation_id, data):
     """
     暂停自动驾驶
     
@@ -187,41 +181,27 @@ def pause_auto_pilot():
         暂停后的状态
     """
     try:
-        data = request.get_json() or {}
-        
-        simulation_id = data.get('simulation_id')
-        if not simulation_id:
-            return jsonify({
-                "success": False,
-                "error": "请提供 simulation_id"
-            }), 400
-        
-        manager = AutoPilotManager()
+        manager = get_auto_pilot_manager()
         state = manager.pause_auto_pilot(simulation_id)
         
-        return jsonify({
-            "success": True,
-            "data": {
-                "simulation_id": simulation_id,
-                "status": state.status.value,
-                "current_step": state.current_step.value,
-                "message": "自动驾驶已暂停"
-            }
+        return success({
+            "simulation_id": simulation_id,
+            "status": state.status.value,
+            "current_step": state.current_step.value,
+            "message": "自动驾驶已暂停"
         })
         
     except ValueError as e:
-        return jsonify({
-            "success": False,
-            "error": str(e)
-        }), 400
+        return bad_request(str(e))
         
     except Exception as e:
         logger.error(f"暂停自动驾驶失败: {str(e)}")
-        return jsonify(make_error_response(e, 500, ErrorCode.INTERNAL_ERROR)), 500
+        return exception_error(e)
 
 
 @simulation_bp.route('/auto-pilot/resume', methods=['POST'])
-def resume_auto_pilot():
+@require_simulation_id
+def resume_auto_pilot(simulation_id, data):
     """
     恢复自动驾驶
     
@@ -234,41 +214,27 @@ def resume_auto_pilot():
         恢复后的状态
     """
     try:
-        data = request.get_json() or {}
-        
-        simulation_id = data.get('simulation_id')
-        if not simulation_id:
-            return jsonify({
-                "success": False,
-                "error": "请提供 simulation_id"
-            }), 400
-        
-        manager = AutoPilotManager()
+        manager = get_auto_pilot_manager()
         state = manager.resume_auto_pilot(simulation_id)
         
-        return jsonify({
-            "success": True,
-            "data": {
-                "simulation_id": simulation_id,
-                "status": state.status.value,
-                "current_step": state.current_step.value,
-                "message": "自动驾驶已恢复"
-            }
+        return success({
+            "simulation_id": simulation_id,
+            "status": state.status.value,
+            "current_step": state.current_step.value,
+            "message": "自动驾驶已恢复"
         })
         
     except ValueError as e:
-        return jsonify({
-            "success": False,
-            "error": str(e)
-        }), 400
+        return bad_request(str(e))
         
     except Exception as e:
         logger.error(f"恢复自动驾驶失败: {str(e)}")
-        return jsonify(make_error_response(e, 500, ErrorCode.INTERNAL_ERROR)), 500
+        return exception_error(e)
 
 
 @simulation_bp.route('/auto-pilot/stop', methods=['POST'])
-def stop_auto_pilot():
+@require_simulation_id
+def stop_auto_pilot(simulation_id, data):
     """
     停止自动驾驶
     
@@ -281,40 +247,26 @@ def stop_auto_pilot():
         停止后的状态
     """
     try:
-        data = request.get_json() or {}
-        
-        simulation_id = data.get('simulation_id')
-        if not simulation_id:
-            return jsonify({
-                "success": False,
-                "error": "请提供 simulation_id"
-            }), 400
-        
-        manager = AutoPilotManager()
+        manager = get_auto_pilot_manager()
         state = manager.stop_auto_pilot(simulation_id)
         
-        return jsonify({
-            "success": True,
-            "data": {
-                "simulation_id": simulation_id,
-                "status": state.status.value,
-                "message": "自动驾驶已停止"
-            }
+        return success({
+            "simulation_id": simulation_id,
+            "status": state.status.value,
+            "message": "自动驾驶已停止"
         })
         
     except ValueError as e:
-        return jsonify({
-            "success": False,
-            "error": str(e)
-        }), 400
+        return bad_request(str(e))
         
     except Exception as e:
         logger.error(f"停止自动驾驶失败: {str(e)}")
-        return jsonify(make_error_response(e, 500, ErrorCode.INTERNAL_ERROR)), 500
+        return exception_error(e)
 
 
 @simulation_bp.route('/auto-pilot/status', methods=['POST'])
-def get_auto_pilot_status():
+@require_simulation_id
+def get_auto_pilot_status(simulation_id, data):
     """
     获取自动驾驶状态
     
@@ -327,30 +279,19 @@ def get_auto_pilot_status():
         详细的自动驾驶状态信息
     """
     try:
-        data = request.get_json() or {}
-        
-        simulation_id = data.get('simulation_id')
-        if not simulation_id:
-            return jsonify({
-                "success": False,
-                "error": "请提供 simulation_id"
-            }), 400
-        
-        manager = AutoPilotManager()
+        manager = get_auto_pilot_manager()
         status = manager.to_dict(simulation_id)
         
-        return jsonify({
-            "success": True,
-            "data": status
-        })
+        return success(status)
         
     except Exception as e:
         logger.error(f"获取自动驾驶状态失败: {str(e)}")
-        return jsonify(make_error_response(e, 500, ErrorCode.INTERNAL_ERROR)), 500
+        return exception_error(e)
 
 
 @simulation_bp.route('/auto-pilot/reset', methods=['POST'])
-def reset_auto_pilot():
+@require_simulation_id
+def reset_auto_pilot(simulation_id, data):
     """
     重置自动驾驶状态
     
@@ -363,26 +304,14 @@ def reset_auto_pilot():
         重置结果
     """
     try:
-        data = request.get_json() or {}
-        
-        simulation_id = data.get('simulation_id')
-        if not simulation_id:
-            return jsonify({
-                "success": False,
-                "error": "请提供 simulation_id"
-            }), 400
-        
-        manager = AutoPilotManager()
+        manager = get_auto_pilot_manager()
         manager.reset_auto_pilot(simulation_id)
         
-        return jsonify({
-            "success": True,
-            "data": {
-                "simulation_id": simulation_id,
-                "message": "自动驾驶状态已重置"
-            }
+        return success({
+            "simulation_id": simulation_id,
+            "message": "自动驾驶状态已重置"
         })
         
     except Exception as e:
         logger.error(f"重置自动驾驶状态失败: {str(e)}")
-        return jsonify(make_error_response(e, 500, ErrorCode.INTERNAL_ERROR)), 500
+        return exception_error(e)
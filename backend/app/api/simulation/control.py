@@ -12,7 +12,8 @@
 import os
 from flask import request, jsonify
 
-from .. import simulation_bp, get_error_response, make_error_response, ErrorCode
+from .. import simulation_bp, get_error_response, ErrorCode
+from ..response import exception_error
 from ..decorators import require_simulation_owner
 from ...config_new import get_config
 from ...services.simulation_manager import SimulationManager, SimulationStatus
@@ -238,7 +239,7 @@ def start_simulation():
         
     except Exception as e:
         logger.error(f"启动模拟失败: {str(e)}")
-        return jsonify(make_error_response(e, 500, ErrorCode.INTERNAL_ERROR)), 500
+        return exception_error(e)
 
 
 @simulation_bp.route('/stop', methods=['POST'])
@@ -286,7 +287,7 @@ def stop_simulation():
         
     except Exception as e:
         logger.error(f"停止模拟失败: {str(e)}")
-        return jsonify(make_error_response(e, 500, ErrorCode.INTERNAL_ERROR)), 500
+        return exception_error(e)
 
 
 @simulation_bp.route('/<simulation_id>/resumable', methods=['GET'])
@@ -373,7 +374,7 @@ def check_resumable(simulation_id: str):
         
     except Exception as e:
         logger.error(f"检查可恢复状态失败: {str(e)}")
-        return jsonify(make_error_response(e, 500, ErrorCode.INTERNAL_ERROR)), 500
+        return exception_error(e)
 
 
 @simulation_bp.route('/<simulation_id>', methods=['DELETE'])
@@ -443,4 +444,4 @@ def delete_simulation(simulation_id: str):
         
     except Exception as e:
         logger.error(f"删除推演记录失败: {simulation_id}, error={str(e)}")
-        return jsonify(make_error_response(e, 500, ErrorCode.INTERNAL_ERROR)), 500
+        return exception_error(e)
@@ -31,7 +31,8 @@ import sqlite3
 from datetime import datetime
 from flask import request, jsonify, send_file
 
-from .. import simulation_bp, make_error_response, ErrorCode
+from .. import simulation_bp
+from ..response import exception_error
 from ...config_new import get_config
 from ...services.simulation_manager import SimulationManager, SimulationStatus
 from ...services.simulation_runner import SimulationRunner
@@ -120,7 +121,7 @@ def get_simulation(simulation_id: str):
         
     except Exception as e:
         logger.error(f"获取模拟状态失败: {str(e)}")
-        return jsonify(make_error_response(e, 500, ErrorCode.INTERNAL_ERROR)), 500
+        return exception_error(e)
 
 
 @simulation_bp.route('/list', methods=['GET'])
@@ -145,7 +146,7 @@ def list_simulations():
         
     except Exception as e:
         logger.error(f"列出模拟失败: {str(e)}")
-        return jsonify(make_error_response(e, 500, ErrorCode.INTERNAL_ERROR)), 500
+        return exception_error(e)
 
 
 @simulation_bp.route('/history', methods=['GET'])
@@ -223,7 +224,7 @@ def get_simulation_history():
         
     except Exception as e:
         logger.error(f"获取历史模拟失败: {str(e)}")
-        return jsonify(make_error_response(e, 500, ErrorCode.INTERNAL_ERROR)), 500
+        return exception_error(e)
 
 
 @simulation_bp.route('/<simulation_id>/profiles', methods=['GET'])
@@ -257,7 +258,7 @@ def get_simulation_profiles(simulation_id: str):
         
     except Exception as e:
         logger.error(f"获取Profile失败: {str(e)}")
-        return jsonify(make_error_response(e, 500, ErrorCode.INTERNAL_ERROR)), 500
+        return exception_error(e)
 
 
 @simulation_bp.route('/<simulation_id>/profiles/realtime', methods=['GET'])
@@ -335,7 +336,7 @@ def get_simulation_profiles_realtime(simulation_id: str):
         
     except Exception as e:
         logger.error(f"实时获取Profile失败: {str(e)}")
-        return jsonify(make_error_response(e, 500, ErrorCode.INTERNAL_ERROR)), 500
+        return exception_error(e)
 
 
 @simulation_bp.route('/<simulation_id>/config/realtime', methods=['GET'])
@@ -420,7 +421,7 @@ def get_simulation_config_realtime(simulation_id: str):
         
     except Exception as e:
         logger.error(f"实时获取Config失败: {str(e)}")
-        return jsonify(make_error_response(e, 500, ErrorCode.INTERNAL_ERROR)), 500
+        return exception_error(e)
 
 
 @simulation_bp.route('/<simulation_id>/config', methods=['GET'])
@@ -443,7 +444,7 @@ def get_simulation_config(simulation_id: str):
         
     except Exception as e:
         logger.error(f"获取配置失败: {str(e)}")
-        return jsonify(make_error_response(e, 500, ErrorCode.INTERNAL_ERROR)), 500
+        return exception_error(e)
 
 
 @simulation_bp.route('/<simulation_id>/config/download', methods=['GET'])
@@ -468,7 +469,7 @@ def download_simulation_config(simulation_id: str):
         
     except Exception as e:
         logger.error(f"下载配置失败: {str(e)}")
-        return jsonify(make_error_response(e, 500, ErrorCode.INTERNAL_ERROR)), 500
+        return exception_error(e)
 
 
 @simulation_bp.route('/script/<script_name>/download', methods=['GET'])
@@ -506,7 +507,7 @@ def download_simulation_script(script_name: str):
         
     except Exception as e:
         logger.error(f"下载脚本失败: {str(e)}")
-        return jsonify(make_error_response(e, 500, ErrorCode.INTERNAL_ERROR)), 500
+        return exception_error(e)
 
 
 @simulation_bp.route('/generate-profiles', methods=['POST'])
@@ -564,7 +565,7 @@ def generate_profiles():
         
     except Exception as e:
         logger.error(f"生成Profile失败: {str(e)}")
-        return jsonify(make_error_response(e, 500, ErrorCode.INTERNAL_ERROR)), 500
+        return exception_error(e)
 
 
 @simulation_bp.route('/<simulation_id>/export', methods=['GET'])
@@ -587,7 +588,7 @@ def export_simulation_data(simulation_id: str):
         
     except Exception as e:
         logger.error(f"导出数据失败: {str(e)}")
-        return jsonify(make_error_response(e, 500, ErrorCode.INTERNAL_ERROR)), 500
+        return exception_error(e)
 
 
 @simulation_bp.route('/<simulation_id>/run-status', methods=['GET'])
@@ -618,7 +619,7 @@ def get_run_status(simulation_id: str):
         
     except Exception as e:
         logger.error(f"获取运行状态失败: {str(e)}")
-        return jsonify(make_error_response(e, 500, ErrorCode.INTERNAL_ERROR)), 500
+        return exception_error(e)
 
 
 @simulation_bp.route('/<simulation_id>/run-status/detail', methods=['GET'])
@@ -676,7 +677,7 @@ def get_run_status_detail(simulation_id: str):
         
     except Exception as e:
         logger.error(f"获取详细状态失败: {str(e)}")
-        return jsonify(make_error_response(e, 500, ErrorCode.INTERNAL_ERROR)), 500
+        return exception_error(e)
 
 
 @simulation_bp.route('/<simulation_id>/actions', methods=['GET'])
@@ -708,7 +709,7 @@ def get_simulation_actions(simulation_id: str):
         
     except Exception as e:
         logger.error(f"获取动作历史失败: {str(e)}")
-        return jsonify(make_error_response(e, 500, ErrorCode.INTERNAL_ERROR)), 500
+        return exception_error(e)
 
 
 @simulation_bp.route('/<simulation_id>/timeline', methods=['GET'])
@@ -734,7 +735,7 @@ def get_simulation_timeline(simulation_id: str):
         
     except Exception as e:
         logger.error(f"获取时间线失败: {str(e)}")
-        return jsonify(make_error_response(e, 500, ErrorCode.INTERNAL_ERROR)), 500
+        return exception_error(e)
 
 
 @simulation_bp.route('/<simulation_id>/agent-stats', methods=['GET'])
@@ -753,7 +754,7 @@ def get_agent_stats(simulation_id: str):
         
     except Exception as e:
         logger.error(f"获取Agent统计失败: {str(e)}")
-        return jsonify(make_error_response(e, 500, ErrorCode.INTERNAL_ERROR)), 500
+        return exception_error(e)
 
 
 @simulation_bp.route('/<simulation_id>/posts', methods=['GET'])
@@ -814,7 +815,7 @@ def get_simulation_posts(simulation_id: str):
         
     except Exception as e:
         logger.error(f"获取帖子失败: {str(e)}")
-        return jsonify(make_error_response(e, 500, ErrorCode.INTERNAL_ERROR)), 500
+        return exception_error(e)
 
 
 @simulation_bp.route('/<simulation_id>/comments', methods=['GET'])
@@ -874,4 +875,4 @@ def get_simulation_comments(simulation_id: str):
         
     except Exception as e:
         logger.error(f"获取评论失败: {str(e)}")
-        return jsonify(make_error_response(e, 500, ErrorCode.INTERNAL_ERROR)), 500
+        return exception_error(e)
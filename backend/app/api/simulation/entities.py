@@ -11,7 +11,8 @@
 
 from flask import request, jsonify
 
-from .. import simulation_bp, get_error_response, make_error_response, ErrorCode
+from .. import simulation_bp, get_error_response, ErrorCode
+from ..response import exception_error
 from ...config_new import get_config
 from ...services.zep_entity_reader import ZepEntityReader
 from ...utils.logger import get_logger
@@ -68,7 +69,7 @@ def get_graph_entities(graph_id: str):
         
     except Exception as e:
         logger.error(f"获取图谱实体失败: {str(e)}")
-        return jsonify(make_error_response(e, 500, ErrorCode.INTERNAL_ERROR)), 500
+        return exception_error(e)
 
 
 @simulation_bp.route('/entities/<graph_id>/<entity_uuid>', methods=['GET'])
@@ -107,7 +108,7 @@ def get_entity_detail(graph_id: str, entity_uuid: str):
         
     except Exception as e:
         logger.error(f"获取实体详情失败: {str(e)}")
-        return jsonify(make_error_response(e, 500, ErrorCode.INTERNAL_ERROR)), 500
+        return exception_error(e)
 
 
 @simulation_bp.route('/entities/<graph_id>/by-type/<entity_type>', methods=['GET'])
@@ -153,4 +154,4 @@ def get_entities_by_type(graph_id: str, entity_type: str):
         
     except Exception as e:
         logger.error(f"获取实体失败: {str(e)}")
-        return jsonify(make_error_response(e, 500, ErrorCode.INTERNAL_ERROR)), 500
+        return exception_error(e)
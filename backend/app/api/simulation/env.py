@@ -10,7 +10,8 @@
 
 from flask import request, jsonify
 
-from .. import simulation_bp, make_error_response, ErrorCode
+from .. import simulation_bp
+from ..response import exception_error
 from ...services.simulation_manager import SimulationManager, SimulationStatus
 from ...services.simulation_runner import SimulationRunner
 from ...utils.logger import get_logger
@@ -67,7 +68,7 @@ def get_env_status():
 
     except Exception as e:
         logger.error(f"获取环境状态失败: {str(e)}")
-        return jsonify(make_error_response(e, 500, ErrorCode.INTERNAL_ERROR)), 500
+        return exception_error(e)
 
 
 @simulation_bp.route('/close-env', methods=['POST'])
@@ -126,4 +127,4 @@ def close_simulation_env():
         
     except Exception as e:
         logger.error(f"关闭环境失败: {str(e)}")
-        return jsonify(make_error_response(e, 500, ErrorCode.INTERNAL_ERROR)), 500
+        return exception_error(e)
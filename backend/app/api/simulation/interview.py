@@ -12,7 +12,9 @@
 
 from flask import request, jsonify
 
-from .. import simulation_bp, make_error_response, ErrorCode
+from .. import simulation_bp
+from ..response import exception_error
+from ..decorators import concurrent_limit
 from ...services.simulation_runner import SimulationRunner
 from ...utils.logger import get_logger
 
@@ -43,6 +45,7 @@ def optimize_interview_prompt(prompt: str) -> str:
 
 
 @simulation_bp.route('/interview', methods=['POST'])
+@concurrent_limit()
 def interview_agent():
     """
     采访单个Agent
@@ -132,10 +135,11 @@ def interview_agent():
         
     except Exception as e:
         logger.error(f"Interview失败: {str(e)}")
-        return jsonify(make_error_response(e, 500, ErrorCode.INTERNAL_ERROR)), 500
+        return exception_error(e)
 
 
 @simulation_bp.route('/interview/batch', methods=['POST'])
+@concurrent_limit()
 def interview_agents_batch():
     """
     批量采访多个Agent
@@ -243,10 +247,11 @@ def interview_agents_batch():
 
     except Exception as e:
         logger.error(f"批量Interview失败: {str(e)}")
-        return jsonify(make_error_response(e, 500, ErrorCode.INTERNAL_ERROR)), 500
+        return exception_error(e)
 
 
 @simulation_bp.route('/interview/all', methods=['POST'])
+@concurrent_limit()
 def interview_all_agents():
     """
     全局采访 - 使用相同问题采访所有Agent
@@ -325,7 +330,7 @@ def interview_all_agents():
 
     except Exception as e:
         logger.error(f"全局Interview失败: {str(e)}")
-        return jsonify(make_error_response(e, 500, ErrorCode.INTERNAL_ERROR)), 500
+        return exception_error(e)
 
 
 @simulation_bp.route('/interview/history', methods=['POST'])
@@ -385,4 +390,4 @@ def get_interview_history():
         
     except Exception as e:
         logger.error(f"获取Interview历史失败: {str(e)}")
-        return jsonify(make_error_response(e, 500, ErrorCode.INTERNAL_ERROR)), 500
+        return exception_error(e)
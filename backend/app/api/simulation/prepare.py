@@ -15,7 +15,8 @@ import json
 from datetime import datetime
 from flask import request, jsonify, g
 
-from .. import simulation_bp, get_error_response, make_error_response, ErrorCode
+from .. import simulation_bp, get_error_response
+from ..response import exception_error
 from ..auth import require_api_key
 from ...config_new import get_config
 from ...services.zep_entity_reader import ZepEntityReader
@@ -173,6 +174,17 @@ def create_simulation():
                 "success": False,
                 "error": f"项目不存在: {project_id}"
             }), 404
+        # 校验项目归属；未关联用户的旧项目归属未知，与 require_project_owner 一致拒绝
+        if project.user_id is None:
+            return jsonify({
+                "success": False,
+                "error": "项目归属未知"
+            }), 403
+        if project.user_id != g.current_user["id"]:
+            return jsonify({
+                "success": False,
+                "error": "无权操作该项目"
+            }), 403
         
         graph_id = data.get('graph_id') or project.graph_id
         if not graph_id:
@@ -196,7 +208,7 @@ def create_simulation():
         
     except Exception as e:
         logger.error(f"创建模拟失败: {str(e)}")
-        return jsonify(make_error_response(e, 500, ErrorCode.INTERNAL_ERROR)), 500
+        return exception_error(e)
 
 
 @simulation_bp.route('/prepare', methods=['POST'])
@@ -467,7 +479,7 @@ def prepare_simulation():
         
     except Exception as e:
         logger.error(f"启动准备任务失败: {str(e)}")
-        return jsonify(make_error_response(e, 500, ErrorCode.INTERNAL_ERROR)), 500
+        return exception_error(e)
 
 
 @simulation_bp.route('/prepare/status', methods=['POST'])
@@ -511,7 +523,7 @@ def get_prepare_status():
                     "success": False,
                     "error": "项目不存在"
                 }), 404
-            if getattr(project, "user_id", None) != g.current_user["id"]:
+            if project.user_id != g.current_user["id"]:
                 return jsonify({
                     "success": False,
                     "error": "无权操作该模拟"
@@ -536,25 +548,10 @@ def get_prepare_status():
         task = None
         
         if not task_id and simulation_id:
-            # 查找该 simulation 对应的准备任务
-            all_tasks = task_manager.list_tasks(task_type="simulation_prepare", user_id=g.current_user["id"])
-            for t_dict in all_tasks:
-                t_metadata = t_dict.get("metadata", {})
-                if isinstance(t_metadata, str):
-                    try:
-                        import json
-                        t_metadata = json.loads(t_metadata)
-                    except:
-                        t_metadata = {}
-                if t_metadata.get("simulation_id") == simulation_id:
-                    # 找到对应的任务，检查状态
-                    task_obj = task_manager.get_task(t_dict.get("task_id"))
-                    if task_obj:
-                        # 只返回进行中的任务（pending 或 processing）
-                        if task_obj.status in [TaskStatus.PENDING, TaskStatus.PROCESSING]:
-                            task = task_obj
-                            break
-                        # 如果任务已完成或失败，继续查找是否有其他进行中的任务
+            # 查找该 simulation 对应的进行中（pending 或 processing）准备任务，走 simulation_id 列索引
+            task = task_manager.find_active_task_by_simulation(
+                simulation_id, task_type="simulation_prepare", user_id=g.current_user["id"]
+            )
         
         if not task_id and not task:
             if simulation_id:
@@ -600,7 +597,7 @@ def get_prepare_status():
                 }), 404
         
         # 校验任务归属
-        task_user_id = getattr(task, "user_id", None) or (task.metadata or {}).get("user_id")
+        task_user_id = task.user_id or (task.metadata or {}).get("user_id")
         if task_user_id is not None and task_user_id != g.current_user["id"]:
             return jsonify({
                 "success": False,
@@ -2,6 +2,7 @@
 
 from flask import request, jsonify
 from app.api import api_v1_bp, get_response, get_error_response
+from app.api.decorators import require_admin, get_auth_metrics
 from app.utils import get_logger
 
 logger = get_logger(__name__)
@@ -44,3 +45,10 @@ def detailed_health_check():
     except Exception as e:
         logger.error(f"详细健康检查失败: {e}")
         return jsonify(get_error_response(str(e), 500)), 500
+
+
+@api_v1_bp.route("/metrics/auth", methods=["GET"])
+@require_admin
+def auth_metrics():
+    """认证耗时统计（仅管理员，需开启 AUTH_PROFILE_ENABLED）"""
+    return jsonify(get_response(get_auth_metrics())), 200
@@ -2,9 +2,9 @@
 
 import json
 import os
-from flask import request, jsonify, g
+from flask import request, jsonify
 from app.api import api_v1_bp, get_response, get_error_response
-from app.api.decorators import require_user_auth, require_simulation_owner
+from app.api.decorators import require_user_auth, require_simulation_owner, get_current_user_project_ids
 from app.utils import get_logger, validate_api_request
 from app.modules.report import ReportGenerator
 from app.services.simulation_manager import SimulationManager
@@ -150,7 +150,6 @@ def _convert_action_type(action_type: str) -> str:
 
 
 @api_v1_bp.route("/report/generate", methods=["POST"])
-@require_user_auth
 @require_simulation_owner("simulation_id")
 def generate_report():
     """生成报告"""
@@ -234,7 +233,6 @@ def generate_report():
 
 
 @api_v1_bp.route("/report/<simulation_id>", methods=["GET"])
-@require_user_auth
 @require_simulation_owner("simulation_id")
 def get_report(simulation_id: str):
     """获取报告"""
@@ -349,7 +347,6 @@ def _get_report_id_for_simulation(simulation_id: str) -> str:
 
 
 @api_v1_bp.route("/report/<simulation_id>/download", methods=["GET"])
-@require_user_auth
 @require_simulation_owner("simulation_id")
 def download_report(simulation_id: str):
     """下载报告文件"""
@@ -421,7 +418,7 @@ def list_reports():
     """列出当前用户的报告（仅归属为当前用户项目的模拟下的报告）"""
     try:
         logger.info("接收到列出报告请求")
-        user_project_ids = set(ProjectManager._get_storage().list_project_ids_by_user(g.current_user["id"]))
+        user_project_ids = get_current_user_project_ids()
         sim_manager = SimulationManager()
         reports = []
         simulations_dir = sim_manager.SIMULATION_DATA_DIR
@@ -12,7 +12,7 @@ from flask import request, jsonify, g
 from app.api import api_v1_bp, get_response, get_error_response, ErrorCode
 from app.api.decorators import require_user_auth, validate_json_body
 from app.config_new import get_config
-from app.storage.database import SQLiteStorage
+from app.storage.database import SQLiteStorage, get_sqlite_storage
 from app.utils.logger import get_logger
 
 logger = get_logger(__name__)
@@ -50,7 +50,7 @@ def _generate_token(user_id: int, username: str, role: str) -> str:
 def _get_storage() -> SQLiteStorage:
     """获取数据库存储实例"""
     config = get_config()
-    return SQLiteStorage(config.TASKS_DATABASE_PATH)
+    return get_sqlite_storage(config.TASKS_DATABASE_PATH)
 
 
 @api_v1_bp.route("/auth/register", methods=["POST"])
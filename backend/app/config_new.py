@@ -95,6 +95,7 @@ class AppConfig(BaseSettings):
     LOG_DIR: str = str(backend_root / "logs")
     LOG_FILE_ROTATION_SIZE: int = 10 * 1024 * 1024  # 10MB
     LOG_FILE_BACKUP_COUNT: int = 5
+    EXC_INFO_SAMPLE_RATE: float = 0.1  # 生产环境错误日志附带堆栈的采样比例（DEBUG 模式始终附带）
     
     # CORS 配置
     CORS_ORIGINS: list = ["http://localhost:3000", "http://localhost:3001", "http://127.0.0.1:3000", "http://127.0.0.1:3001"]
@@ -117,6 +118,7 @@ class AppConfig(BaseSettings):
     JWT_EXPIRATION_HOURS: int = 168  # Token 有效期（小时），默认 7 天
     JWT_ALGORITHM: str = "HS256"  # JWT 签名算法
     INVITATION_CODE_LENGTH: int = 8  # 邀请码长度
+    AUTH_PROFILE_ENABLED: bool = False  # 是否统计认证各阶段耗时（管理员通过 /api/v1/metrics/auth 查看）
     
     # 请求签名配置（用于高安全场景）
     SIGNATURE_ENABLED: bool = False  # 是否启用请求签名验证
@@ -127,7 +129,8 @@ class AppConfig(BaseSettings):
     RATE_LIMIT_ENABLED: bool = True  # 是否启用请求限流
     RATE_LIMIT_STORAGE: str = "memory"  # 限流存储类型（memory/redis）
     RATE_LIMIT_REDIS_URL: Optional[str] = None  # Redis 连接 URL（可选）
-    RATE_LIMIT_STRATEGY: str = "moving-window"  # 限流策略
+    RATE_LIMIT_STRATEGY: str = "fixed-window"  # 限流策略（fixed-window 每次请求仅一次 INCR，开销最低）
+    RATE_LIMIT_REDIS_MAX_CONNECTIONS: int = 50  # Redis 连接池大小
     
     # 限流策略配置
     RATE_LIMIT_DEFAULT: str = "200/hour"  # 默认限流策略
@@ -144,6 +147,11 @@ class AppConfig(BaseSettings):
     REFERRER_POLICY: str = "strict-origin-when-cross-origin"
     CONTENT_SECURITY_POLICY: str = "default-src 'self'; script-src 'self'; style-src 'self' 'unsafe-inline'; img-src 'self' data:; connect-src 'self' https://api.openai.com https://*.openai.azure.com;"
     
+    # 响应压缩配置
+    RESPONSE_COMPRESSION_ENABLED: bool = True  # 是否对较大的 JSON 响应启用 gzip 压缩
+    COMPRESS_MIN_SIZE: int = 1024  # 启用压缩的最小响应体字节数
+    COMPRESS_LEVEL: int = 6  # gzip 压缩级别（1-9）
+    
     class Config:
         """Pydantic 配置"""
         env_file = str(env_file)
@@ -303,6 +311,7 @@ class AppConfig(BaseSettings):
             "storage": self.RATE_LIMIT_STORAGE,
             "redis_url": self.RATE_LIMIT_REDIS_URL,
             "strategy": self.RATE_LIMIT_STRATEGY,
+            "redis_max_connections": self.RATE_LIMIT_REDIS_MAX_CONNECTIONS,
             "default": self.RATE_LIMIT_DEFAULT,
             "upload": self.RATE_LIMIT_UPLOAD,
             "query": self.RATE_LIMIT_QUERY,
@@ -326,6 +335,8 @@ config = AppConfig()
 def get_config() -> AppConfig:
     """获取全局配置实例
     
+    实例在模块导入时创建且仅创建一次，调用方无需自行缓存。
+    
     Returns:
         配置实例
     """
@@ -23,7 +23,7 @@ class ProjectStatus(str, Enum):
     FAILED = "failed"                # 失败
 
 
-@dataclass
+@dataclass(slots=True)
 class Project:
     """项目数据模型"""
     project_id: str
@@ -109,8 +109,8 @@ class ProjectManager:
 
     @classmethod
     def _get_storage(cls):
-        from ..storage.database import SQLiteStorage
-        return SQLiteStorage(get_config().TASKS_DATABASE_PATH)
+        from ..storage.database import get_sqlite_storage
+        return get_sqlite_storage(get_config().TASKS_DATABASE_PATH)
 
     @classmethod
     def _ensure_projects_dir(cls):
@@ -8,10 +8,10 @@ import threading
 import json
 from datetime import datetime
 from enum import Enum
-from typing import Dict, Any, Optional
+from typing import Dict, Any, Collection, List, Optional
 from dataclasses import dataclass, field, asdict
 
-from app.storage.database import SQLiteStorage
+from app.storage.database import SQLiteStorage, get_sqlite_storage
 from app.config_new import get_config
 
 
@@ -23,7 +23,23 @@ class TaskStatus(str, Enum):
     FAILED = "failed"            # 失败
 
 
-@dataclass
+# 进行中的任务状态
+_ACTIVE_STATUSES = (TaskStatus.PENDING, TaskStatus.PROCESSING)
+_ACTIVE_STATUS_VALUES = [status.value for status in _ACTIVE_STATUSES]
+
+
+def snapshot_active_task_ids() -> frozenset:
+    """
+    读取数据库中进行中（pending 或 processing）任务的 ID
+
+    服务启动时在处理请求前调用，得到上次运行中断的任务；
+    只执行一次索引查询，不构建 TaskManager 的任务缓存。
+    """
+    storage = get_sqlite_storage(get_config().TASKS_DATABASE_PATH)
+    return frozenset(storage.list_task_ids_by_status(_ACTIVE_STATUS_VALUES))
+
+
+@dataclass(slots=True)
 class Task:
     """任务数据类"""
     task_id: str
@@ -124,19 +140,19 @@ class TaskManager:
             if isinstance(task_dict.get("result"), str):
                 try:
                     task_dict["result"] = json.loads(task_dict["result"])
-                except:
+                except (TypeError, ValueError):
                     task_dict["result"] = None
             
             if isinstance(task_dict.get("metadata"), str):
                 try:
                     task_dict["metadata"] = json.loads(task_dict["metadata"])
-                except:
+                except (TypeError, ValueError):
                     task_dict["metadata"] = {}
             
             if isinstance(task_dict.get("progress_detail"), str):
                 try:
                     task_dict["progress_detail"] = json.loads(task_dict["progress_detail"])
-                except:
+                except (TypeError, ValueError):
                     task_dict["progress_detail"] = {}
             
             if isinstance(task_dict.get("status"), str):
@@ -189,6 +205,8 @@ class TaskManager:
             user_id=user_id,
         )
         task_dict = self._task_to_dict(task)
+        # simulation_id 单独落列，供 find_active_task_by_simulation 走索引查询
+        task_dict["simulation_id"] = task.metadata.get("simulation_id")
         with self._task_lock:
             self._cache[task_id] = task
             self._storage.store_task(task_dict)
@@ -254,6 +272,7 @@ class TaskManager:
                 task_dict.pop('updated_at', None)  # 数据库自动更新
                 task_dict.pop('created_at', None)  # 创建时间不应被更新
                 task_dict.pop('task_type', None)   # 任务类型不应被更新
+                task_dict.pop('user_id', None)     # 归属用户不应被更新（不在存储层白名单内，传入会导致整条更新失败）
                 self._storage.update_task(task_id, **task_dict)
     
     def complete_task(self, task_id: str, result: Dict):
@@ -279,11 +298,16 @@ class TaskManager:
         self,
         task_type: Optional[str] = None,
         user_id: Optional[int] = None,
+        statuses: Optional[List[TaskStatus]] = None,
     ) -> list:
-        """列出任务。user_id 不为 None 时仅返回该用户的任务（从 DB 过滤）。"""
+        """
+        列出任务。user_id 不为 None 时仅返回该用户的任务（从 DB 过滤）。
+        statuses 不为空时仅返回这些状态的任务（同样在 DB 中过滤）。
+        """
         if user_id is not None:
             task_dicts = self._storage.list_tasks(
-                task_type=task_type, user_id=user_id, limit=1000
+                task_type=task_type, user_id=user_id, limit=1000,
+                statuses=[TaskStatus(s).value for s in statuses] if statuses else None
             )
             out = []
             for d in task_dicts:
@@ -299,6 +323,8 @@ class TaskManager:
                 ]
             else:
                 filtered_tasks = list(self._cache.values())
+            if statuses:
+                filtered_tasks = [t for t in filtered_tasks if t.status in statuses]
             return [
                 t.to_dict()
                 for t in sorted(
@@ -308,6 +334,33 @@ class TaskManager:
                 )
             ]
     
+    def find_active_task_by_simulation(
+        self,
+        simulation_id: str,
+        task_type: str,
+        user_id: Optional[int] = None,
+    ) -> Optional[Task]:
+        """
+        查找模拟对应的进行中（pending 或 processing）任务
+
+        Args:
+            simulation_id: 模拟 ID
+            task_type: 任务类型
+            user_id: 归属用户 ID；不为 None 时仅查找该用户的任务
+
+        Returns:
+            最新的进行中任务，不存在返回 None
+        """
+        task_ids = self._storage.list_task_ids_by_simulation(
+            task_type, simulation_id, user_id=user_id, statuses=_ACTIVE_STATUS_VALUES
+        )
+        for task_id in task_ids:
+            task = self.get_task(task_id)
+            # 任务状态以内存中的最新状态为准
+            if task and task.status in _ACTIVE_STATUSES:
+                return task
+        return None
+    
     def cleanup_old_tasks(self, max_age_hours: int = 24):
         """清理旧任务"""
         from datetime import timedelta
@@ -322,10 +375,24 @@ class TaskManager:
                 del self._cache[tid]
                 self._storage.delete_task(tid)
     
-    def recover_tasks(self):
-        """恢复未完成的任务（服务重启后调用）"""
+    def recover_tasks(self, task_ids: Optional[Collection[str]] = None):
+        """
+        恢复未完成的任务（服务重启后调用）
+
+        Args:
+            task_ids: 仅处理这些任务（启动时快照的中断任务，见 snapshot_active_task_ids）；
+                      为 None 时处理缓存中所有进行中的任务
+        """
+        if task_ids is not None:
+            # 确保快照中的任务已加载到缓存（启动时只预加载最近的任务）
+            for task_id in task_ids:
+                self.get_task(task_id)
         with self._task_lock:
-            for task in list(self._cache.values()):
+            if task_ids is None:
+                tasks = list(self._cache.values())
+            else:
+                tasks = [self._cache[task_id] for task_id in task_ids if task_id in self._cache]
+            for task in tasks:
                 if task.status in [TaskStatus.PENDING, TaskStatus.PROCESSING]:
                     task.status = TaskStatus.FAILED
                     task.error = "任务因服务重启而中断"
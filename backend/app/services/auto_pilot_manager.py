@@ -967,3 +967,17 @@ class AutoPilotManager:
             "retry_count": state.retry_count,
             "available": True
         }
+
+
+# 全局单例
+_manager_instance = None
+_manager_lock = threading.Lock()
+
+def get_auto_pilot_manager() -> AutoPilotManager:
+    """获取自动驾驶管理器单例（各请求共享状态缓存与运行中的线程表）"""
+    global _manager_instance
+    if _manager_instance is None:
+        with _manager_lock:
+            if _manager_instance is None:
+                _manager_instance = AutoPilotManager()
+    return _manager_instance
@@ -8,19 +8,84 @@
 """
 
 import os
+import gzip
 import json
+import mmap
 import re
 import shutil
-from typing import Dict, Any, List, Optional
+import threading
+from typing import Dict, Any, Collection, Iterator, List, Optional, Tuple
 from datetime import datetime
 
 from ...config_new import get_config
+from ...utils.cache import TTLCache
 from ...utils.logger import get_logger
 from .models import ReportStatus, ReportSection, ReportOutline, Report
 
 logger = get_logger('multimo.report.manager')
 
 
+# 报告 -> 模拟ID 缓存（报告创建后归属不变，供日志/章节轮询的归属校验使用，避免反复解析 meta.json）
+_REPORT_SIMULATION_CACHE_TTL = 300
+_report_simulation_cache = TTLCache(maxsize=4096, ttl=_REPORT_SIMULATION_CACHE_TTL)
+
+# 状态轮询短缓存：前端每 1-3 秒轮询，多标签页/多用户轮询同一报告时共享一次读取；
+# 本进程内写入时主动失效，TTL 只兜底其他进程的写入
+_STATUS_POLL_CACHE_TTL = 0.5
+_status_poll_cache = TTLCache(maxsize=4096, ttl=_STATUS_POLL_CACHE_TTL)
+_MISSING = object()
+
+
+# 日志文件超过该大小时使用 mmap 读取，在映射上直接查找换行符跳过 from_line 之前的行
+_MMAP_MIN_SIZE = 64 * 1024
+
+
+def _split_lines_from(buf, from_line: int) -> Tuple[List[str], int]:
+    """从 buf（bytes 或 mmap）中取出第 from_line 行起的各行，返回 (行列表, 总行数)"""
+    end = len(buf)
+    offset = 0
+    skipped = 0
+    while skipped < from_line and offset < end:
+        pos = buf.find(b'\n', offset)
+        skipped += 1
+        offset = end if pos == -1 else pos + 1
+    
+    if offset >= end:
+        return [], skipped
+    
+    lines = buf[offset:].decode('utf-8').split('\n')
+    if lines[-1] == '':
+        lines.pop()
+    return lines, skipped + len(lines)
+
+
+def _read_lines_from(path: str, from_line: int) -> Tuple[List[str], int]:
+    """
+    读取文本文件第 from_line 行起的内容（不含换行符），返回 (行列表, 总行数)
+    
+    跳过的行只查找换行符、不解码；大文件通过 mmap 读取，不复制整个文件
+    """
+    with open(path, 'rb') as f:
+        size = os.fstat(f.fileno()).st_size
+        if size == 0:
+            return [], 0
+        if size >= _MMAP_MIN_SIZE:
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as buf:
+                return _split_lines_from(buf, from_line)
+        return _split_lines_from(f.read(), from_line)
+
+
+def _atomic_write(path: str, data: bytes) -> None:
+    """先写临时文件再 os.replace，并发读取不会读到半写文件"""
+    tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+    try:
+        with open(tmp_path, 'wb') as f:
+            f.write(data)
+        os.replace(tmp_path, path)
+    finally:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+
 class ReportManager:
     """
     报告管理器
@@ -69,6 +134,20 @@ class ReportManager:
         """获取完整报告Markdown文件路径"""
         return os.path.join(cls._get_report_folder(report_id), "full_report.md")
     
+    @classmethod
+    def _get_report_markdown_gz_path(cls, report_id: str) -> str:
+        """获取完整报告的 gzip 副本路径（下载时直接以 Content-Encoding: gzip 发送）"""
+        return cls._get_report_markdown_path(report_id) + ".gz"
+    
+    @classmethod
+    def _write_full_markdown(cls, report_id: str, markdown_content: str) -> str:
+        """原子写入 full_report.md 及其 gzip 副本，返回 Markdown 文件路径"""
+        md_path = cls._get_report_markdown_path(report_id)
+        data = markdown_content.encode('utf-8')
+        _atomic_write(md_path, data)
+        _atomic_write(cls._get_report_markdown_gz_path(report_id), gzip.compress(data, compresslevel=6))
+        return md_path
+    
     @classmethod
     def _get_outline_path(cls, report_id: str) -> str:
         """获取大纲文件路径"""
@@ -124,15 +203,9 @@ class ReportManager:
                 "has_more": False
             }
         
-        logs = []
-        total_lines = 0
-        
-        with open(log_path, 'r', encoding='utf-8') as f:
-            for i, line in enumerate(f):
-                total_lines = i + 1
-                if i >= from_line:
-                    # 保留原始日志行，去掉末尾换行符
-                    logs.append(line.rstrip('\n\r'))
+        lines, total_lines = _read_lines_from(log_path, from_line)
+        # 保留原始日志行，去掉末尾换行符
+        logs = [line.rstrip('\r') for line in lines]
         
         return {
             "logs": logs,
@@ -141,6 +214,28 @@ class ReportManager:
             "has_more": False  # 已读取到末尾
         }
     
+    @classmethod
+    def iter_console_log(cls, report_id: str, from_line: int = 0) -> Iterator[str]:
+        """
+        逐行读取控制台日志（用于流式输出，内存占用与日志大小无关）
+        
+        Args:
+            report_id: 报告ID
+            from_line: 从第几行开始读取
+            
+        Yields:
+            日志行（去掉末尾换行符）
+        """
+        log_path = cls._get_console_log_path(report_id)
+        
+        if not os.path.exists(log_path):
+            return
+        
+        with open(log_path, 'r', encoding='utf-8') as f:
+            for i, line in enumerate(f):
+                if i >= from_line:
+                    yield line.rstrip('\n\r')
+    
     @classmethod
     def get_console_log_stream(cls, report_id: str) -> List[str]:
         """
@@ -152,8 +247,7 @@ class ReportManager:
         Returns:
             日志行列表
         """
-        result = cls.get_console_log(report_id, from_line=0)
-        return result["logs"]
+        return list(cls.iter_console_log(report_id))
     
     @classmethod
     def get_agent_log(cls, report_id: str, from_line: int = 0) -> Dict[str, Any]:
@@ -182,19 +276,15 @@ class ReportManager:
                 "has_more": False
             }
         
-        logs = []
-        total_lines = 0
+        lines, total_lines = _read_lines_from(log_path, from_line)
         
-        with open(log_path, 'r', encoding='utf-8') as f:
-            for i, line in enumerate(f):
-                total_lines = i + 1
-                if i >= from_line:
-                    try:
-                        log_entry = json.loads(line.strip())
-                        logs.append(log_entry)
-                    except json.JSONDecodeError:
-                        # 跳过解析失败的行
-                        continue
+        logs = []
+        for line in lines:
+            try:
+                logs.append(json.loads(line.strip()))
+            except json.JSONDecodeError:
+                # 跳过解析失败的行
+                continue
         
         return {
             "logs": logs,
@@ -203,6 +293,32 @@ class ReportManager:
             "has_more": False  # 已读取到末尾
         }
     
+    @classmethod
+    def iter_agent_log(cls, report_id: str, from_line: int = 0) -> Iterator[Dict[str, Any]]:
+        """
+        逐行读取 Agent 日志（用于流式输出，内存占用与日志大小无关）
+        
+        Args:
+            report_id: 报告ID
+            from_line: 从第几行开始读取
+            
+        Yields:
+            日志条目（跳过解析失败的行）
+        """
+        log_path = cls._get_agent_log_path(report_id)
+        
+        if not os.path.exists(log_path):
+            return
+        
+        with open(log_path, 'r', encoding='utf-8') as f:
+            for i, line in enumerate(f):
+                if i < from_line:
+                    continue
+                try:
+                    yield json.loads(line.strip())
+                except json.JSONDecodeError:
+                    continue
+    
     @classmethod
     def get_agent_log_stream(cls, report_id: str) -> List[Dict[str, Any]]:
         """
@@ -214,8 +330,7 @@ class ReportManager:
         Returns:
             日志条目列表
         """
-        result = cls.get_agent_log(report_id, from_line=0)
-        return result["logs"]
+        return list(cls.iter_agent_log(report_id))
     
     @classmethod
     def save_outline(cls, report_id: str, outline: ReportOutline) -> None:
@@ -417,24 +532,33 @@ class ReportManager:
         
         with open(cls._get_progress_path(report_id), 'w', encoding='utf-8') as f:
             json.dump(progress_data, f, ensure_ascii=False, indent=2)
+        # 写入完成后再清除缓存，否则写入前到达的轮询会把旧进度重新缓存
+        _status_poll_cache.pop(("progress", report_id))
     
     @classmethod
     def get_progress(cls, report_id: str) -> Optional[Dict[str, Any]]:
-        """获取报告生成进度"""
+        """获取报告生成进度（短时缓存，见 _STATUS_POLL_CACHE_TTL）"""
+        key = ("progress", report_id)
+        progress = _status_poll_cache.get(key, _MISSING)
+        if progress is not _MISSING:
+            return progress
+        
         path = cls._get_progress_path(report_id)
         
-        if not os.path.exists(path):
-            return None
+        progress = None
+        if os.path.exists(path):
+            with open(path, 'r', encoding='utf-8') as f:
+                progress = json.load(f)
         
-        with open(path, 'r', encoding='utf-8') as f:
-            return json.load(f)
+        _status_poll_cache.set(key, progress)
+        return progress
     
     @classmethod
-    def get_generated_sections(cls, report_id: str) -> List[Dict[str, Any]]:
+    def list_section_files(cls, report_id: str) -> List[Dict[str, Any]]:
         """
-        获取已生成的章节列表
+        列出已生成的章节文件（不读取内容）
         
-        返回所有已保存的章节文件信息
+        只读取目录项与修改时间，供状态轮询判断章节是否有更新
         """
         folder = cls._get_report_folder(report_id)
         
@@ -442,11 +566,11 @@ class ReportManager:
             return []
         
         sections = []
-        for filename in sorted(os.listdir(folder)):
-            if filename.startswith('section_') and filename.endswith('.md'):
-                file_path = os.path.join(folder, filename)
-                with open(file_path, 'r', encoding='utf-8') as f:
-                    content = f.read()
+        with os.scandir(folder) as entries:
+            for entry in entries:
+                filename = entry.name
+                if not (filename.startswith('section_') and filename.endswith('.md')):
+                    continue
                 
                 # 从文件名解析章节索引
                 parts = filename.replace('.md', '').split('_')
@@ -457,10 +581,35 @@ class ReportManager:
                     "filename": filename,
                     "section_index": section_index,
                     "subsection_index": subsection_index,
-                    "content": content,
-                    "is_subsection": subsection_index is not None
+                    "is_subsection": subsection_index is not None,
+                    "updated_at": datetime.fromtimestamp(entry.stat().st_mtime).isoformat()
                 })
         
+        sections.sort(key=lambda section: section["filename"])
+        return sections
+    
+    @classmethod
+    def get_generated_sections(cls, report_id: str) -> List[Dict[str, Any]]:
+        """
+        获取已生成的章节列表
+        
+        返回所有已保存的章节文件信息
+        """
+        folder = cls._get_report_folder(report_id)
+        
+        sections = []
+        for section_file in cls.list_section_files(report_id):
+            with open(os.path.join(folder, section_file["filename"]), 'r', encoding='utf-8') as f:
+                content = f.read()
+            
+            sections.append({
+                "filename": section_file["filename"],
+                "section_index": section_file["section_index"],
+                "subsection_index": section_file["subsection_index"],
+                "content": content,
+                "is_subsection": section_file["is_subsection"]
+            })
+        
         return sections
     
     @classmethod
@@ -489,9 +638,7 @@ class ReportManager:
         md_content = cls._post_process_report(md_content, outline)
         
         # 保存完整报告
-        full_path = cls._get_report_markdown_path(report_id)
-        with open(full_path, 'w', encoding='utf-8') as f:
-            f.write(md_content)
+        cls._write_full_markdown(report_id, md_content)
         
         logger.info(f"完整报告已组装: {report_id}")
         return md_content
@@ -637,11 +784,60 @@ class ReportManager:
         
         # 保存完整Markdown报告
         if report.markdown_content:
-            with open(cls._get_report_markdown_path(report.report_id), 'w', encoding='utf-8') as f:
-                f.write(report.markdown_content)
+            cls._write_full_markdown(report.report_id, report.markdown_content)
+        
+        # 文件全部写入后再清除缓存，避免写入期间的轮询重新缓存旧报告
+        _status_poll_cache.pop(("by_simulation", report.simulation_id))
         
         logger.info(f"报告已保存: {report.report_id}")
     
+    @classmethod
+    def materialize_markdown(cls, report_id: str, markdown_content: str) -> str:
+        """
+        将完整报告写入 full_report.md（及 gzip 副本）并返回路径（兼容旧格式报告，供下载直接发送文件）
+        """
+        cls._ensure_report_folder(report_id)
+        return cls._write_full_markdown(report_id, markdown_content)
+    
+    @classmethod
+    def get_markdown_gz_path(cls, report_id: str) -> Optional[str]:
+        """
+        获取与 full_report.md 一致的 gzip 副本路径
+        
+        副本不存在或早于 Markdown 文件（被其他途径改写过）时返回 None
+        """
+        gz_path = cls._get_report_markdown_gz_path(report_id)
+        try:
+            if os.stat(gz_path).st_mtime >= os.stat(cls._get_report_markdown_path(report_id)).st_mtime:
+                return gz_path
+        except FileNotFoundError:
+            pass
+        return None
+    
+    @classmethod
+    def get_report_simulation_id(cls, report_id: str) -> Optional[str]:
+        """
+        获取报告关联的模拟ID（带缓存，不重建 Report 对象）
+        
+        Returns:
+            模拟ID；报告不存在返回 None；报告未记录模拟ID返回空字符串
+        """
+        simulation_id = _report_simulation_cache.get(report_id)
+        if simulation_id is not None:
+            return simulation_id
+        
+        path = cls._get_report_path(report_id)
+        if not os.path.exists(path):
+            path = os.path.join(cls.REPORTS_DIR, f"{report_id}.json")
+            if not os.path.exists(path):
+                return None
+        
+        with open(path, 'r', encoding='utf-8') as f:
+            simulation_id = json.load(f).get('simulation_id') or ""
+        
+        _report_simulation_cache.set(report_id, simulation_id)
+        return simulation_id
+    
     @classmethod
     def get_report(cls, report_id: str) -> Optional[Report]:
         """获取报告"""
@@ -702,28 +898,53 @@ class ReportManager:
     
     @classmethod
     def get_report_by_simulation(cls, simulation_id: str) -> Optional[Report]:
-        """根据模拟ID获取报告"""
+        """
+        根据模拟ID获取报告（短时缓存，见 _STATUS_POLL_CACHE_TTL）
+        
+        扫描时只比对缓存的报告归属，仅对命中的报告加载完整内容
+        """
+        key = ("by_simulation", simulation_id)
+        report = _status_poll_cache.get(key, _MISSING)
+        if report is not _MISSING:
+            return report
+        
         cls._ensure_reports_dir()
         
+        report = None
         for item in os.listdir(cls.REPORTS_DIR):
             item_path = os.path.join(cls.REPORTS_DIR, item)
             # 新格式：文件夹
             if os.path.isdir(item_path):
-                report = cls.get_report(item)
-                if report and report.simulation_id == simulation_id:
-                    return report
+                report_id = item
             # 兼容旧格式：JSON文件
             elif item.endswith('.json'):
                 report_id = item[:-5]
+            else:
+                continue
+            
+            if cls.get_report_simulation_id(report_id) == simulation_id:
                 report = cls.get_report(report_id)
-                if report and report.simulation_id == simulation_id:
-                    return report
+                if report:
+                    break
         
-        return None
+        _status_poll_cache.set(key, report)
+        return report
     
     @classmethod
-    def list_reports(cls, simulation_id: Optional[str] = None, limit: int = 50) -> List[Report]:
-        """列出报告"""
+    def list_reports(
+        cls,
+        simulation_id: Optional[str] = None,
+        limit: int = 50,
+        project_ids: Optional[Collection[str]] = None
+    ) -> List[Report]:
+        """
+        列出报告
+        
+        Args:
+            simulation_id: 按模拟ID过滤（可选）
+            limit: 返回数量限制
+            project_ids: 仅返回这些项目下模拟的报告（可选）；在截断前过滤，保证返回数量
+        """
         cls._ensure_reports_dir()
         
         reports = []
@@ -743,14 +964,42 @@ class ReportManager:
                     if simulation_id is None or report.simulation_id == simulation_id:
                         reports.append(report)
         
+        if project_ids is not None:
+            reports = cls._filter_reports_by_projects(reports, project_ids)
+        
         # 按创建时间倒序
         reports.sort(key=lambda r: r.created_at, reverse=True)
         
         return reports[:limit]
     
+    @classmethod
+    def _filter_reports_by_projects(cls, reports: List[Report], project_ids: Collection[str]) -> List[Report]:
+        """保留归属于给定项目的模拟下的报告（report -> simulation -> project）"""
+        from ..simulation_manager import SimulationManager
+        
+        if not project_ids:
+            return []
+        
+        sim_project_ids = SimulationManager().get_simulation_project_ids(
+            [r.simulation_id for r in reports if r.simulation_id]
+        )
+        return [r for r in reports if sim_project_ids.get(r.simulation_id) in project_ids]
+    
     @classmethod
     def delete_report(cls, report_id: str) -> bool:
         """删除报告（整个文件夹）"""
+        simulation_id = _report_simulation_cache.pop(report_id)
+        try:
+            return cls._delete_report_files(report_id)
+        finally:
+            # 文件删除后再清除缓存，避免删除期间的轮询重新缓存旧状态
+            if simulation_id:
+                _status_poll_cache.pop(("by_simulation", simulation_id))
+            _status_poll_cache.pop(("progress", report_id))
+    
+    @classmethod
+    def _delete_report_files(cls, report_id: str) -> bool:
+        """删除报告文件夹，或旧格式的单独文件"""
         folder_path = cls._get_report_folder(report_id)
         
         # 新格式：删除整个文件夹
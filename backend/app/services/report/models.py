@@ -112,7 +112,7 @@ class ReportOutline:
         )
 
 
-@dataclass
+@dataclass(slots=True)
 class Report:
     """
     完整报告数据类
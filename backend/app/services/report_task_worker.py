@@ -23,7 +23,7 @@ import time
 import signal
 import multiprocessing
 from datetime import datetime
-from typing import Dict, Any, Optional, List
+from typing import Dict, Any, Collection, Optional, List
 from dataclasses import dataclass, asdict
 
 from ..utils.logger import get_logger
@@ -302,13 +302,17 @@ class ReportTaskWorker:
             return task.to_dict()
         return None
     
-    def recover_interrupted_tasks(self) -> List[str]:
+    def recover_interrupted_tasks(self, task_ids: Optional[Collection[str]] = None) -> List[str]:
         """
         恢复中断的任务
         
         在服务启动时调用，检查所有处于 pending/processing 状态的报告任务，
         并尝试恢复它们。
         
+        Args:
+            task_ids: 仅处理这些任务（启动时快照的中断任务）；为 None 时处理全部，
+                      传入快照可避免重新启动服务启动后由请求新建的任务
+        
         Returns:
             恢复的任务ID列表
         """
@@ -320,6 +324,9 @@ class ReportTaskWorker:
             task_id = task_dict.get("task_id")
             status = task_dict.get("status")
             
+            if task_ids is not None and task_id not in task_ids:
+                continue
+            
             if status in ["pending", "processing"]:
                 metadata = task_dict.get("metadata", {})
                 checkpoint_data = metadata.get("checkpoint") or task_dict.get("progress_detail", {}).get("checkpoint")
@@ -520,6 +520,76 @@ class SimulationManager:
         """获取模拟状态"""
         return self._load_simulation_state(simulation_id)
     
+    def update_fields(self, simulation_id: str, **fields: Any) -> Optional[SimulationState]:
+        """
+        批量更新模拟状态字段并写入一次文件
+        
+        Args:
+            simulation_id: 模拟ID
+            **fields: SimulationState 字段名及新值
+            
+        Returns:
+            更新后的模拟状态，模拟不存在时返回 None
+        """
+        with self._lock:
+            state = self._load_simulation_state(simulation_id)
+            if not state:
+                return None
+            
+            for name, value in fields.items():
+                if not hasattr(state, name):
+                    raise AttributeError(f"SimulationState 没有字段: {name}")
+                setattr(state, name, value)
+            
+            self._save_simulation_state(state)
+            return state
+    
+    def get_simulation_project_id(self, simulation_id: str) -> Optional[str]:
+        """
+        获取模拟所属的项目 ID（供归属校验使用）
+        
+        只读取 state.json 中的 project_id，不构造完整的 SimulationState，
+        也不会为不存在的模拟创建目录。
+        
+        Returns:
+            项目 ID，模拟不存在返回 None
+        """
+        with self._lock:
+            state = self._simulations.get(simulation_id)
+        if state is not None:
+            return state.project_id
+        
+        state_file = os.path.join(self.SIMULATION_DATA_DIR, simulation_id, "state.json")
+        try:
+            with open(state_file, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+        except FileNotFoundError:
+            return None
+        except (IOError, json.JSONDecodeError) as e:
+            logger.error(f"Failed to load simulation state: {e}")
+            return None
+        
+        return data.get("project_id", "")
+    
+    def get_simulation_project_ids(self, simulation_ids: List[str]) -> Dict[str, str]:
+        """
+        批量获取模拟所属的项目 ID
+        
+        重复的模拟 ID 只读取一次；不存在的模拟不出现在结果中。
+        
+        Args:
+            simulation_ids: 模拟 ID 列表
+        
+        Returns:
+            {simulation_id: project_id}
+        """
+        project_ids = {}
+        for simulation_id in dict.fromkeys(simulation_ids):
+            project_id = self.get_simulation_project_id(simulation_id)
+            if project_id is not None:
+                project_ids[simulation_id] = project_id
+        return project_ids
+    
     def list_simulations(self, project_id: Optional[str] = None) -> List[SimulationState]:
         """列出所有模拟"""
         simulations = []
@@ -1,10 +1,11 @@
 # 存储层模块
 from .memory import MemoryStorage, InMemoryStorage
-from .database import DatabaseStorage, SQLiteStorage
+from .database import DatabaseStorage, SQLiteStorage, get_sqlite_storage
 
 __all__ = [
     "MemoryStorage",
     "InMemoryStorage",
     "DatabaseStorage",
-    "SQLiteStorage"
+    "SQLiteStorage",
+    "get_sqlite_storage"
 ]
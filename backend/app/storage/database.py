@@ -7,6 +7,7 @@ from typing import Dict, Any, List, Optional
 from contextlib import contextmanager
 from datetime import datetime
 from app.core.interfaces import MemoryStorage
+from app.utils.cache import invalidate_user_cache
 
 
 class DatabaseStorage(MemoryStorage):
@@ -202,14 +203,50 @@ class SQLiteStorage(DatabaseStorage):
             CREATE INDEX IF NOT EXISTS idx_projects_user_id ON projects(user_id)
         """)
 
-        # tasks 表增加 user_id 列（迁移：已存在则跳过）
+        # tasks 表增加 user_id / simulation_id 列（迁移：已存在则跳过）
+        # 每个迁移步骤单独捕获异常，某一步失败不影响后续的列和索引
+        cursor = conn.execute("PRAGMA table_info(tasks)")
+        columns = [row[1] for row in cursor.fetchall()]
         try:
-            cursor = conn.execute("PRAGMA table_info(tasks)")
-            columns = [row[1] for row in cursor.fetchall()]
             if 'user_id' not in columns:
                 conn.execute("ALTER TABLE tasks ADD COLUMN user_id INTEGER")
-        except Exception:
-            pass
+        except Exception as e:
+            print(f"Error adding tasks.user_id column: {e}")
+        # 旧任务的归属只记录在 metadata 中，回填到 user_id 列
+        # 回填失败时鉴权仍会回退读取 metadata 中的 user_id
+        try:
+            conn.execute("""
+                UPDATE tasks SET user_id = json_extract(metadata, '$.user_id')
+                WHERE user_id IS NULL AND metadata IS NOT NULL AND json_valid(metadata)
+                  AND json_extract(metadata, '$.user_id') IS NOT NULL
+            """)
+        except Exception as e:
+            print(f"Error backfilling tasks.user_id from metadata: {e}")
+        # tasks 表增加 simulation_id 列，按模拟查找任务时走索引而不是解析 metadata
+        if 'simulation_id' not in columns:
+            try:
+                conn.execute("ALTER TABLE tasks ADD COLUMN simulation_id TEXT")
+                conn.execute("""
+                    UPDATE tasks SET simulation_id = json_extract(metadata, '$.simulation_id')
+                    WHERE metadata IS NOT NULL AND json_valid(metadata)
+                """)
+            except Exception as e:
+                print(f"Error migrating tasks.simulation_id column: {e}")
+        try:
+            conn.execute("""
+                CREATE INDEX IF NOT EXISTS idx_tasks_type_simulation
+                ON tasks(task_type, simulation_id)
+            """)
+        except Exception as e:
+            print(f"Error creating index idx_tasks_type_simulation: {e}")
+        # 按用户查找进行中任务：user_id + task_type + status 组合索引
+        try:
+            conn.execute("""
+                CREATE INDEX IF NOT EXISTS idx_tasks_user_type_status
+                ON tasks(user_id, task_type, status)
+            """)
+        except Exception as e:
+            print(f"Error creating index idx_tasks_user_type_status: {e}")
 
         conn.commit()
     
@@ -400,8 +437,9 @@ class SQLiteStorage(DatabaseStorage):
                 conn.execute("""
                     INSERT OR REPLACE INTO tasks 
                     (task_id, task_type, status, created_at, updated_at,
-                     progress, message, result, error, metadata, progress_detail, user_id)
-                    VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+                     progress, message, result, error, metadata, progress_detail, user_id,
+                     simulation_id)
+                    VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
                 """, (
                     task_data.get("task_id"),
                     task_data.get("task_type"),
@@ -415,6 +453,7 @@ class SQLiteStorage(DatabaseStorage):
                     serialize_value(task_data.get("metadata")),
                     serialize_value(task_data.get("progress_detail")),
                     task_data.get("user_id"),
+                    task_data.get("simulation_id"),
                 ))
                 conn.commit()
                 return True
@@ -442,8 +481,9 @@ class SQLiteStorage(DatabaseStorage):
     def list_tasks(self, task_type: Optional[str] = None,
                    status: Optional[str] = None,
                    user_id: Optional[int] = None,
-                   limit: int = 100) -> List[Dict[str, Any]]:
-        """列出任务。user_id 不为 None 时仅返回该用户的任务。"""
+                   limit: int = 100,
+                   statuses: Optional[List[str]] = None) -> List[Dict[str, Any]]:
+        """列出任务。user_id 不为 None 时仅返回该用户的任务；statuses 限定多个状态。"""
         try:
             results = []
             with self.get_connection() as conn:
@@ -455,6 +495,9 @@ class SQLiteStorage(DatabaseStorage):
                 if status:
                     query += " AND status = ?"
                     params.append(status)
+                if statuses:
+                    query += f" AND status IN ({', '.join('?' * len(statuses))})"
+                    params.extend(statuses)
                 if user_id is not None:
                     query += " AND (user_id IS NULL OR user_id = ?)"
                     params.append(user_id)
@@ -468,6 +511,41 @@ class SQLiteStorage(DatabaseStorage):
             print(f"Error listing tasks from database: {e}")
             return []
     
+    def list_task_ids_by_simulation(self, task_type: str, simulation_id: str,
+                                    user_id: Optional[int] = None,
+                                    statuses: Optional[List[str]] = None) -> List[str]:
+        """按模拟 ID 查找任务 ID（走 task_type + simulation_id 索引），按创建时间倒序。
+        user_id 不为 None 时仅返回该用户的任务；statuses 限定多个状态。"""
+        try:
+            with self.get_connection() as conn:
+                query = "SELECT task_id FROM tasks WHERE task_type = ? AND simulation_id = ?"
+                params = [task_type, simulation_id]
+                if user_id is not None:
+                    query += " AND (user_id IS NULL OR user_id = ?)"
+                    params.append(user_id)
+                if statuses:
+                    query += f" AND status IN ({', '.join('?' * len(statuses))})"
+                    params.extend(statuses)
+                query += " ORDER BY created_at DESC"
+                cursor = conn.execute(query, params)
+                return [row[0] for row in cursor.fetchall()]
+        except Exception as e:
+            print(f"Error listing tasks by simulation from database: {e}")
+            return []
+    
+    def list_task_ids_by_status(self, statuses: List[str]) -> List[str]:
+        """按状态查找任务 ID（走 status 索引），服务启动时用于快照中断的任务。"""
+        try:
+            with self.get_connection() as conn:
+                cursor = conn.execute(
+                    f"SELECT task_id FROM tasks WHERE status IN ({', '.join('?' * len(statuses))})",
+                    list(statuses)
+                )
+                return [row[0] for row in cursor.fetchall()]
+        except Exception as e:
+            print(f"Error listing tasks by status from database: {e}")
+            return []
+    
     # 允许更新的任务字段白名单（防止 SQL 注入）
     ALLOWED_TASK_FIELDS = {
         'status', 'progress', 'message', 'result', 
@@ -744,7 +822,9 @@ class SQLiteStorage(DatabaseStorage):
                     WHERE id = ?
                 """, values)
                 conn.commit()
-                return True
+            # 角色、启用状态变更后清除本进程的认证用户缓存
+            invalidate_user_cache(user_id)
+            return True
         except Exception as e:
             print(f"Error updating user: {e}")
             return False
@@ -948,4 +1028,31 @@ class SQLiteStorage(DatabaseStorage):
         注意：由于使用线程本地存储，此方法只能关闭当前线程的连接。
         其他线程的连接需要在各自线程中调用 close_connection()。
         """
-        self.close_connection()
\ No newline at end of file
+        self.close_connection()
+
+
+# 按数据库路径共享的 SQLiteStorage 实例
+_shared_storages: Dict[str, SQLiteStorage] = {}
+_shared_storages_lock = threading.Lock()
+
+
+def get_sqlite_storage(database_path: str) -> SQLiteStorage:
+    """获取指定路径共享的 SQLiteStorage 实例
+    
+    同一路径只初始化一次表结构，各线程复用自己的连接，
+    避免每次请求新建实例时重复建立连接和执行建表语句。
+    
+    Args:
+        database_path: 数据库文件路径
+        
+    Returns:
+        SQLiteStorage 实例
+    """
+    storage = _shared_storages.get(database_path)
+    if storage is None:
+        with _shared_storages_lock:
+            storage = _shared_storages.get(database_path)
+            if storage is None:
+                storage = SQLiteStorage(database_path)
+                _shared_storages[database_path] = storage
+    return storage
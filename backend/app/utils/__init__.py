@@ -1,5 +1,6 @@
 # 工具函数模块
 from .llm import LLMClient, create_llm_client_from_config
+from .cache import TTLCache
 from .logger import (
     get_logger,
     setup_file_logger,
@@ -31,6 +32,7 @@ from .validators import (
 __all__ = [
     "LLMClient",
     "create_llm_client_from_config",
+    "TTLCache",
     "get_logger",
     "setup_file_logger",
     "get_daily_logger",
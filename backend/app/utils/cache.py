@@ -0,0 +1,102 @@
+# 进程内缓存模块
+
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Hashable, Optional
+
+
+class TTLCache:
+    """带过期时间和容量上限的线程安全缓存
+
+    条目按写入顺序淘汰：超出容量时丢弃最早写入的条目。
+    读取时惰性清理已过期的条目。
+    """
+
+    def __init__(self, maxsize: int, ttl: float):
+        """初始化缓存
+
+        Args:
+            maxsize: 最大条目数
+            ttl: 默认过期时间（秒）
+        """
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._data: "OrderedDict[Hashable, tuple]" = OrderedDict()  # key -> (value, 过期时刻)
+        self._lock = threading.Lock()
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        """获取未过期的缓存值
+
+        Args:
+            key: 缓存键
+            default: 未命中时的返回值
+
+        Returns:
+            缓存值
+        """
+        entry = self._data.get(key)
+        if entry is None:
+            return default
+
+        value, expires_at = entry
+        if time.monotonic() >= expires_at:
+            with self._lock:
+                if self._data.get(key) is entry:
+                    del self._data[key]
+            return default
+
+        return value
+
+    def set(self, key: Hashable, value: Any, ttl: Optional[float] = None) -> None:
+        """写入缓存
+
+        Args:
+            key: 缓存键
+            value: 缓存值
+            ttl: 本条目的过期时间（秒），默认使用缓存的 ttl
+        """
+        expires_at = time.monotonic() + (self.ttl if ttl is None else ttl)
+
+        with self._lock:
+            self._data.pop(key, None)
+            self._data[key] = (value, expires_at)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def pop(self, key: Hashable, default: Any = None) -> Any:
+        """移除缓存条目
+
+        Args:
+            key: 缓存键
+            default: 不存在时的返回值
+
+        Returns:
+            被移除的值
+        """
+        with self._lock:
+            entry = self._data.pop(key, None)
+        return default if entry is None else entry[0]
+
+    def clear(self) -> None:
+        """清空缓存"""
+        with self._lock:
+            self._data.clear()
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+
+# 认证用户信息缓存：user_id -> 认证所需的用户字段
+# 认证层读取，存储层在用户变更时清除；缓存是进程内的，多进程部署时其他进程仍以 TTL 为上限
+USER_CACHE_TTL = 60
+user_cache = TTLCache(maxsize=5000, ttl=USER_CACHE_TTL)
+
+
+def invalidate_user_cache(user_id: Hashable) -> None:
+    """清除当前进程中指定用户的认证缓存
+
+    Args:
+        user_id: 用户 ID
+    """
+    user_cache.pop(user_id)
@@ -0,0 +1,79 @@
+# JSON 序列化提供者
+
+from typing import Any
+
+from flask import Response
+from flask.json.provider import DefaultJSONProvider
+
+from app.utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+# 尝试导入 orjson 以加速 JSON 序列化（可选依赖）
+try:
+    import orjson
+    ORJSON_AVAILABLE = True
+except ImportError:
+    ORJSON_AVAILABLE = False
+
+
+class OrjsonProvider(DefaultJSONProvider):
+    """基于 orjson 的 Flask JSON 提供者
+
+    输出与默认提供者保持一致：
+    - datetime / date / dataclass 交给 Flask 默认的 default 处理（HTTP 日期格式、asdict）
+    - sort_keys 生效，键顺序稳定（ETag 依赖响应体内容）
+    - 始终输出 UTF-8 原文（即 JSON_AS_ASCII=False 的效果）
+
+    jsonify 直接以 orjson 输出的 bytes 构建响应。orjson 无法处理的对象（超过 64 位的整数等）
+    或带格式化参数（如调试模式的 indent）的调用回退到标准库实现。
+    """
+
+    _BASE_OPTIONS = 0
+    if ORJSON_AVAILABLE:
+        _BASE_OPTIONS = (
+            orjson.OPT_NON_STR_KEYS
+            | orjson.OPT_PASSTHROUGH_DATETIME
+            | orjson.OPT_PASSTHROUGH_DATACLASS
+        )
+
+    def _options(self) -> int:
+        if self.sort_keys:
+            return self._BASE_OPTIONS | orjson.OPT_SORT_KEYS
+        return self._BASE_OPTIONS
+
+    def dumps(self, obj: Any, **kwargs: Any) -> str:
+        # 紧凑输出时 Flask 会传入 separators，orjson 本身即为紧凑格式
+        if kwargs.keys() - {"separators"}:
+            return super().dumps(obj, **kwargs)
+
+        try:
+            return orjson.dumps(obj, default=self.default, option=self._options()).decode("utf-8")
+        except TypeError:
+            return super().dumps(obj, **kwargs)
+
+    def response(self, *args: Any, **kwargs: Any) -> Response:
+        """jsonify 的实现：orjson 输出的 bytes 直接作为响应体，不再经过 str 解码与重新编码"""
+        if (self.compact is None and self._app.debug) or self.compact is False:
+            return super().response(*args, **kwargs)
+
+        obj = self._prepare_response_obj(args, kwargs)
+        try:
+            body = orjson.dumps(obj, default=self.default, option=self._options() | orjson.OPT_APPEND_NEWLINE)
+        except TypeError:
+            return super().response(*args, **kwargs)
+        return self._app.response_class(body, mimetype=self.mimetype)
+
+    def loads(self, s: str | bytes, **kwargs: Any) -> Any:
+        if kwargs:
+            return super().loads(s, **kwargs)
+        return orjson.loads(s)
+
+
+def init_json_provider(app) -> None:
+    """orjson 可用时替换应用的 JSON 提供者，否则保持 Flask 默认实现"""
+    if ORJSON_AVAILABLE:
+        app.json = OrjsonProvider(app)
+        logger.info("orjson 已加载，启用快速 JSON 序列化")
+    else:
+        logger.info("orjson 未安装，使用标准库 JSON 序列化")
@@ -3,6 +3,8 @@
 from typing import Any, Dict, List, Optional, Type, get_type_hints
 from dataclasses import dataclass
 from enum import Enum
+import html
+import os
 import re
 import email_validator
 from app.utils.logger import get_logger
@@ -19,6 +21,24 @@ except ImportError:
     logger.warning("python-magic 未安装，使用回退的魔数检测方式")
 
 
+# 常用格式正则，模块加载时编译一次
+URL_REGEX = re.compile(
+    r'^https?://'  # http:// or https://
+    r'(?:(?:[A-Z0-9](?:[A-Z0-9-]{0,61}[A-Z0-9])?\.)+'  # domain
+    r'(?:[A-Z]{2,6}\.?|[A-Z0-9-]{2,}\.?)|'  # TLD
+    r'localhost|'  # localhost
+    r'\d{1,3}\.\d{1,3}\.\d{1,3}\.\d{1,3})'  # IP
+    r'(?::\d+)?'  # optional port
+    r'(?:/?|[/?]\S+)$', re.IGNORECASE
+)
+UUID_REGEX = re.compile(
+    r'^[0-9a-f]{8}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{12}$',
+    re.IGNORECASE
+)
+GRAPH_ID_REGEX = re.compile(r'^[\w\-]+$')
+FILENAME_UNSAFE_CHARS_REGEX = re.compile(r'[^\w\s\-.]')
+
+
 class ValidationType(Enum):
     """验证类型枚举"""
     STRING = "string"
@@ -306,17 +326,7 @@ class Validator:
             result.add_error(field_name, f"{field_name} 必须是字符串", value)
             return result
         
-        url_pattern = re.compile(
-            r'^https?://'  # http:// or https://
-            r'(?:(?:[A-Z0-9](?:[A-Z0-9-]{0,61}[A-Z0-9])?\.)+'  # domain
-            r'(?:[A-Z]{2,6}\.?|[A-Z0-9-]{2,}\.?)|'  # TLD
-            r'localhost|'  # localhost
-            r'\d{1,3}\.\d{1,3}\.\d{1,3}\.\d{1,3})'  # IP
-            r'(?::\d+)?'  # optional port
-            r'(?:/?|[/?]\S+)$', re.IGNORECASE
-        )
-        
-        if not url_pattern.match(value):
+        if not URL_REGEX.match(value):
             result.add_error(field_name, f"{field_name} 格式不正确", value)
         
         return result
@@ -341,12 +351,7 @@ class Validator:
             result.add_error(field_name, f"{field_name} 必须是字符串", value)
             return result
         
-        uuid_pattern = re.compile(
-            r'^[0-9a-f]{8}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{12}$',
-            re.IGNORECASE
-        )
-        
-        if not uuid_pattern.match(value):
+        if not UUID_REGEX.match(value):
             result.add_error(field_name, f"{field_name} 格式不正确", value)
         
         return result
@@ -584,7 +589,6 @@ def sanitize_string(value: str,
     
     # 移除 HTML 标签
     if remove_html:
-        import html
         value = html.escape(value)
     
     return value
@@ -911,11 +915,8 @@ def sanitize_filename(filename: str) -> str:
     if not isinstance(filename, str):
         return "unknown"
     
-    import os
-    import re
-    
     name = os.path.basename(filename)
-    name = re.sub(r'[^\w\s\-.]', '_', name)
+    name = FILENAME_UNSAFE_CHARS_REGEX.sub('_', name)
     name = name.strip('._')
     
     if not name:
@@ -939,6 +940,9 @@ SQL_INJECTION_PATTERNS = [
     r"(\bSLEEP\(\d*\))",
 ]
 
+# 所有特征合并为一个预编译正则，每个字符串只需扫描一次
+SQL_INJECTION_REGEX = re.compile("|".join(SQL_INJECTION_PATTERNS), re.IGNORECASE)
+
 
 def contains_sql_injection(value: str) -> bool:
     """检测字符串是否包含 SQL 注入特征
@@ -952,13 +956,33 @@ def contains_sql_injection(value: str) -> bool:
     if not isinstance(value, str):
         return False
     
-    value_lower = value.lower()
+    return SQL_INJECTION_REGEX.search(value) is not None
+
+
+def is_sql_injection_free(value: Any) -> bool:
+    """判断值是否不含 SQL 注入特征
+    
+    检查范围与 validate_no_sql_injection 相同（字符串、字典的直接值、列表的直接元素），
+    但只返回布尔值：遇到第一个命中即返回，不构造错误信息。
     
-    for pattern in SQL_INJECTION_PATTERNS:
-        if re.search(pattern, value, re.IGNORECASE):
-            return True
+    Args:
+        value: 待检测的值
+        
+    Returns:
+        是否不含 SQL 注入特征
+    """
+    if isinstance(value, str):
+        return SQL_INJECTION_REGEX.search(value) is None
+    
+    if isinstance(value, dict):
+        items = value.values()
+    elif isinstance(value, list):
+        items = value
+    else:
+        return True
     
-    return False
+    search = SQL_INJECTION_REGEX.search
+    return not any(isinstance(item, str) and search(item) for item in items)
 
 
 def validate_no_sql_injection(value: Any, field_name: str = "field") -> ValidationResult:
@@ -1055,7 +1079,7 @@ def validate_graph_id(graph_id: Any, field_name: str = "graph_id") -> Validation
         result.add_error(field_name, f"{field_name} 长度不能超过 100")
         return result
     
-    if not re.match(r'^[\w\-]+$', graph_id):
+    if not GRAPH_ID_REGEX.match(graph_id):
         result.add_error(field_name, f"{field_name} 格式不正确，只允许字母、数字、下划线和连字符")
     
     return result
@@ -100,7 +100,7 @@ def app():
         from app import create_app
 
         # 创建应用实例
-        test_app = create_app()
+        test_app = create_app(skip_recovery=True, skip_reports=True)
         test_app.config.update({
             'TESTING': True,
             'WTF_CSRF_ENABLED': False,
@@ -0,0 +1,424 @@
+"""
+API Key 认证模块单元测试
+"""
+
+
+class TestAPIKeyManager:
+    """API Key 管理器测试"""
+
+    def test_validate_api_key(self):
+        """测试有效 Key 通过验证，未知 Key 返回 None"""
+        from app.api.auth import APIKeyManager, hash_api_key
+
+        manager = APIKeyManager()
+        manager.add_api_key("key1", hash_api_key("secret-1"), name="App 1")
+        manager.add_api_key("key2", hash_api_key("secret-2"), name="App 2")
+
+        key_info = manager.validate_api_key("secret-2")
+        assert key_info["key_id"] == "key2"
+        assert key_info["last_used"] is not None
+        assert manager.validate_api_key("unknown") is None
+
+    def test_last_used_updated_at_most_once_per_resolution(self):
+        """测试 last_used 在更新粒度内不会重复写入"""
+        from app.api.auth import APIKeyManager, hash_api_key
+
+        manager = APIKeyManager()
+        manager.add_api_key("key1", hash_api_key("secret-1"))
+
+        first = manager.validate_api_key("secret-1")["last_used"]
+        manager._api_keys["key1"].last_used = 0.0
+        assert manager.validate_api_key("secret-1")["last_used"] == 0.0
+
+        manager._last_touched["key1"] -= APIKeyManager.LAST_USED_RESOLUTION
+        assert manager.validate_api_key("secret-1")["last_used"] >= first
+
+    def test_revoked_api_key_is_rejected(self):
+        """测试撤销后的 Key 不再通过验证"""
+        from app.api.auth import APIKeyManager, hash_api_key
+
+        manager = APIKeyManager()
+        manager.add_api_key("key1", hash_api_key("secret-1"))
+
+        assert manager.revoke_api_key("key1")
+        assert manager.validate_api_key("secret-1") is None
+        assert manager.get_key_info("key1")["active"] is False
+
+    def test_replacing_key_drops_old_hash(self):
+        """测试同一 key_id 重新添加后旧密钥失效"""
+        from app.api.auth import APIKeyManager, hash_api_key
+
+        manager = APIKeyManager()
+        manager.add_api_key("key1", hash_api_key("old-secret"))
+        manager.add_api_key("key1", hash_api_key("new-secret"))
+
+        assert manager.validate_api_key("old-secret") is None
+        assert manager.validate_api_key("new-secret")["key_id"] == "key1"
+
+    def test_hash_api_key_returns_digest(self):
+        """测试哈希结果为 32 字节摘要且可用于验证"""
+        from app.api.auth import hash_api_key, verify_api_key
+
+        hashed = hash_api_key("secret-1")
+
+        assert isinstance(hashed, bytes) and len(hashed) == 32
+        assert verify_api_key("secret-1", hashed)
+        assert not verify_api_key("secret-2", hashed)
+
+
+class TestRequestSignature:
+    """请求签名测试"""
+
+    def test_bytes_signature_matches_str_signature(self):
+        """测试字节版签名与字符串版结果一致"""
+        from app.api.auth import generate_signature, generate_signature_bytes
+
+        body = '{"name": "模拟"}'
+        expected = generate_signature("POST", "/api/graph/build", "1700000000", body, "secret")
+
+        assert generate_signature_bytes(
+            b"POST", b"/api/graph/build", b"1700000000", body.encode(), b"secret"
+        ) == expected
+
+    def test_verify_signature_accepts_bytes_body(self):
+        """测试验证签名时请求体可直接传入字节"""
+        import time
+        from app.api.auth import generate_signature, verify_signature
+
+        timestamp = str(int(time.time()))
+        body = '{"name": "模拟"}'
+        signature = generate_signature("POST", "/api/graph/build", timestamp, body, "secret")
+
+        assert verify_signature("POST", "/api/graph/build", timestamp, body.encode(), signature, "secret")
+        assert not verify_signature("POST", "/api/graph/build", timestamp, b"{}", signature, "secret")
+
+
+class TestAPIKeyManagerRegistry:
+    """API Key 管理器登记测试"""
+
+    def test_manager_is_shared_per_app(self):
+        """测试同一应用内返回同一个管理器实例"""
+        from flask import Flask
+        from app.api.auth import get_api_key_manager, API_KEY_MANAGER_EXTENSION
+
+        flask_app = Flask(__name__)
+
+        with flask_app.app_context():
+            manager = get_api_key_manager()
+            assert get_api_key_manager() is manager
+            assert flask_app.extensions[API_KEY_MANAGER_EXTENSION] is manager
+
+
+class TestRequireAPIKey:
+    """API Key 认证装饰器测试"""
+
+    def _make_app(self):
+        from unittest.mock import MagicMock, patch
+        from flask import Flask
+        from app.api.auth import require_api_key, get_api_key_manager, hash_api_key
+
+        flask_app = Flask(__name__)
+
+        @flask_app.route('/protected')
+        @require_api_key(permissions=["write"])
+        def protected():
+            return "ok"
+
+        with flask_app.app_context():
+            get_api_key_manager().add_api_key("key1", hash_api_key("secret-1"), permissions=["read"])
+            get_api_key_manager().add_api_key("key2", hash_api_key("secret-2"), permissions=["write"])
+
+        config = MagicMock(API_KEY_ENABLED=True, API_KEY_HEADER="X-API-Key", SIGNATURE_ENABLED=False)
+        return flask_app, patch('app.api.auth.get_config', return_value=config)
+
+    def test_error_responses(self):
+        """测试缺少、无效 Key 和权限不足时的错误响应"""
+        flask_app, config_patch = self._make_app()
+        client = flask_app.test_client()
+
+        with config_patch:
+            response = client.get('/protected')
+            assert response.status_code == 401
+            assert response.get_json() == {
+                "success": False, "error": "缺少 API Key", "error_code": "MISSING_API_KEY"
+            }
+
+            response = client.get('/protected', headers={"X-API-Key": "unknown"})
+            assert response.status_code == 401
+            assert response.get_json()["error_code"] == "INVALID_API_KEY"
+
+            response = client.get('/protected', headers={"X-API-Key": "secret-1"})
+            assert response.status_code == 403
+            assert response.get_json()["error_code"] == "INSUFFICIENT_PERMISSIONS"
+
+            response = client.get('/protected', headers={"X-API-Key": "secret-2"})
+            assert response.status_code == 200
+
+
+class TestJWTDecodeCache:
+    """JWT 校验结果缓存测试"""
+
+    def _config(self):
+        from app.api.decorators import AuthParams
+        return AuthParams(
+            secret_key="test-jwt-secret-key-at-least-32-chars",
+            algorithms=["HS256"],
+            database_path=":memory:"
+        )
+
+    def test_valid_token_decoded_once(self):
+        """测试同一 token 只验签一次"""
+        import time
+        from unittest.mock import patch
+        import jwt
+        from app.api import decorators
+
+        config = self._config()
+        token = jwt.encode(
+            {"user_id": "u_cache", "exp": int(time.time()) + 3600},
+            config.secret_key,
+            algorithm="HS256"
+        )
+        decorators._jwt_cache.clear()
+
+        with patch("jwt.decode", wraps=jwt.decode) as mock_decode:
+            assert decorators._decode_token(token, config)["user_id"] == "u_cache"
+            assert decorators._decode_token(token, config)["user_id"] == "u_cache"
+            assert mock_decode.call_count == 1
+
+    def test_expired_token_not_cached(self):
+        """测试过期 token 抛出异常且不进入缓存"""
+        import time
+        import jwt
+        import pytest
+        from app.api import decorators
+
+        config = self._config()
+        token = jwt.encode(
+            {"user_id": "u_expired", "exp": int(time.time()) - 10},
+            config.secret_key,
+            algorithm="HS256"
+        )
+        decorators._jwt_cache.clear()
+
+        with pytest.raises(jwt.ExpiredSignatureError):
+            decorators._decode_token(token, config)
+        assert len(decorators._jwt_cache) == 0
+
+    def test_token_without_user_id_rejected(self):
+        """测试缺少 user_id 声明的 token 被拒绝"""
+        import time
+        import jwt
+        import pytest
+        from app.api import decorators
+
+        config = self._config()
+        token = jwt.encode({"exp": int(time.time()) + 3600}, config.secret_key, algorithm="HS256")
+        decorators._jwt_cache.clear()
+
+        with pytest.raises(jwt.MissingRequiredClaimError):
+            decorators._decode_token(token, config)
+
+
+class TestUserCache:
+    """认证用户缓存测试"""
+
+    def test_user_loaded_once_and_invalidated(self):
+        """测试用户信息只查询一次，失效后重新查询"""
+        from unittest.mock import patch
+        from app.api import decorators
+        from app.utils.cache import invalidate_user_cache
+
+        config = decorators.AuthParams(secret_key="", algorithms=["HS256"], database_path=":memory:")
+        record = {
+            "id": 42, "username": "alice", "email": "a@example.com",
+            "role": "user", "is_active": 1, "password_hash": "secret"
+        }
+        decorators._user_cache.clear()
+
+        with patch("app.api.decorators.get_sqlite_storage") as mock_storage_cls:
+            mock_storage_cls.return_value.get_user_by_id.return_value = record
+
+            user = decorators._get_user(42, config)
+            assert decorators._get_user(42, config) is user
+            assert "password_hash" not in user
+            assert mock_storage_cls.return_value.get_user_by_id.call_count == 1
+
+            invalidate_user_cache(42)
+            decorators._get_user(42, config)
+            assert mock_storage_cls.return_value.get_user_by_id.call_count == 2
+
+
+    def test_disabled_user_rejected_on_next_request(self, tmp_path):
+        """测试通过 update_user 禁用用户后，下一次请求立即被拒绝"""
+        from unittest.mock import patch
+        from flask import Flask
+        from app.api import decorators
+        from app.storage.database import SQLiteStorage
+
+        storage = SQLiteStorage(str(tmp_path / "users.db"))
+        user_id = storage.create_user("alice", "a@example.com", "hash")
+        params = decorators.AuthParams(secret_key="", algorithms=["HS256"], database_path=storage.database_path)
+        flask_app = Flask(__name__)
+        decorators._user_cache.clear()
+
+        with patch.object(decorators, '_auth_params', return_value=params), \
+             patch.object(decorators, '_decode_token', return_value={"user_id": user_id}), \
+             patch("app.api.decorators.get_sqlite_storage", return_value=storage):
+            with flask_app.test_request_context('/', headers={"Authorization": "Bearer token"}):
+                assert decorators.ensure_user_auth() is None
+
+            assert storage.update_user(user_id, is_active=0)
+
+            with flask_app.test_request_context('/', headers={"Authorization": "Bearer token"}):
+                response = decorators.ensure_user_auth()
+        assert response is not None
+        assert response[1] == 401
+        assert response[0].get_json()["message"] == "用户账户已被禁用"
+
+class TestProjectOwnerCache:
+    """项目归属缓存测试"""
+
+    def test_owner_loaded_once_and_invalidated(self):
+        """测试项目归属只查询一次，失效后重新查询"""
+        from unittest.mock import MagicMock, patch
+        from app.api import decorators
+
+        decorators._project_owner_cache.clear()
+
+        with patch("app.models.project.ProjectManager.get_project") as mock_get_project:
+            mock_get_project.return_value = MagicMock(user_id=7)
+
+            assert decorators._get_project_owner("proj_1") == 7
+            assert decorators._get_project_owner("proj_1") == 7
+            assert mock_get_project.call_count == 1
+
+            decorators.invalidate_project_owner_cache("proj_1")
+            decorators._get_project_owner("proj_1")
+            assert mock_get_project.call_count == 2
+
+    def test_owner_attribute_skips_to_dict(self):
+        """测试项目带 user_id 属性（即使为 None）时不调用 to_dict()"""
+        from unittest.mock import MagicMock, patch
+        from app.api import decorators
+
+        decorators._project_owner_cache.clear()
+        project = MagicMock(user_id=None)
+
+        with patch("app.models.project.ProjectManager.get_project", return_value=project):
+            assert decorators._get_project_owner("proj_unowned") is None
+
+        project.to_dict.assert_not_called()
+
+    def test_missing_project_not_cached(self):
+        """测试不存在的项目不写入缓存"""
+        from unittest.mock import patch
+        from app.api import decorators
+
+        decorators._project_owner_cache.clear()
+
+        with patch("app.models.project.ProjectManager.get_project", return_value=None) as mock_get_project:
+            assert decorators._get_project_owner("proj_missing") is decorators._MISSING
+            assert decorators._get_project_owner("proj_missing") is decorators._MISSING
+            assert mock_get_project.call_count == 2
+
+
+class TestAuthOncePerRequest:
+    """同一请求只认证一次测试"""
+
+    def test_stacked_auth_runs_once(self):
+        """测试叠加认证装饰器时只解析一次 token"""
+        from unittest.mock import patch
+        from flask import Flask
+        from app.api import decorators
+        from app.api.decorators import require_user_auth
+
+        flask_app = Flask(__name__)
+        user = {"id": 1, "username": "alice", "email": "a@example.com", "role": "user", "is_active": 1}
+
+        @require_user_auth
+        @require_user_auth
+        def view():
+            return "ok"
+
+        with flask_app.test_request_context('/', headers={"Authorization": "Bearer token"}):
+            with patch.object(decorators, '_auth_params'), \
+                 patch.object(decorators, '_decode_token', return_value={"user_id": 1}) as mock_decode, \
+                 patch.object(decorators, '_get_user', return_value=user):
+                assert view() == "ok"
+                assert mock_decode.call_count == 1
+
+
+class TestSimulationProjectCache:
+    """模拟所属项目缓存测试"""
+
+    def test_project_id_loaded_once(self):
+        """测试模拟所属项目只读取一次，不存在的模拟不缓存"""
+        from unittest.mock import patch
+        from app.api import decorators
+
+        decorators._simulation_project_cache.clear()
+
+        with patch(
+            "app.services.simulation_manager.SimulationManager.get_simulation_project_id",
+            side_effect=lambda sim_id: "proj_1" if sim_id == "sim_1" else None
+        ) as mock_lookup, patch("app.services.simulation_manager.SimulationManager.__init__", return_value=None):
+            assert decorators._get_simulation_project_id("sim_1") == "proj_1"
+            assert decorators._get_simulation_project_id("sim_1") == "proj_1"
+            assert decorators._get_simulation_project_id("sim_missing") is None
+            assert decorators._get_simulation_project_id("sim_missing") is None
+            assert mock_lookup.call_count == 3
+
+
+class TestUserProjectIds:
+    """当前用户项目集合请求级缓存测试"""
+
+    def test_project_ids_queried_once_per_request(self):
+        """测试同一请求内多次获取只查询一次存储"""
+        from unittest.mock import MagicMock, patch
+        from flask import Flask, g
+        from app.api.decorators import get_current_user_project_ids
+
+        flask_app = Flask(__name__)
+        storage = MagicMock()
+        storage.list_project_ids_by_user.return_value = ["proj_1", "proj_2"]
+
+        with patch('app.models.project.ProjectManager._get_storage', return_value=storage):
+            with flask_app.test_request_context('/'):
+                g.current_user = {"id": 1}
+                assert get_current_user_project_ids() == {"proj_1", "proj_2"}
+                assert get_current_user_project_ids() == {"proj_1", "proj_2"}
+
+            with flask_app.test_request_context('/'):
+                g.current_user = {"id": 1}
+                get_current_user_project_ids()
+
+        assert storage.list_project_ids_by_user.call_count == 2
+
+
+class TestAuthMetrics:
+    """认证耗时统计测试"""
+
+    def test_stages_recorded_when_profiling(self):
+        """测试开启统计时记录 JWT 验签与用户查询耗时"""
+        from unittest.mock import patch
+        from flask import Flask
+        from app.api import decorators
+
+        flask_app = Flask(__name__)
+        params = decorators.AuthParams(secret_key="", algorithms=["HS256"], database_path=":memory:", profile=True)
+        user = {"id": 1, "username": "alice", "email": "a@example.com", "role": "user", "is_active": 1}
+        decorators.reset_auth_metrics()
+
+        with flask_app.test_request_context('/', headers={"Authorization": "Bearer token"}):
+            with patch.object(decorators, '_auth_params', return_value=params), \
+                 patch.object(decorators, '_decode_token', return_value={"user_id": 1}), \
+                 patch.object(decorators, '_get_user', return_value=user):
+                assert decorators.ensure_user_auth() is None
+
+        metrics = decorators.get_auth_metrics()
+        assert metrics["jwt_decode_count"] == 1
+        assert metrics["user_lookup_count"] == 1
+
+        decorators.reset_auth_metrics()
+        assert decorators.get_auth_metrics()["jwt_decode_count"] == 0
@@ -0,0 +1,425 @@
+"""
+API 公共模块单元测试
+测试错误代码、统一错误响应等 API 层公共函数
+"""
+
+import json
+
+import pytest
+
+
+class TestErrorResponse:
+    """统一错误响应测试"""
+
+    def test_error_code_is_json_serializable(self):
+        """测试 ErrorCode 可直接 JSON 序列化"""
+        from app.api import ErrorCode
+
+        assert json.dumps({"code": ErrorCode.FORBIDDEN}) == '{"code": "FORBIDDEN"}'
+        assert ErrorCode.FORBIDDEN == "FORBIDDEN"
+
+    def test_recovery_suggestion_accepts_string(self):
+        """测试恢复建议可用字符串值查询"""
+        from app.api import ErrorCode, ErrorRecovery
+
+        assert ErrorRecovery.get("FORBIDDEN") == ErrorRecovery.get(ErrorCode.FORBIDDEN)
+
+    def test_response_helpers_use_recovery_table(self):
+        """测试 response.py 预展开的恢复建议与 ErrorRecovery 一致"""
+        from flask import Flask
+        from app.api import ErrorCode, ErrorRecovery
+        from app.api.response import _RECOVERY, error, exception_error
+
+        assert _RECOVERY == {code: ErrorRecovery.get(code) for code in ErrorCode}
+
+        with Flask(__name__).app_context():
+            response, status = error("冲突", ErrorCode.CONFLICT, 409)
+            assert status == 409
+            assert response.get_json()["recovery_suggestion"] == ErrorRecovery.get(ErrorCode.CONFLICT)
+
+            response, status = exception_error(RuntimeError("失败"))
+            assert status == 500
+            assert response.get_json()["recovery_suggestion"] == ErrorRecovery.get(ErrorCode.INTERNAL_ERROR)
+
+    def test_prebuilt_error_fresh_response(self):
+        """测试预序列化错误响应每次返回新的 Response，内容与 error() 一致"""
+        from flask import Flask
+        from app.api import ErrorCode
+        from app.api.response import prebuilt_error, error
+
+        make_response = prebuilt_error("缺少参数", ErrorCode.VALIDATION_ERROR, 422)
+
+        with Flask(__name__).app_context():
+            first, status = make_response()
+            second, _ = make_response()
+            expected, _ = error("缺少参数", ErrorCode.VALIDATION_ERROR, 422)
+
+        assert status == 422
+        assert first is not second
+        assert first.get_data() == expected.get_data()
+
+    def test_prebuilt_json_encoding(self):
+        """测试预序列化任意响应体：每次返回新的 Response，编码与 error() 一致（键排序、UTF-8 原文）"""
+        from flask import Flask
+        from app.api import ErrorCode, get_error_response
+        from app.api.response import prebuilt_json
+
+        body = get_error_response(error="未提供认证信息", status_code=401, error_code=ErrorCode.UNAUTHORIZED)
+        make_response = prebuilt_json(body, 401)
+
+        with Flask(__name__).app_context():
+            first, status = make_response()
+            second, _ = make_response()
+
+        assert status == 401
+        assert first is not second
+        assert first.get_json() == body
+        assert first.get_data() == (
+            json.dumps(body, ensure_ascii=False, sort_keys=True, separators=(",", ":")) + "\n"
+        ).encode("utf-8")
+
+    def test_paginated_stream_ndjson(self):
+        """测试 NDJSON 分页流首行为分页信息，其后逐行输出条目"""
+        from flask import Flask
+        from app.api.response import paginated_stream
+
+        flask_app = Flask(__name__)
+        with flask_app.test_request_context('/'):
+            response = paginated_stream(({"id": i} for i in range(3)), 45, page=2, page_size=20)
+
+        lines = [json.loads(line) for line in response.get_data(as_text=True).splitlines()]
+
+        assert response.mimetype == "application/x-ndjson"
+        assert lines[0]["success"] is True
+        assert lines[0]["pagination"]["total_pages"] == 3
+        assert lines[0]["pagination"]["has_next"] is True
+        assert lines[1:] == [{"id": 0}, {"id": 1}, {"id": 2}]
+
+    def test_error_body_serialized_once(self):
+        """测试相同错误响应复用序列化结果，但每次返回新的 Response"""
+        from flask import Flask
+        from app.api.response import _error_body, bad_request
+
+        _error_body.cache_clear()
+        with Flask(__name__).app_context():
+            first, status = bad_request("请提供 simulation_id")
+            second, _ = bad_request("请提供 simulation_id")
+            detailed, _ = bad_request("参数错误", details={"field": "mode"})
+
+        assert status == 400
+        assert first is not second
+        assert first.get_data() == second.get_data()
+        assert first.get_json()["error"] == "请提供 simulation_id"
+        assert first.get_json()["error_code"] == "INVALID_INPUT"
+        assert detailed.get_json()["details"] == {"field": "mode"}
+        assert _error_body.cache_info().hits == 1
+
+    @pytest.mark.parametrize("total,page,page_size,total_pages,has_next,has_prev", [
+        (0, 1, 20, 0, False, False),
+        (20, 1, 20, 1, False, False),
+        (21, 1, 20, 2, True, False),
+        (41, 3, 20, 3, False, True),
+        (5, 1, 0, 0, False, False),
+    ])
+    def test_paginated_pagination_fields(self, total, page, page_size, total_pages, has_next, has_prev):
+        """测试分页响应的总页数与翻页标记"""
+        from flask import Flask
+        from app.api.response import paginated
+
+        with Flask(__name__).app_context():
+            response, status = paginated([], total, page=page, page_size=page_size)
+
+        assert status == 200
+        assert response.get_json()["pagination"] == {
+            "total": total,
+            "page": page,
+            "page_size": page_size,
+            "total_pages": total_pages,
+            "has_next": has_next,
+            "has_prev": has_prev,
+        }
+
+    @pytest.mark.parametrize("status_code", [400, 401, 403, 404, 405, 409, 422, 429, 500, 502, 503])
+    def test_http_error_response_known_status(self, status_code):
+        """测试已知状态码返回预构建模板"""
+        from app.api import get_http_error_response, get_error_response, HTTP_ERROR_CODES, HTTP_ERROR_MESSAGES
+
+        response, status = get_http_error_response(status_code)
+
+        assert status == status_code
+        assert response == get_error_response(
+            error=HTTP_ERROR_MESSAGES[status_code],
+            status_code=status_code,
+            error_code=HTTP_ERROR_CODES[status_code]
+        )
+
+    def test_http_error_response_custom_message_does_not_leak(self):
+        """测试自定义消息不会污染共享模板"""
+        from app.api import get_http_error_response
+
+        response, _ = get_http_error_response(404, "项目不存在")
+        assert response["message"] == "项目不存在"
+
+        response, _ = get_http_error_response(404)
+        assert response["message"] == "资源不存在"
+
+    def test_http_error_response_unknown_status(self):
+        """测试未知状态码回退到 UNKNOWN_ERROR"""
+        from app.api import get_http_error_response
+
+        response, status = get_http_error_response(418)
+
+        assert status == 418
+        assert response["error_code"] == "UNKNOWN_ERROR"
+        assert response["message"] == "发生错误"
+
+
+class TestExcInfoSampling:
+    """错误日志堆栈采样测试"""
+
+    def test_full_rate_always_samples(self):
+        """测试采样比例为 1 时始终记录堆栈"""
+        from app import _sample_exc_info
+
+        assert all(_sample_exc_info(1.0) for _ in range(100))
+
+    def test_zero_rate_never_samples(self):
+        """测试采样比例为 0 时不记录堆栈"""
+        from app import _sample_exc_info
+
+        assert not any(_sample_exc_info(0.0) for _ in range(100))
+
+
+class TestTaskRecovery:
+    """启动时中断任务恢复测试"""
+
+    def test_task_created_after_boot_survives_recovery(self, tmp_path):
+        """测试只恢复启动时快照的任务，启动后新建的任务不被标记为失败"""
+        from unittest.mock import patch
+        from app import _recover_interrupted_tasks
+        from app.models.task import TaskManager, TaskStatus, snapshot_active_task_ids
+        from app.storage.database import SQLiteStorage
+
+        manager = TaskManager()
+        storage = SQLiteStorage(str(tmp_path / "tasks.db"))
+        with patch.object(manager, "_storage", storage), \
+                patch("app.models.task.get_sqlite_storage", return_value=storage), \
+                patch("app.services.auto_pilot_manager.get_auto_pilot_manager"):
+            interrupted = manager.create_task("graph_build")
+            snapshot = snapshot_active_task_ids()
+            created_after_boot = manager.create_task("graph_build")
+            try:
+                _recover_interrupted_tasks(snapshot, skip_recovery=False, skip_reports=True)
+
+                assert snapshot == {interrupted}
+                assert manager.get_task(interrupted).status == TaskStatus.FAILED
+                assert storage.retrieve_task(interrupted)["status"] == "failed"
+                assert manager.get_task(created_after_boot).status == TaskStatus.PENDING
+            finally:
+                manager._cache.pop(interrupted, None)
+                manager._cache.pop(created_after_boot, None)
+
+
+class TestResponseCompression:
+    """响应压缩中间件测试"""
+
+    @pytest.fixture
+    def compress_client(self):
+        import gzip
+        from types import SimpleNamespace
+        from flask import Flask, jsonify
+        from app import init_response_compression
+
+        flask_app = Flask(__name__)
+        init_response_compression(flask_app, SimpleNamespace(
+            RESPONSE_COMPRESSION_ENABLED=True, COMPRESS_MIN_SIZE=1024, COMPRESS_LEVEL=6
+        ))
+
+        @flask_app.route('/large')
+        def large():
+            return jsonify({"items": ["x" * 100] * 50})
+
+        @flask_app.route('/small')
+        def small():
+            return jsonify({"ok": True})
+
+        @flask_app.route('/events')
+        def events():
+            return flask_app.response_class(iter(["data: 1\n\n"]), mimetype="text/event-stream")
+
+        return flask_app.test_client(), gzip
+
+    def test_large_json_gzipped(self, compress_client):
+        """测试较大的 JSON 响应在客户端接受 gzip 时被压缩"""
+        client, gzip = compress_client
+
+        response = client.get('/large', headers={'Accept-Encoding': 'gzip'})
+
+        assert response.headers['Content-Encoding'] == 'gzip'
+        assert 'Accept-Encoding' in response.headers['Vary']
+        assert json.loads(gzip.decompress(response.data)) == {"items": ["x" * 100] * 50}
+
+    def test_small_or_unaccepted_not_gzipped(self, compress_client):
+        """测试小响应、不接受 gzip 的客户端与流式响应保持原样"""
+        client, _ = compress_client
+
+        assert 'Content-Encoding' not in client.get('/small', headers={'Accept-Encoding': 'gzip'}).headers
+        assert 'Content-Encoding' not in client.get('/large').headers
+        assert 'Content-Encoding' not in client.get('/events', headers={'Accept-Encoding': 'gzip'}).headers
+
+
+class TestConcurrentLimit:
+    """并发请求限制装饰器测试"""
+
+    def test_rejects_when_limit_reached_and_releases(self):
+        """测试达到并发上限时返回 429，请求结束后释放计数"""
+        from flask import Flask, g
+        from app.api.decorators import concurrent_limit, _active_requests
+
+        flask_app = Flask(__name__)
+        results = []
+
+        @concurrent_limit(max_active=1)
+        def inner():
+            return "inner"
+
+        @concurrent_limit(max_active=1)
+        def outer():
+            results.append(inner())
+            return "outer"
+
+        with flask_app.test_request_context("/"):
+            g.current_user = {"id": "user_1"}
+            assert outer() == "outer"
+
+            response, status = results[0]
+            assert status == 429
+            assert response.get_json()["error_code"] == "RATE_LIMIT_EXCEEDED"
+            assert "user:user_1" not in _active_requests
+
+
+class TestBlueprintAuth:
+    """蓝图统一鉴权测试"""
+
+    def test_protected_blueprint_requires_login(self, client):
+        """测试受保护蓝图未登录返回 401"""
+        response = client.get('/api/graph/project/list')
+        assert response.status_code == 401
+
+    def test_public_routes_skip_login(self, client):
+        """测试公开路由无需登录"""
+        assert client.get('/api/health').status_code == 200
+        assert client.get('/api/v1/health').status_code == 200
+
+    @pytest.mark.parametrize("header", ["Bearer", "Bearer ", "Basic abc", "Bearer a b", "Bearertoken"])
+    def test_malformed_authorization_header(self, client, header):
+        """测试格式错误的 Authorization 头返回认证格式错误"""
+        response = client.get('/api/graph/project/list', headers={"Authorization": header})
+        assert response.status_code == 401
+        assert response.get_json()["message"] == "无效的认证格式，请使用 Bearer Token"
+
+
+class TestValidateRequest:
+    """请求验证装饰器测试"""
+
+    def test_required_field_from_json_body(self):
+        """测试必填字段可以来自 JSON body"""
+        from flask import Flask
+        from app.api.decorators import validate_request
+
+        flask_app = Flask(__name__)
+
+        @validate_request(required=['simulation_id'])
+        def view():
+            return "ok"
+
+        with flask_app.test_request_context('/', method='POST', json={'simulation_id': 'sim_1'}):
+            assert view() == "ok"
+
+        with flask_app.test_request_context('/', method='POST', json={}):
+            response, status = view()
+            assert status == 400
+            assert response.get_json()["error_code"] == "INVALID_INPUT"
+
+    def test_sql_injection_rejected(self):
+        """测试 JSON body 中的 SQL 注入被拒绝"""
+        from flask import Flask
+        from app.api.decorators import validate_request
+
+        flask_app = Flask(__name__)
+
+        @validate_request()
+        def view():
+            return "ok"
+
+        with flask_app.test_request_context('/', method='POST', json={'q': "1' OR '1'='1"}):
+            response, status = view()
+            assert status == 400
+
+    def test_sql_injection_check_runs_once_per_request(self):
+        """测试叠加验证装饰器时请求体只检查一次"""
+        from unittest.mock import patch
+        from flask import Flask
+        from app.api import decorators
+        from app.api.decorators import validate_request, validate_json_body
+
+        flask_app = Flask(__name__)
+
+        @validate_request()
+        @validate_json_body()
+        def view():
+            return "ok"
+
+        with flask_app.test_request_context('/', method='POST', json={'name': 'test'}):
+            with patch.object(
+                decorators, 'is_sql_injection_free', wraps=decorators.is_sql_injection_free
+            ) as mock_check:
+                assert view() == "ok"
+                assert mock_check.call_count == 1
+
+    def test_json_body_schema_fields_skip_sql_scan(self):
+        """测试 schema 严格类型字段经校验后不再参与 SQL 注入扫描，其余字段仍被扫描"""
+        from flask import Flask
+        from app.api.decorators import validate_json_body
+        from app.utils.validators import ValidationType
+
+        flask_app = Flask(__name__)
+
+        @validate_json_body(schema={"max_rounds": {"type": ValidationType.INTEGER}})
+        def view():
+            return "ok"
+
+        with flask_app.test_request_context('/', method='POST', json={"max_rounds": 10, "name": "test"}):
+            assert view() == "ok"
+
+        with flask_app.test_request_context('/', method='POST', json={"max_rounds": "1 OR 1=1"}):
+            response, status = view()
+            assert status == 400
+            assert response.get_json()["error_code"] == "VALIDATION_ERROR"
+
+        with flask_app.test_request_context('/', method='POST', json={"max_rounds": 10, "name": "1' OR '1'='1"}):
+            response, status = view()
+            assert status == 400
+            assert response.get_json()["message"] == "请求包含非法字符"
+
+    def test_id_param_shortcut(self):
+        """测试 ID 参数快捷装饰器的缺失、非法与正常分支"""
+        from flask import Flask
+        from app.api.decorators import validate_simulation_id
+
+        flask_app = Flask(__name__)
+
+        @validate_simulation_id
+        def view(simulation_id=None):
+            return simulation_id
+
+        with flask_app.test_request_context('/'):
+            response, status = view()
+            assert status == 400
+            assert response.get_json()["message"] == "simulation_id 是必填参数"
+
+            response, status = view(simulation_id="bad id; DROP")
+            assert status == 400
+            assert response.get_json()["error_code"] == "VALIDATION_ERROR"
+
+            assert view(simulation_id="sim_abc123") == "sim_abc123"
@@ -5,6 +5,8 @@
 
 import pytest
 import json
+import os
+from datetime import datetime
 from unittest.mock import patch, MagicMock
 
 
@@ -104,6 +106,120 @@ class TestReportStatusAPI:
         assert response.status_code in [200, 404, 500]
 
 
+class TestReportTaskLookup:
+    """按模拟查找报告生成任务测试"""
+
+    def test_task_ids_found_by_simulation(self, tmp_path):
+        """测试按 simulation_id 列查找任务，并按用户过滤"""
+        from app.storage.database import SQLiteStorage
+
+        storage = SQLiteStorage(str(tmp_path / "tasks.db"))
+        for task_id, simulation_id, user_id, created_at in [
+            ("t1", "sim_a", 1, "2024-01-01T00:00:00"),
+            ("t2", "sim_a", 1, "2024-01-02T00:00:00"),
+            ("t3", "sim_b", 1, "2024-01-03T00:00:00"),
+            ("t4", "sim_a", 2, "2024-01-04T00:00:00"),
+        ]:
+            storage.store_task({
+                "task_id": task_id,
+                "task_type": "report_generate",
+                "status": "pending",
+                "created_at": created_at,
+                "updated_at": created_at,
+                "metadata": {"simulation_id": simulation_id},
+                "user_id": user_id,
+                "simulation_id": simulation_id,
+            })
+
+        assert storage.list_task_ids_by_simulation("report_generate", "sim_a", user_id=1) == ["t2", "t1"]
+        assert storage.list_task_ids_by_simulation("report_generate", "sim_a") == ["t4", "t2", "t1"]
+        assert storage.list_task_ids_by_simulation("graph_build", "sim_a") == []
+
+    def test_legacy_task_user_id_backfilled(self, tmp_path):
+        """测试旧任务 metadata 中的归属用户回填到 user_id 列"""
+        import json as _json
+        import sqlite3
+        from app.storage.database import SQLiteStorage
+
+        db_path = str(tmp_path / "tasks.db")
+        SQLiteStorage(db_path)
+        conn = sqlite3.connect(db_path)
+        conn.execute(
+            "INSERT INTO tasks (task_id, task_type, status, created_at, updated_at, metadata) "
+            "VALUES (?, ?, ?, ?, ?, ?)",
+            ("legacy", "report_generate", "completed", "2024-01-01T00:00:00", "2024-01-01T00:00:00",
+             _json.dumps({"user_id": 7}))
+        )
+        conn.commit()
+        conn.close()
+
+        assert SQLiteStorage(db_path).retrieve_task("legacy")["user_id"] == 7
+
+    def test_legacy_task_owner_read_from_metadata(self, app):
+        """测试 user_id 列为空的旧任务仍按 metadata 中的归属用户校验"""
+        from flask import g
+        from app.api.report import get_generate_status
+        from app.models.task import Task, TaskStatus
+
+        task = Task(
+            task_id="legacy", task_type="report_generate", status=TaskStatus.COMPLETED,
+            created_at=datetime.now(), updated_at=datetime.now(), metadata={"user_id": 7}
+        )
+        with patch("app.api.report.TaskManager") as manager_cls:
+            manager_cls.return_value.get_task.return_value = task
+            with app.test_request_context('/', method='POST', json={"task_id": "legacy"}):
+                g.current_user = {"id": 8}
+                response = get_generate_status()
+            with app.test_request_context('/', method='POST', json={"task_id": "legacy"}):
+                g.current_user = {"id": 7}
+                owner_response = get_generate_status()
+
+        assert response[1] == 403
+        assert owner_response.get_json()["success"] is True
+
+    def test_task_row_json_fields_normalized(self):
+        """测试任务行的 JSON 字段在加载时统一解析，损坏的值回退为默认值"""
+        from app.models.task import TaskManager
+
+        task = TaskManager()._dict_to_task({
+            "task_id": "t1",
+            "task_type": "simulation_prepare",
+            "status": "pending",
+            "created_at": "2024-01-01T00:00:00",
+            "updated_at": "2024-01-01T00:00:00",
+            "metadata": '{"simulation_id": "sim_a"}',
+            "result": "not json",
+            "progress_detail": None,
+        })
+
+        assert task.metadata == {"simulation_id": "sim_a"}
+        assert task.result is None
+
+    def test_task_status_persisted_and_filtered(self, tmp_path):
+        """测试任务状态更新写入数据库，进行中任务按状态在数据库中过滤"""
+        from app.models.task import TaskManager, TaskStatus
+        from app.storage.database import SQLiteStorage
+
+        manager = TaskManager()
+        storage = SQLiteStorage(str(tmp_path / "tasks.db"))
+        with patch.object(manager, "_storage", storage):
+            active = manager.create_task("report_generate", metadata={"simulation_id": "sim_x"}, user_id=1)
+            done = manager.create_task("report_generate", metadata={"simulation_id": "sim_x"}, user_id=1)
+            manager.complete_task(done, {})
+            try:
+                assert storage.retrieve_task(done)["status"] == "completed"
+                assert storage.list_task_ids_by_simulation(
+                    "report_generate", "sim_x", statuses=["pending", "processing"]
+                ) == [active]
+                assert manager.find_active_task_by_simulation("sim_x", "report_generate", user_id=1).task_id == active
+                assert [t["task_id"] for t in manager.list_tasks(
+                    task_type="report_generate", user_id=1, statuses=[TaskStatus.COMPLETED]
+                )] == [done]
+            finally:
+                manager._cache.pop(active, None)
+                manager._cache.pop(done, None)
+
+
 class TestReportGetAPI:
     """获取报告 API 测试"""
 
@@ -183,6 +299,62 @@ class TestReportListAPI:
             assert len(data['data']) == 1
 
 
+class TestReportUserFilter:
+    """报告按用户归属过滤测试"""
+
+    def test_filter_reports_by_projects(self):
+        """测试只保留给定项目下模拟的报告，且模拟归属批量解析"""
+        from app.services.report.manager import ReportManager
+
+        reports = [MagicMock(simulation_id=sid) for sid in ("sim_a", "sim_b", "sim_c", "")]
+
+        with patch('app.services.simulation_manager.SimulationManager.get_simulation_project_ids',
+                   return_value={"sim_a": "proj_1", "sim_b": "proj_2"}) as mock_lookup:
+            kept = ReportManager._filter_reports_by_projects(reports, frozenset({"proj_1"}))
+
+        assert [r.simulation_id for r in kept] == ["sim_a"]
+        mock_lookup.assert_called_once_with(["sim_a", "sim_b", "sim_c"])
+        assert ReportManager._filter_reports_by_projects(reports, frozenset()) == []
+
+
+class TestReportMaterializeMarkdown:
+    """报告 Markdown 落盘测试"""
+
+    def test_materialize_markdown_writes_atomically(self, tmp_path):
+        """测试落盘内容及 gzip 副本正确且不残留临时文件"""
+        import gzip
+        from app.services.report.manager import ReportManager
+
+        with patch.object(ReportManager, 'REPORTS_DIR', str(tmp_path)):
+            md_path = ReportManager.materialize_markdown("report_1", "# 标题\n内容")
+
+            with open(md_path, 'r', encoding='utf-8') as f:
+                assert f.read() == "# 标题\n内容"
+            with gzip.open(ReportManager.get_markdown_gz_path("report_1"), 'rt', encoding='utf-8') as f:
+                assert f.read() == "# 标题\n内容"
+            assert sorted(os.listdir(tmp_path / "report_1")) == ["full_report.md", "full_report.md.gz"]
+
+    def test_download_serves_gzip_when_accepted(self, app, tmp_path):
+        """测试客户端接受 gzip 时发送预压缩副本，否则发送原文件"""
+        from app.api.report import download_report
+        from app.services.report.manager import ReportManager
+
+        with patch.object(ReportManager, 'REPORTS_DIR', str(tmp_path)), \
+             patch('app.api.report._check_report_owner', return_value=None):
+            ReportManager.materialize_markdown("report_1", "# 标题")
+
+            with app.test_request_context('/', headers={'Accept-Encoding': 'gzip, deflate'}):
+                response = download_report("report_1")
+                assert response.headers['Content-Encoding'] == 'gzip'
+                assert 'Accept-Encoding' in response.headers['Vary']
+                response.close()
+
+            with app.test_request_context('/'):
+                response = download_report("report_1")
+                assert 'Content-Encoding' not in response.headers
+                response.close()
+
+
 class TestReportDeleteAPI:
     """报告删除 API 测试"""
 
@@ -258,6 +430,22 @@ class TestReportChatAPI:
         assert response.status_code in [200, 400, 404, 500]
 
 
+class TestReportChatAgentCache:
+    """对话 Agent 复用测试"""
+
+    def test_agent_reused_per_simulation(self):
+        """测试同一模拟复用 Agent，模拟需求变化时重新创建"""
+        from app.api import report
+
+        report._chat_agent_cache.clear()
+        with patch('app.api.report.ReportAgent', side_effect=lambda **kwargs: MagicMock(**kwargs)) as mock_agent:
+            first = report._get_chat_agent("graph_1", "sim_1", "需求")
+            assert report._get_chat_agent("graph_1", "sim_1", "需求") is first
+            assert report._get_chat_agent("graph_1", "sim_1", "新需求") is not first
+            assert mock_agent.call_count == 2
+        report._chat_agent_cache.clear()
+
+
 class TestReportLogsAPI:
     """报告日志 API 测试"""
 
@@ -275,6 +463,237 @@ class TestReportLogsAPI:
         assert response.status_code in [404, 500]
 
 
+class TestReportSimulationLookup:
+    """报告归属模拟ID查询测试"""
+
+    def test_simulation_id_cached_until_delete(self, tmp_path):
+        """测试模拟ID只读取一次 meta.json，删除报告后缓存失效"""
+        from app.services.report.manager import ReportManager
+
+        with patch.object(ReportManager, 'REPORTS_DIR', str(tmp_path)):
+            os.makedirs(tmp_path / "report_1")
+            with open(ReportManager._get_report_path("report_1"), 'w', encoding='utf-8') as f:
+                json.dump({"report_id": "report_1", "simulation_id": "sim_a"}, f)
+
+            assert ReportManager.get_report_simulation_id("report_1") == "sim_a"
+            with patch('builtins.open', side_effect=AssertionError("meta.json 不应被再次读取")):
+                assert ReportManager.get_report_simulation_id("report_1") == "sim_a"
+
+            assert ReportManager.delete_report("report_1")
+            assert ReportManager.get_report_simulation_id("report_1") is None
+
+
+class TestReportStatusPollCache:
+    """状态轮询短缓存测试"""
+
+    def test_progress_cached_and_invalidated_on_update(self, tmp_path):
+        """测试进度读取被短时缓存，更新进度后立即可见"""
+        from app.services.report.manager import ReportManager
+
+        with patch.object(ReportManager, 'REPORTS_DIR', str(tmp_path)):
+            ReportManager.update_progress("report_1", "generating", 10, "开始")
+            assert ReportManager.get_progress("report_1")["progress"] == 10
+
+            with patch('builtins.open', side_effect=AssertionError("progress.json 不应被再次读取")):
+                assert ReportManager.get_progress("report_1")["progress"] == 10
+
+            ReportManager.update_progress("report_1", "generating", 50, "进行中")
+            assert ReportManager.get_progress("report_1")["progress"] == 50
+
+    def test_progress_poll_during_write_not_recached(self, tmp_path):
+        """测试写入进度文件前到达的轮询不会把旧进度留在缓存中"""
+        import builtins
+        from app.services.report.manager import ReportManager
+
+        real_open = builtins.open
+
+        with patch.object(ReportManager, 'REPORTS_DIR', str(tmp_path)):
+            ReportManager.update_progress("report_1", "generating", 10, "开始")
+            progress_path = ReportManager._get_progress_path("report_1")
+
+            def open_with_poll(path, mode='r', *args, **kwargs):
+                if path == progress_path and 'w' in mode:
+                    ReportManager.get_progress("report_1")
+                return real_open(path, mode, *args, **kwargs)
+
+            with patch('builtins.open', side_effect=open_with_poll):
+                ReportManager.update_progress("report_1", "generating", 50, "进行中")
+
+            assert ReportManager.get_progress("report_1")["progress"] == 50
+
+    def test_by_simulation_miss_invalidated_on_save(self, tmp_path):
+        """测试按模拟查询的空结果在保存报告后失效"""
+        from app.services.report.manager import ReportManager
+        from app.services.report.models import Report, ReportStatus
+
+        with patch.object(ReportManager, 'REPORTS_DIR', str(tmp_path)):
+            assert ReportManager.get_report_by_simulation("sim_poll") is None
+
+            ReportManager.save_report(Report(
+                report_id="report_poll",
+                simulation_id="sim_poll",
+                graph_id="graph_1",
+                simulation_requirement="需求",
+                status=ReportStatus.COMPLETED,
+            ))
+
+            report = ReportManager.get_report_by_simulation("sim_poll")
+            assert report is not None and report.report_id == "report_poll"
+
+    def test_poll_response_conditional_get(self):
+        """测试轮询响应携带 ETag，内容未变化时返回 304"""
+        from flask import Flask
+        from app.api.report import _poll_response
+
+        flask_app = Flask(__name__)
+        payload = {"success": True, "data": {"progress": 10}}
+
+        with flask_app.test_request_context('/'):
+            response = _poll_response(payload)
+            etag = response.headers['ETag']
+            assert response.status_code == 200
+            assert response.headers['Cache-Control'] == 'private, max-age=1'
+
+        with flask_app.test_request_context('/', headers={'If-None-Match': etag}):
+            response = _poll_response(payload)
+            assert response.status_code == 304
+
+        with flask_app.test_request_context('/', headers={'If-None-Match': etag}):
+            assert _poll_response({"success": True, "data": {"progress": 50}}).status_code == 200
+
+
+class TestReportOwnerCheck:
+    """报告归属校验测试"""
+
+    def test_owner_check_uses_cached_chain(self):
+        """测试归属校验只走 report -> simulation -> project 的映射，不加载报告与模拟状态"""
+        from flask import Flask, g
+        from app.api.report import _check_report_owner
+
+        flask_app = Flask(__name__)
+
+        with patch('app.services.report_agent.ReportManager.get_report_simulation_id', return_value="sim_a"), \
+             patch('app.api.decorators._get_simulation_project_id', return_value="proj_1"), \
+             patch('app.api.decorators._get_project_owner', return_value=1), \
+             patch('app.services.report_agent.ReportManager.get_report') as mock_get_report, \
+             patch('app.services.simulation_manager.SimulationManager.get_simulation') as mock_get_sim:
+            with flask_app.test_request_context('/'):
+                g.current_user = {"id": 1}
+                assert _check_report_owner("report_1") is None
+
+                g.current_user = {"id": 2}
+                _, status = _check_report_owner("report_1")
+                assert status == 403
+
+            mock_get_report.assert_not_called()
+            mock_get_sim.assert_not_called()
+
+
+class TestReportState:
+    """报告轮询状态合并接口测试"""
+
+    def test_state_combines_progress_and_sections(self, app, tmp_path):
+        """测试一次返回进度、章节文件信息与完成状态"""
+        from app.api.report import get_report_state
+        from app.services.report.manager import ReportManager
+        from app.services.report.models import Report, ReportStatus
+
+        with patch.object(ReportManager, 'REPORTS_DIR', str(tmp_path)), \
+             patch('app.api.report._check_report_owner', return_value=None):
+            ReportManager.save_report(Report(
+                report_id="report_state",
+                simulation_id="sim_state",
+                graph_id="graph_1",
+                simulation_requirement="需求",
+                status=ReportStatus.GENERATING,
+            ))
+            ReportManager.update_progress("report_state", "generating", 40, "生成中")
+            for filename in ("section_02.md", "section_01.md"):
+                (tmp_path / "report_state" / filename).write_text("内容", encoding="utf-8")
+
+            with app.test_request_context('/'):
+                data = get_report_state("report_state").get_json()["data"]
+
+        assert data["status"] == "generating"
+        assert data["progress"]["progress"] == 40
+        assert [s["section_index"] for s in data["sections"]] == [1, 2]
+        assert "content" not in data["sections"][0]
+        assert data["is_complete"] is False and data["interview_unlocked"] is False
+
+
+class TestReportSectionContent:
+    """单章节内容接口测试"""
+
+    def test_section_served_by_accept_header(self, app, tmp_path):
+        """测试默认返回 JSON，Accept 为 text/markdown 时直接发送文件"""
+        from app.api.report import get_single_section
+
+        section_path = tmp_path / "section_01.md"
+        section_path.write_text("## 第一章", encoding="utf-8")
+
+        with patch('app.api.report._check_report_owner', return_value=None), \
+             patch('app.services.report_agent.ReportManager._get_section_path', return_value=str(section_path)):
+            with app.test_request_context('/'):
+                response = get_single_section("report_1", 1)
+                assert response.get_json()["data"]["content"] == "## 第一章"
+
+            with app.test_request_context('/', headers={'Accept': 'text/markdown'}):
+                response = get_single_section("report_1", 1)
+                response.direct_passthrough = False
+                assert response.mimetype == 'text/markdown'
+                assert response.headers['X-Section-Index'] == '1'
+                assert response.get_data(as_text=True) == "## 第一章"
+                response.close()
+
+
+class TestReportLogStream:
+    """日志流式输出测试"""
+
+    def test_iter_agent_log_skips_invalid_lines(self, tmp_path):
+        """测试逐行读取 Agent 日志，支持 from_line 并跳过解析失败的行"""
+        from app.services.report.manager import ReportManager
+
+        with patch.object(ReportManager, 'REPORTS_DIR', str(tmp_path)):
+            os.makedirs(tmp_path / "report_1")
+            with open(ReportManager._get_agent_log_path("report_1"), 'w', encoding='utf-8') as f:
+                f.write('{"step": 1}\nnot json\n{"step": 2}\n')
+
+            assert list(ReportManager.iter_agent_log("report_1")) == [{"step": 1}, {"step": 2}]
+            assert list(ReportManager.iter_agent_log("report_1", from_line=2)) == [{"step": 2}]
+            assert list(ReportManager.iter_agent_log("missing")) == []
+
+    @pytest.mark.parametrize("line_count", [5, 5000])
+    @pytest.mark.parametrize("trailing_newline", [True, False])
+    def test_console_log_from_line(self, tmp_path, line_count, trailing_newline):
+        """测试增量读取控制台日志（小文件与 mmap 大文件）的行与总行数"""
+        from app.services.report.manager import ReportManager
+
+        lines = [f"[INFO] 第 {i} 行日志" for i in range(line_count)]
+        content = "\n".join(lines) + ("\n" if trailing_newline else "")
+
+        with patch.object(ReportManager, 'REPORTS_DIR', str(tmp_path)):
+            os.makedirs(tmp_path / "report_1")
+            with open(ReportManager._get_console_log_path("report_1"), 'w', encoding='utf-8') as f:
+                f.write(content)
+
+            for from_line in (0, 3, line_count, line_count + 10):
+                result = ReportManager.get_console_log("report_1", from_line=from_line)
+                assert result["logs"] == lines[from_line:]
+                assert result["total_lines"] == line_count
+
+    def test_sse_events_format(self):
+        """测试 SSE 事件编码与结束事件"""
+        from app.api.report import _sse_events
+
+        events = list(_sse_events(iter(["第一行", {"a": 1}])))
+
+        assert events == [
+            'data: "第一行"\n\n',
+            'data: {"a":1}\n\n',
+            'event: end\ndata: {"count":2}\n\n',
+        ]
+
+
 class TestReportErrorHandling:
     """报告 API 错误处理测试"""
 
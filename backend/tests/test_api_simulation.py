@@ -70,6 +70,26 @@ class TestSimulationCreateAPI:
         # 可能成功或因为其他依赖失败
         assert response.status_code in [200, 201, 400, 500]
 
+    @pytest.mark.parametrize("owner_id, message", [(2, "无权操作该项目"), (None, "项目归属未知")])
+    @patch('app.services.simulation_manager.SimulationManager.create_simulation')
+    @patch('app.models.project.ProjectManager.get_project')
+    def test_create_simulation_requires_project_owner(self, mock_get_project, mock_create_sim, app,
+                                                      owner_id, message):
+        """测试不能在他人项目或未关联用户的旧项目下创建模拟"""
+        from flask import g
+        from app.api.simulation.prepare import create_simulation
+
+        mock_get_project.return_value = MagicMock(user_id=owner_id, graph_id='test_graph_id')
+
+        with app.test_request_context('/api/simulation/create', method='POST',
+                                      json={'project_id': 'proj_other'}):
+            g.current_user = {"id": 1}
+            response, status_code = create_simulation()
+
+        assert status_code == 403
+        assert response.get_json() == {"success": False, "error": message}
+        mock_create_sim.assert_not_called()
+
 
 class TestSimulationPrepareAPI:
     """模拟准备 API 测试"""
@@ -345,6 +365,40 @@ class TestAutoPilotAPI:
             data = json.loads(response.data)
             assert data['success'] == False
 
+    def test_stop_auto_pilot_missing_id_uses_error_format(self, app):
+        """测试自动驾驶接口使用统一的错误响应格式"""
+        from app.api.simulation.autopilot import stop_auto_pilot
+
+        with app.test_request_context('/', method='POST', json={}):
+            response, status_code = stop_auto_pilot()
+
+        assert status_code == 400
+        data = json.loads(response.data)
+        assert data['success'] == False
+        assert data['error_code'] == 'INVALID_INPUT'
+        assert data['recovery_suggestion']
+
+    def test_auto_pilot_invalid_json_body(self, app):
+        """测试请求体无法解析时按缺少 simulation_id 处理"""
+        from app.api.simulation.autopilot import get_auto_pilot_status
+
+        with app.test_request_context('/', method='POST', data='{bad', content_type='application/json'):
+            response, status_code = get_auto_pilot_status()
+
+        assert status_code == 400
+        assert json.loads(response.data)['error'] == "请提供 simulation_id"
+
+    @pytest.mark.parametrize("mode", ["", "AUTOMATIC", "semi"])
+    def test_config_auto_pilot_invalid_mode(self, app, mode):
+        """测试非法的 mode 取值返回 400"""
+        from app.api.simulation.autopilot import config_auto_pilot
+
+        with app.test_request_context('/', method='POST', json={'simulation_id': 'sim_001', 'mode': mode}):
+            response, status_code = config_auto_pilot()
+
+        assert status_code == 400
+        assert "mode" in json.loads(response.data)['error']
+
     def test_resume_auto_pilot_missing_id(self, client):
         """测试恢复自动驾驶缺少ID"""
         response = client.post('/api/simulation/auto-pilot/resume',
@@ -467,4 +521,53 @@ class TestSimulationValidation:
         """测试超长模拟ID"""
         long_id = 'a' * 1000
         response = client.get(f'/api/simulation/status?simulation_id={long_id}')
-        assert response.status_code in [400, 404, 414, 500]
\ No newline at end of file
+        assert response.status_code in [400, 404, 414, 500]
+
+
+class TestSimulationProjectLookup:
+    """模拟所属项目查询测试"""
+
+    def test_bulk_project_ids(self, tmp_path):
+        """测试批量读取模拟所属项目，跳过不存在的模拟且不创建目录"""
+        import os
+        from app.services.simulation_manager import SimulationManager
+
+        for sim_id, project_id in [("sim_a", "proj_1"), ("sim_b", "proj_2")]:
+            os.makedirs(tmp_path / sim_id)
+            (tmp_path / sim_id / "state.json").write_text(json.dumps({"project_id": project_id}))
+
+        manager = SimulationManager.__new__(SimulationManager)
+        manager.SIMULATION_DATA_DIR = str(tmp_path)
+        manager._simulations = {}
+
+        result = manager.get_simulation_project_ids(["sim_a", "sim_b", "sim_a", "sim_missing"])
+
+        assert result == {"sim_a": "proj_1", "sim_b": "proj_2"}
+        assert not os.path.exists(tmp_path / "sim_missing")
+
+
+class TestSimulationStateUpdate:
+    """模拟状态批量更新测试"""
+
+    def test_update_fields_writes_once(self, tmp_path):
+        """测试多个字段一次更新并写回文件，模拟不存在时返回 None"""
+        from app.services.simulation_manager import SimulationManager, SimulationState
+
+        manager = SimulationManager.__new__(SimulationManager)
+        manager.SIMULATION_DATA_DIR = str(tmp_path)
+        manager._simulations = {}
+        manager._save_simulation_state(SimulationState("sim_a", "proj_1", "graph_1"))
+
+        with patch.object(manager, "_save_simulation_state", wraps=manager._save_simulation_state) as save:
+            state = manager.update_fields(
+                "sim_a", auto_pilot_enabled=True, auto_pilot_started_at="2024-01-01T00:00:00"
+            )
+
+        assert save.call_count == 1
+        assert state.auto_pilot_enabled is True
+        saved = json.loads((tmp_path / "sim_a" / "state.json").read_text(encoding="utf-8"))
+        assert saved["auto_pilot_started_at"] == "2024-01-01T00:00:00"
+        assert manager.update_fields("sim_missing", auto_pilot_enabled=True) is None
+
+        with pytest.raises(AttributeError):
+            manager.update_fields("sim_a", not_a_field=1)
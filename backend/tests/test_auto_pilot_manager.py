@@ -106,6 +106,15 @@ class TestAutoPilotManager:
         assert hasattr(AutoPilotManager, '_states')
         assert hasattr(AutoPilotManager, '_threads')
     
+    def test_get_auto_pilot_manager_shared(self):
+        """测试各请求共享同一个管理器实例（运行中的线程表不随请求丢失）"""
+        from app.services.auto_pilot_manager import AutoPilotManager, get_auto_pilot_manager
+
+        manager = get_auto_pilot_manager()
+
+        assert isinstance(manager, AutoPilotManager)
+        assert get_auto_pilot_manager() is manager
+    
     @patch('app.services.auto_pilot_manager.get_config')
     @patch('os.path.exists')
     def test_get_state_not_found(self, mock_exists, mock_config):
@@ -91,6 +91,39 @@ class TestValidators:
             # 应该检测到攻击
             # assert result == False
     
+    def test_contains_sql_injection_matches_each_pattern(self):
+        """测试合并后的正则与逐条匹配结果一致"""
+        import re
+        from app.utils.validators import contains_sql_injection, SQL_INJECTION_PATTERNS
+        
+        samples = [
+            "normal input", "select name", "1 OR 1=1", "a -- b", "EXEC(", "xp_cmdshell",
+            "sp_who", "0x1F", "it's", "WAITFOR DELAY", "sleep(5)", "普通中文输入"
+        ]
+        
+        for sample in samples:
+            expected = any(re.search(p, sample, re.IGNORECASE) for p in SQL_INJECTION_PATTERNS)
+            assert contains_sql_injection(sample) == expected
+
+    def test_is_sql_injection_free_matches_validate(self):
+        """测试布尔快速路径与 validate_no_sql_injection 结果一致"""
+        from app.utils.validators import is_sql_injection_free, validate_no_sql_injection
+
+        values = [
+            "normal input",
+            "1 OR 1=1",
+            {"name": "alice", "age": 3},
+            {"name": "alice", "query": "' UNION SELECT * FROM users --"},
+            {"nested": {"query": "1 OR 1=1"}},
+            ["ok", "xp_cmdshell"],
+            ["ok", 1, None],
+            None,
+            42,
+        ]
+
+        for value in values:
+            assert is_sql_injection_free(value) == validate_no_sql_injection(value).is_valid
+
     def test_sanitize_string_normal(self):
         """测试正常字符串清理"""
         from app.utils.validators import sanitize_string
@@ -369,6 +402,94 @@ class TestLogger:
         # logger.error('Error message')
 
 
+class TestTTLCache:
+    """进程内 TTL 缓存测试"""
+    
+    def test_get_and_set(self):
+        """测试写入与读取"""
+        from app.utils.cache import TTLCache
+        
+        cache = TTLCache(maxsize=10, ttl=60)
+        cache.set("a", 1)
+        
+        assert cache.get("a") == 1
+        assert cache.get("missing", "default") == "default"
+    
+    def test_expired_entry_is_dropped(self):
+        """测试过期条目不再返回"""
+        from app.utils.cache import TTLCache
+        
+        cache = TTLCache(maxsize=10, ttl=60)
+        cache.set("a", 1, ttl=0)
+        
+        assert cache.get("a") is None
+        assert len(cache) == 0
+    
+    def test_evicts_oldest_when_full(self):
+        """测试超出容量时淘汰最早写入的条目"""
+        from app.utils.cache import TTLCache
+        
+        cache = TTLCache(maxsize=2, ttl=60)
+        cache.set("a", 1)
+        cache.set("b", 2)
+        cache.set("c", 3)
+        
+        assert cache.get("a") is None
+        assert cache.get("b") == 2
+        assert cache.get("c") == 3
+    
+    def test_pop_and_clear(self):
+        """测试移除与清空"""
+        from app.utils.cache import TTLCache
+        
+        cache = TTLCache(maxsize=10, ttl=60)
+        cache.set("a", 1)
+        cache.set("b", 2)
+        
+        assert cache.pop("a") == 1
+        assert cache.get("a") is None
+        cache.clear()
+        assert len(cache) == 0
+
+
+class TestJSONProvider:
+    """orjson JSON 提供者测试"""
+
+    def test_output_matches_default_provider(self):
+        """测试与 Flask 默认提供者的序列化结果等价"""
+        pytest.importorskip("orjson")
+        import json
+        from datetime import datetime
+        from flask import Flask
+        from flask.json.provider import DefaultJSONProvider
+        from app.utils.json_provider import OrjsonProvider
+
+        flask_app = Flask(__name__)
+        fast, default = OrjsonProvider(flask_app), DefaultJSONProvider(flask_app)
+        payload = {"b": "中文", "a": [1, 2.5, None], "at": datetime(2024, 1, 2, 3, 4, 5)}
+
+        assert json.loads(fast.dumps(payload)) == json.loads(default.dumps(payload))
+        assert fast.dumps({"b": 1, "a": 2}) == '{"a":2,"b":1}'
+        assert fast.dumps({"n": 2 ** 70}) == default.dumps({"n": 2 ** 70})
+        assert fast.loads('{"a": "中文"}') == {"a": "中文"}
+
+    def test_jsonify_response_body(self):
+        """测试 jsonify 响应体与默认提供者等价，超出 orjson 能力时回退"""
+        pytest.importorskip("orjson")
+        import json
+        from flask import Flask, jsonify
+        from app.utils.json_provider import OrjsonProvider
+
+        flask_app = Flask(__name__)
+        flask_app.json = OrjsonProvider(flask_app)
+
+        with flask_app.app_context():
+            response = jsonify({"b": "中文", "a": 1})
+            assert response.get_data() == '{"a":1,"b":"中文"}\n'.encode("utf-8")
+            assert response.mimetype == "application/json"
+            assert json.loads(jsonify({"n": 2 ** 70}).get_data()) == {"n": 2 ** 70}
+
+
 class TestTextProcessor:
     """文本处理器测试"""
     